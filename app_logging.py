@@ -0,0 +1,169 @@
+"""Logging do servidor com escrita em segundo plano.
+
+Os módulos pegam um logger por categoria (``get_logger("auth")``). As linhas
+saem como antes (``[AUTH] mensagem``), agora com horário e nível.
+
+No caminho da requisição:
+
+- um registro abaixo do nível configurado é descartado pelo próprio
+  ``logging`` (use ``log.debug("...%s", x)``, sem f-string, para nem montar o
+  texto);
+- filtros de amostragem (1 a cada N por categoria) e de limite por segundo
+  (balde de tokens por categoria) descartam o excesso de DEBUG/INFO;
+  WARNING e acima sempre passam;
+- o que sobra vai para uma fila; uma thread (``QueueListener``) redige ids
+  de sessão e tokens e escreve no stdout, então a requisição nunca espera
+  pelo driver de log do Docker.
+
+Em produção (``LOG_MODE=production``, o padrão) o nível é INFO: linha de
+acesso, cookies e o passo a passo de autenticação ficam em DEBUG.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import re
+import sys
+import threading
+import time
+
+
+ROOT = "minedash"
+FORMAT = "%(asctime)s %(levelname)s [%(tag)s] %(message)s"
+
+# session_id=..., 'token': '...', token: ... (o valor fica só com o começo)
+REDACT_RE = re.compile(r"((?:session_id|token)['\"]?\s*[=:]?\s*['\"]?)([A-Za-z0-9_-]{6})[A-Za-z0-9._~-]*")
+UUID_RE = re.compile(r"\b([0-9a-f]{8})-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b")
+
+
+def get_logger(category):
+    """Logger da categoria (``[CATEGORIA]`` na saída)"""
+    return logging.getLogger(f"{ROOT}.{category.lower()}")
+
+
+def redact(text):
+    """Mantém só o começo de ids de sessão, tokens e UUIDs"""
+    text = REDACT_RE.sub(r"\1\2…", text)
+    return UUID_RE.sub(r"\1-…", text)
+
+
+def parse_sample(spec):
+    """'http=100,auth=10' -> {"http": 100, "auth": 10} (1 a cada N)"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, every = item.partition("=")
+        every = int(every)
+        if every < 1:
+            raise ValueError(f"amostragem inválida para {name}: {every}")
+        rates[name.strip().lower()] = every
+    return rates
+
+
+class _Formatter(logging.Formatter):
+    def format(self, record):
+        record.tag = record.name.rpartition(".")[2].upper()
+        return redact(super().format(record))
+
+
+class ThrottleFilter(logging.Filter):
+    """Amostragem e limite por segundo por categoria, só abaixo de WARNING.
+
+    Quando uma linha passa depois de descartes, ela leva a contagem
+    (``+N suprimidas``) para o volume não sumir do log sem aviso.
+    """
+
+    def __init__(self, rate=0, burst=None, sample=None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        self.sample = sample or {}
+        self._buckets = {}          # categoria -> [tokens, última recarga, contador, suprimidas]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        category = record.name.rpartition(".")[2]
+        with self._lock:
+            state = self._buckets.get(category)
+            if state is None:
+                state = self._buckets[category] = [float(self.burst), time.monotonic(), 0, 0]
+            state[2] += 1
+            every = self.sample.get(category)
+            keep = every is None or (state[2] - 1) % every == 0
+            if keep and self.rate:
+                now = time.monotonic()
+                state[0] = min(self.burst, state[0] + (now - state[1]) * self.rate)
+                state[1] = now
+                if state[0] >= 1:
+                    state[0] -= 1
+                else:
+                    keep = False
+            if not keep:
+                state[3] += 1
+                return False
+            dropped, state[3] = state[3], 0
+        if dropped:
+            record.msg = f"{record.msg} (+{dropped} suprimidas)"
+        return True
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    dropped = 0
+
+    def prepare(self, record):
+        # Só este handler vê o registro: junta mensagem e traceback sem a
+        # cópia que o QueueHandler faz
+        record.msg = record.message = self.format(record)
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener = None
+
+
+def configure(level="INFO", rate=0, burst=None, sample=None, stream=None, queue_size=10000):
+    """Liga os loggers à fila; a escrita só começa no ``start()``.
+
+    Com a fila cheia (stdout travado) o registro é descartado em vez de
+    bloquear a requisição.
+    """
+    global _listener
+    stop()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(_Formatter(FORMAT, "%Y-%m-%d %H:%M:%S"))
+
+    records = queue.Queue(queue_size)
+    handler = _DroppingQueueHandler(records)
+    if rate or sample:
+        handler.addFilter(ThrottleFilter(rate, burst, sample))
+
+    root = logging.getLogger(ROOT)
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(records, output)
+
+
+def start():
+    """Sobe a thread de escrita (depois do fork do pool de imagens)"""
+    _listener.start()
+
+
+def stop():
+    """Escreve o que ainda está na fila e para a thread"""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+atexit.register(stop)
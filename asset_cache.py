@@ -0,0 +1,200 @@
+"""Cache em memória das páginas e arquivos estáticos da raiz de html/.
+
+Cada arquivo é lido uma vez e guardado já com as variantes gzip (e brotli,
+se o módulo ``brotli`` estiver instalado), o ETag e o Last-Modified. Servir
+uma página ou um .css/.js não toca no disco: só escolhe a variante pelo
+Accept-Encoding ou responde 304 pelo If-None-Match / If-Modified-Since.
+
+Edições nos arquivos são detectadas por inotify no diretório (ou por uma
+checagem periódica de mtime, sem inotify) e a entrada é recarregada.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from collections import namedtuple
+from email.utils import formatdate, parsedate_to_datetime
+
+from app_logging import get_logger
+from file_watch import open_watcher
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+log = get_logger("assets")
+
+
+# Extensões carregadas no cache (.html só é servido pelos handlers de página)
+CACHED_EXTENSIONS = ('.html', '.css', '.js', '.png', '.jpg', '.jpeg', '.gif', '.svg',
+                     '.ico', '.woff', '.woff2', '.ttf')
+COMPRESSIBLE = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+MAX_FILE_SIZE = 2 * 1024 * 1024
+# Abaixo disso compressão não compensa os cabeçalhos
+MIN_COMPRESS_SIZE = 512
+
+Asset = namedtuple("Asset", ["name", "body", "gzip", "br", "etag", "last_modified",
+                             "mtime", "content_type", "key"])
+
+
+def _content_type(name):
+    ctype, _ = mimetypes.guess_type(name)
+    ctype = ctype or 'application/octet-stream'
+    if ctype.startswith('text/') or ctype == 'application/javascript':
+        ctype += '; charset=utf-8'
+    return ctype
+
+
+def build_asset(name, body, mtime, key):
+    ctype = _content_type(name)
+    gz = br = None
+    if len(body) >= MIN_COMPRESS_SIZE and ctype.startswith(COMPRESSIBLE):
+        gz = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            br = brotli.compress(body, quality=11)
+        # Variante maior que o original não vale a pena
+        if len(gz) >= len(body):
+            gz = None
+        if br is not None and len(br) >= len(body):
+            br = None
+    # ETag fraco: vale para todas as codificações do mesmo conteúdo
+    etag = 'W/"%s"' % hashlib.sha1(body).hexdigest()[:20]
+    return Asset(name, body, gz, br, etag, formatdate(mtime, usegmt=True), int(mtime), ctype, key)
+
+
+def choose_encoding(accept_encoding, asset):
+    """'br', 'gzip' ou None conforme o Accept-Encoding e as variantes existentes"""
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        token, _, params = part.partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.add(token.strip().lower())
+    if asset.br is not None and 'br' in accepted:
+        return 'br'
+    if asset.gzip is not None and ('gzip' in accepted or '*' in accepted):
+        return 'gzip'
+    return None
+
+
+def etag_matches(etag, header):
+    """Comparação fraca de ETag contra um If-None-Match / If-Range"""
+    def opaque(tag):
+        return tag[2:] if tag.startswith('W/') else tag
+
+    tags = [opaque(t.strip()) for t in header.split(',')]
+    return '*' in tags or opaque(etag) in tags
+
+
+def not_modified(etag, mtime, if_none_match, if_modified_since):
+    """True se o cliente já tem esta versão (If-None-Match tem prioridade)"""
+    if if_none_match:
+        return etag_matches(etag, if_none_match)
+    if if_modified_since:
+        try:
+            return int(parsedate_to_datetime(if_modified_since).timestamp()) >= int(mtime)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class AssetCache:
+    """Arquivos da raiz de ``root`` em memória, recarregados quando mudam"""
+
+    def __init__(self, root=".", max_file_size=MAX_FILE_SIZE, poll_interval=2.0):
+        self.root = root
+        self.max_file_size = max_file_size
+        self.poll_interval = poll_interval
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.inotify = None
+        self._assets = {}
+        self._lock = threading.Lock()
+
+    def _eligible(self, name):
+        return '/' not in name and not name.startswith('.') and name.lower().endswith(CACHED_EXTENSIONS)
+
+    def _load(self, name):
+        path = os.path.join(self.root, name)
+        try:
+            with open(path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                if st.st_size > self.max_file_size:
+                    return None
+                body = f.read()
+        except (FileNotFoundError, IsADirectoryError):
+            return None
+        return build_asset(name, body, st.st_mtime, (st.st_mtime_ns, st.st_size))
+
+    def reload(self, name):
+        """Relê ``name`` (ou o remove do cache se sumiu)"""
+        if not self._eligible(name):
+            return
+        asset = self._load(name)
+        with self._lock:
+            if asset is None:
+                self._assets.pop(name, None)
+            else:
+                self._assets[name] = asset
+        self.reloads += 1
+
+    def preload(self):
+        """Carrega todos os arquivos elegíveis da raiz"""
+        started = time.perf_counter()
+        with os.scandir(self.root) as entries:
+            names = [e.name for e in entries if e.is_file() and self._eligible(e.name)]
+        for name in names:
+            self.reload(name)
+        total = sum(len(a.body) for a in self._assets.values())
+        log.info("%s arquivos em cache (%s KB, brotli %s) em %.0f ms", len(self._assets), total // 1024,
+                 "ativo" if brotli else "indisponível", (time.perf_counter() - started) * 1000)
+
+    def get(self, name):
+        """Asset em memória ou None (sem acesso a disco)"""
+        asset = self._assets.get(name)
+        if asset is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return asset
+
+    # --- recarga -------------------------------------------------------------
+
+    def attach(self, hub):
+        """Registra o observador de mudanças no loop do hub (antes de hub.start())"""
+        self.inotify = open_watcher(self.root)
+        if self.inotify is not None:
+            hub.add_reader(self.inotify, self._on_inotify)
+        else:
+            log.warning("inotify indisponível, checando mudanças a cada %ss", self.poll_interval)
+            hub.call_every(self.poll_interval, self.check)
+
+    def _on_inotify(self):
+        names = self.inotify.read()
+        if names is None:
+            self.check()
+            return
+        for name in names:
+            self.reload(name)
+
+    def check(self):
+        """Compara mtime/tamanho de tudo que está no cache e procura arquivos novos"""
+        with os.scandir(self.root) as entries:
+            current = {e.name: e.stat() for e in entries if e.is_file() and self._eligible(e.name)}
+        for name in set(self._assets) - set(current):
+            self.reload(name)
+        for name, st in current.items():
+            asset = self._assets.get(name)
+            if asset is None or asset.key != (st.st_mtime_ns, st.st_size):
+                self.reload(name)
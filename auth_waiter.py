@@ -0,0 +1,160 @@
+"""Long-poll do login via Discord (/api/discord/verify-auth?wait=N).
+
+Em vez de cada aba perguntar ao discord-bot a cada 2s, a requisição fica
+estacionada aqui até o login ser confirmado/expirar ou até ``wait``
+segundos passarem. O socket sai do pool HTTP (``server.detach``), então
+logins esperando não prendem workers.
+
+Uma única thread consulta o bot para todos os tokens pendentes de uma vez
+(``DiscordClient.check_auth_batch``) a cada ``interval`` segundos, só
+enquanto há alguém esperando, e responde as requisições estacionadas.
+"""
+import json
+import threading
+import time
+
+from app_logging import get_logger
+
+log = get_logger("auth")
+
+
+# Resposta de quem esperou ``wait`` segundos sem novidade: o cliente repete
+PENDING = {"verified": False, "expired": False, "pending": True}
+
+STATUS_TEXT = {200: "OK", 500: "Internal Server Error"}
+
+
+def http_response(status, headers, body):
+    """Resposta HTTP/1.1 completa (bytes) para escrever direto no socket"""
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}"]
+    lines += [f"{name}: {value}" for name, value in headers]
+    lines.append(f"Content-Length: {len(body)}")
+    lines.append("Connection: close")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+def is_final(auth_data):
+    return bool(auth_data and (auth_data.get("verified") or auth_data.get("expired")))
+
+
+class _Parked:
+    __slots__ = ("sock", "deadline", "respond")
+
+    def __init__(self, sock, deadline, respond):
+        self.sock = sock
+        self.deadline = deadline
+        self.respond = respond
+
+
+class AuthWaiter(threading.Thread):
+    """Requisições de verify-auth estacionadas + poller único do discord-bot"""
+
+    def __init__(self, client, interval=1.0, max_parked=500):
+        super().__init__(name="auth-waiter", daemon=True)
+        self.client = client
+        self.interval = interval
+        self.max_parked = max_parked
+        self.upstream_polls = 0
+        self._parked = {}       # token -> [_Parked]
+        self._final = {}        # token -> (status final, quando)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+
+    def final_state(self, token):
+        """Status já confirmado/expirado visto pelo poller (ou None)"""
+        entry = self._final.get(token)
+        return entry[0] if entry else None
+
+    def full(self):
+        with self._lock:
+            return sum(len(p) for p in self._parked.values()) >= self.max_parked
+
+    def park(self, token, sock, timeout, respond):
+        """Estaciona ``sock`` até o token ter status final ou ``timeout`` passar.
+
+        ``respond(auth_data)`` roda na thread do waiter e devolve
+        ``(status, headers, corpo)`` da resposta.
+        """
+        with self._lock:
+            first = token not in self._parked
+            self._parked.setdefault(token, []).append(
+                _Parked(sock, time.monotonic() + timeout, respond))
+        if first:
+            # Token novo: consulta o bot já, sem esperar o próximo ciclo
+            self._wake.set()
+
+    def _resolve(self, parked, auth_data):
+        try:
+            status, headers, body = parked.respond(auth_data)
+        except Exception as e:
+            log.error("Erro ao responder verify-auth: %s", e)
+            status, headers, body = 500, [("Content-type", "application/json")], \
+                json.dumps({"error": str(e), "verified": False}).encode("utf-8")
+        try:
+            parked.sock.settimeout(5)
+            parked.sock.sendall(http_response(status, headers, body))
+        except OSError:
+            pass
+        finally:
+            try:
+                parked.sock.close()
+            except OSError:
+                pass
+
+    def poll_once(self):
+        with self._lock:
+            tokens = list(self._parked)
+        if not tokens:
+            return
+        try:
+            self.upstream_polls += 1
+            results = self.client.check_auth_batch(tokens)
+        except Exception as e:
+            log.error("Erro ao consultar logins pendentes: %s", e)
+            results = {}
+
+        now = time.monotonic()
+        done = []
+        with self._lock:
+            for token in tokens:
+                auth_data = results.get(token)
+                waiting = self._parked.get(token, [])
+                if is_final(auth_data):
+                    self._final[token] = (auth_data, now)
+                    done.extend((p, auth_data) for p in waiting)
+                    self._parked.pop(token, None)
+                    continue
+                expired = [p for p in waiting if p.deadline <= now]
+                if expired:
+                    done.extend((p, PENDING) for p in expired)
+                    waiting = [p for p in waiting if p.deadline > now]
+                    if waiting:
+                        self._parked[token] = waiting
+                    else:
+                        self._parked.pop(token, None)
+            # Status finais só servem para abas atrasadas: guarda por 1 min
+            for token, (_, seen) in list(self._final.items()):
+                if now - seen > 60:
+                    del self._final[token]
+
+        for parked, auth_data in done:
+            self._resolve(parked, auth_data)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            with self._lock:
+                idle = not self._parked
+            if idle:
+                # Ninguém esperando: dorme até o próximo park()
+                self._wake.wait()
+            else:
+                self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop_event.is_set():
+                break
+            self.poll_once()
@@ -0,0 +1,87 @@
+"""Micro-benchmark: connect-por-requisição vs conexões do db.py.
+
+Reproduz o padrão do check_auth (SELECT da sessão + UPDATE de last_access +
+commit) e o SELECT de avisos dispensados num banco temporário, medindo as
+duas formas de acesso.
+
+Uso:
+    python bench/db_bench.py --iterations 5000
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import db  # noqa: E402
+
+
+SESSION_ID = "bench-session"
+
+
+def connect_per_request_auth():
+    conn = sqlite3.connect(db.DB_FILE)
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT user_id, user_name, expires_at
+        FROM user_sessions
+        WHERE session_id = ?
+    ''', (SESSION_ID,))
+    cursor.fetchone()
+    cursor.execute('''
+        UPDATE user_sessions
+        SET last_access = CURRENT_TIMESTAMP
+        WHERE session_id = ?
+    ''', (SESSION_ID,))
+    conn.commit()
+    conn.close()
+
+
+def pooled_auth():
+    db.get_session(SESSION_ID)
+    db.touch_session(SESSION_ID)
+
+
+def connect_per_request_notices():
+    conn = sqlite3.connect(db.DB_FILE)
+    cursor = conn.cursor()
+    cursor.execute('SELECT notice_id FROM dismissed_notices WHERE user_id = ?', ("u1",))
+    cursor.fetchall()
+    conn.close()
+
+
+def pooled_notices():
+    db.get_dismissed_notices("u1")
+
+
+def run(label, fn, iterations):
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40}{elapsed / iterations * 1e6:>10.1f} us/op")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        db.init_db()
+        db.create_session(SESSION_ID, "u1", "bench", "2099-01-01 00:00:00")
+        db.dismiss_notice("u1", "n1")
+
+        run("check_auth  connect por requisição", connect_per_request_auth, args.iterations)
+        run("check_auth  db.py", pooled_auth, args.iterations)
+        run("avisos      connect por requisição", connect_per_request_notices, args.iterations)
+        run("avisos      db.py", pooled_notices, args.iterations)
+        db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
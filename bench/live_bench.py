@@ -0,0 +1,122 @@
+"""Benchmark do /api/live: N clientes SSE conectados e parados.
+
+Abre ``--clients`` conexões em /api/live, lê o estado inicial de cada uma e
+depois só escuta por ``--duration`` segundos (uma thread com ``selectors``
+lê todos os sockets). Com ``--pid`` mede o CPU do processo do servidor no
+período ocioso via /proc, sem depender de psutil.
+
+Uso:
+    python bench/live_bench.py --url http://localhost:3010 --clients 500 --duration 30 --pid $(pgrep -f server.py)
+"""
+import argparse
+import os
+import selectors
+import socket
+import time
+from urllib.parse import urlsplit
+
+
+def cpu_seconds(pid):
+    """utime + stime do processo em segundos (Linux)"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def connect(host, port, path):
+    sock = socket.create_connection((host, port), timeout=10)
+    sock.sendall(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode())
+    data = b""
+    while b"\r\n\r\n" not in data:
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise ConnectionError("conexão fechada antes dos cabeçalhos")
+        data += chunk
+    status = data.split(b"\r\n", 1)[0]
+    if b" 200 " not in status:
+        raise ConnectionError(status.decode("latin-1"))
+    sock.setblocking(False)
+    return sock
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:3010")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--topics", default="status,metrics,players,leaderboard,discord")
+    parser.add_argument("--pid", type=int, help="pid do servidor para medir CPU/RSS")
+    args = parser.parse_args()
+
+    parts = urlsplit(args.url)
+    path = f"/api/live?topics={args.topics}"
+    sel = selectors.DefaultSelector()
+    received = {}
+    failed = 0
+
+    started = time.perf_counter()
+    for i in range(args.clients):
+        try:
+            sock = connect(parts.hostname, parts.port or 80, path)
+        except OSError as e:
+            failed += 1
+            if failed == 1:
+                print(f"falha ao conectar: {e}")
+            continue
+        sel.register(sock, selectors.EVENT_READ, i)
+        received[i] = 0
+    connect_time = time.perf_counter() - started
+
+    def drain(timeout):
+        closed = 0
+        for key, _ in sel.select(timeout):
+            try:
+                chunk = key.fileobj.recv(65536)
+            except BlockingIOError:
+                continue
+            except OSError:
+                chunk = b""
+            if not chunk:
+                sel.unregister(key.fileobj)
+                key.fileobj.close()
+                closed += 1
+                continue
+            received[key.data] += len(chunk)
+        return closed
+
+    # Estado inicial de todos antes de começar a medir
+    settle = time.monotonic() + 2
+    while time.monotonic() < settle:
+        drain(0.1)
+    initial_bytes = sum(received.values())
+
+    cpu_before = cpu_seconds(args.pid) if args.pid else None
+    closed = 0
+    deadline = time.monotonic() + args.duration
+    while time.monotonic() < deadline:
+        closed += drain(max(0.0, min(1.0, deadline - time.monotonic())))
+    idle_bytes = sum(received.values()) - initial_bytes
+
+    alive = len(sel.get_map())
+    print(f"{alive} clientes conectados em {connect_time:.2f}s ({failed} falhas, {closed} fechados)")
+    print(f"estado inicial: {initial_bytes / max(1, len(received)):.0f} bytes por cliente")
+    print(f"parados por {args.duration:.0f}s: {idle_bytes / max(1, alive) / args.duration:.1f} bytes/s por cliente")
+    if args.pid:
+        cpu = cpu_seconds(args.pid) - cpu_before
+        print(f"CPU do servidor: {cpu:.2f}s em {args.duration:.0f}s "
+              f"({cpu / args.duration * 100:.2f}% de um núcleo), RSS {rss_mb(args.pid):.0f} MB")
+
+    for key in list(sel.get_map().values()):
+        key.fileobj.close()
+
+
+if __name__ == "__main__":
+    main()
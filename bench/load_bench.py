@@ -0,0 +1,109 @@
+"""Benchmark de carga: simula N abas do dashboard fazendo polling.
+
+Cada aba usa uma conexão keep-alive própria e repete o padrão do mine.js
+(``/api/system-metrics`` a cada 2s e ``/api/status`` a cada 5s). No final
+imprime p50/p99/máximo de latência por rota.
+
+Uso:
+    python bench/load_bench.py --url http://localhost:3010 --tabs 50 --duration 30
+"""
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+ROUTES = [
+    ("/api/system-metrics", 2.0),
+    ("/api/status", 5.0),
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[k]
+
+
+class Tab(threading.Thread):
+    def __init__(self, host, port, deadline, results, lock):
+        super().__init__(daemon=True)
+        self.host = host
+        self.port = port
+        self.deadline = deadline
+        self.results = results
+        self.lock = lock
+        self.conn = None
+
+    def request(self, path):
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            try:
+                start = time.perf_counter()
+                self.conn.request("GET", path)
+                resp = self.conn.getresponse()
+                resp.read()
+                elapsed = time.perf_counter() - start
+                if resp.getheader("Connection", "").lower() == "close":
+                    self.conn.close()
+                    self.conn = None
+                return resp.status, elapsed
+            except (http.client.HTTPException, OSError):
+                self.conn.close()
+                self.conn = None
+        return None, None
+
+    def run(self):
+        next_due = {path: time.monotonic() for path, _ in ROUTES}
+        while time.monotonic() < self.deadline:
+            now = time.monotonic()
+            for path, interval in ROUTES:
+                if now >= next_due[path]:
+                    next_due[path] = now + interval
+                    status, elapsed = self.request(path)
+                    with self.lock:
+                        entry = self.results.setdefault(path, {"lat": [], "errors": 0, "rejected": 0})
+                        if status is None:
+                            entry["errors"] += 1
+                        elif status == 503:
+                            entry["rejected"] += 1
+                        else:
+                            entry["lat"].append(elapsed)
+            time.sleep(max(0.0, min(next_due.values()) - time.monotonic()))
+        if self.conn is not None:
+            self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:3010")
+    parser.add_argument("--tabs", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0)
+    args = parser.parse_args()
+
+    parts = urlsplit(args.url)
+    results = {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+    tabs = [Tab(parts.hostname, parts.port or 80, deadline, results, lock) for _ in range(args.tabs)]
+    for tab in tabs:
+        tab.start()
+        time.sleep(2.0 / args.tabs)  # espalha as abas como usuários reais
+    for tab in tabs:
+        tab.join()
+
+    print(f"{args.tabs} abas, {args.duration:.0f}s contra {args.url}")
+    print(f"{'rota':<24}{'reqs':>7}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'503':>6}{'erros':>7}")
+    for path, _ in ROUTES:
+        entry = results.get(path, {"lat": [], "errors": 0, "rejected": 0})
+        lat = [v * 1000 for v in entry["lat"]]
+        print(f"{path:<24}{len(lat):>7}{percentile(lat, 50):>10.1f}{percentile(lat, 99):>10.1f}"
+              f"{max(lat or [0]):>10.1f}{entry['rejected']:>6}{entry['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
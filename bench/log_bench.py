@@ -0,0 +1,106 @@
+"""Benchmark do logging: print() síncrono x app_logging (fila + thread).
+
+Simula o que cada requisição escrevia antes (linha do [GET], três linhas do
+check_auth com cookie e session id, linha de acesso) em ``--threads``
+threads. A saída vai para um pipe lido por outro processo (``cat`` para
+/dev/null), como o stdout de um container sob o driver de log do Docker.
+
+Modos:
+    print       print() de cada linha, como antes
+    debug       app_logging em DEBUG (mesmas linhas, pela fila)
+    production  app_logging em INFO (linhas por requisição descartadas)
+
+Uso:
+    python bench/log_bench.py --threads 8 --requests 20000
+    python bench/log_bench.py --unbuffered   # stdout como com PYTHONUNBUFFERED=1
+"""
+import argparse
+import io
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import app_logging  # noqa: E402
+
+
+COOKIE = "session_id=3f1c2a9e-1111-2222-3333-444455556666; theme=dark"
+SESSION = "3f1c2a9e-1111-2222-3333-444455556666"
+
+
+def request_print(i):
+    print(f"[GET] Requisição recebida: /api/status?i={i}")
+    print(f"[AUTH] Verificando autenticação... Cookie: {COOKIE}")
+    print(f"[AUTH] Session ID encontrado: {SESSION}")
+    print("[AUTH] ✅ Sessão válida para: Steve")
+    print(f'127.0.0.1 - - "GET /api/status?i={i} HTTP/1.1" 200 -')
+
+
+http_log = app_logging.get_logger("http")
+auth_log = app_logging.get_logger("auth")
+
+
+def request_logging(i):
+    http_log.debug("Requisição recebida: /api/status?i=%s", i)
+    auth_log.debug("✅ Sessão válida para: %s", "Steve")
+    http_log.debug('127.0.0.1 - "GET /api/status?i=%s HTTP/1.1" 200 -', i)
+
+
+def run(fn, threads, requests):
+    per_thread = requests // threads
+
+    def worker():
+        for i in range(per_thread):
+            fn(i)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return per_thread * threads / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--unbuffered", action="store_true",
+                        help="flush a cada linha (PYTHONUNBUFFERED=1 no container)")
+    args = parser.parse_args()
+
+    reader = subprocess.Popen(["cat"], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+    pipe = io.TextIOWrapper(reader.stdin, encoding="utf-8", line_buffering=args.unbuffered,
+                            write_through=args.unbuffered)
+    results = {}
+    real_stdout = sys.stdout
+
+    sys.stdout = pipe
+    try:
+        results["print"] = run(request_print, args.threads, args.requests)
+        pipe.flush()
+    finally:
+        sys.stdout = real_stdout
+
+    for mode, level in (("debug", "DEBUG"), ("production", "INFO")):
+        app_logging.configure(level, stream=pipe, queue_size=1000000)
+        app_logging.start()
+        started = time.perf_counter()
+        results[mode] = run(request_logging, args.threads, args.requests)
+        app_logging.stop()
+        results[mode + " (com escrita)"] = args.requests / (time.perf_counter() - started)
+
+    pipe.close()
+    reader.wait()
+
+    base = results["print"]
+    for mode, rate in results.items():
+        print(f"{mode:<26} {rate:>12,.0f} req/s  ({rate / base:5.1f}x print)")
+
+
+if __name__ == "__main__":
+    main()
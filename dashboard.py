@@ -0,0 +1,103 @@
+"""Agregado do /api/dashboard: status, métricas, top players e membros do Discord.
+
+Cada seção é montada a partir dos caches do servidor (snapshot do poller,
+ranking do registro de jogadores, cache do discord-bot) no máximo uma vez
+a cada ``max_age`` segundos, não importa quantas abas estejam abertas. A
+seção guarda uma versão que só aumenta quando o conteúdo muda de fato.
+
+O cliente manda as versões que já tem (``?status=3&metrics=10``) e recebe
+o vetor de versões atual mais só as seções que mudaram. ``epoch`` muda a
+cada reinício do servidor; com outro epoch todas as seções são reenviadas.
+
+Cada seção guarda também o próprio JSON (``body``), serializado só na
+remontagem; ``snapshot_body`` monta a resposta juntando esses bytes.
+"""
+import json
+import threading
+import time
+
+from app_logging import get_logger
+from response_cache import dumps
+
+log = get_logger("dashboard")
+
+
+class Section:
+    """Uma seção do dashboard com valor em cache e versão"""
+
+    def __init__(self, name, build, max_age, key=None):
+        self.name = name
+        self.build = build
+        self.max_age = max_age
+        self.key = key
+        # (versão, valor, corpo) trocados juntos numa atribuição: quem lê
+        # nunca vê a versão de uma montagem com o corpo de outra
+        self._state = (0, None, b"null")
+        self.built_at = None
+        self.builds = 0
+        self._fingerprint = None
+        self._lock = threading.Lock()
+
+    def _fresh(self, now):
+        return self.built_at is not None and now - self.built_at < self.max_age
+
+    @property
+    def version(self):
+        return self._state[0]
+
+    def snapshot(self):
+        """(versão, valor, corpo JSON) da mesma montagem, remontando se passou de ``max_age``"""
+        now = time.monotonic()
+        if not self._fresh(now):
+            with self._lock:
+                # Outra requisição pode ter remontado enquanto esperávamos
+                if not self._fresh(time.monotonic()):
+                    self._rebuild()
+        return self._state
+
+    def current(self):
+        """(versão, valor), remontando a seção se passou de ``max_age``"""
+        return self.snapshot()[:2]
+
+    def _rebuild(self):
+        try:
+            value = self.build()
+        except Exception as e:
+            log.error("Erro ao montar a seção %s: %s", self.name, e)
+            value = {"error": str(e)}
+        self.builds += 1
+        fingerprint = json.dumps(self.key(value) if self.key else value, sort_keys=True)
+        version = self.version
+        if fingerprint != self._fingerprint:
+            self._fingerprint = fingerprint
+            version += 1
+        self._state = (version, value, dumps(value))
+        self.built_at = time.monotonic()
+
+
+class Dashboard:
+    """Conjunto de seções com vetor de versões"""
+
+    def __init__(self):
+        self.epoch = int(time.time())
+        self.sections = {}
+
+    def add(self, name, build, max_age, key=None):
+        self.sections[name] = Section(name, build, max_age, key)
+
+    def snapshot_body(self, since, epoch=None):
+        """Resposta do /api/dashboard (bytes) para as versões ``since`` ({seção: versão}).
+
+        Seções ausentes de ``since`` (ou de outro epoch) sempre vão junto.
+        """
+        if epoch != self.epoch:
+            since = {}
+        versions = {}
+        changed = []
+        for name, section in self.sections.items():
+            version, _, body = section.snapshot()
+            versions[name] = version
+            if since.get(name) != version:
+                changed.append(b'"%s":%s' % (name.encode("utf-8"), body))
+        return b'{"epoch":%d,"versions":%s,"sections":{%s}}' % (
+            self.epoch, dumps(versions), b",".join(changed))
@@ -0,0 +1,426 @@
+"""Camada de acesso ao SQLite (images.db).
+
+Cada thread do pool HTTP recebe uma conexão própria, aberta na primeira
+consulta e reaproveitada nas seguintes (sem ``connect()``/``close()`` por
+requisição). As conexões usam WAL e pragmas ajustados para muitas leituras
+concorrentes, e o cache de statements do sqlite3 reaproveita as queries
+parametrizadas abaixo.
+
+Todo SQL do servidor passa por aqui.
+"""
+import sqlite3
+import threading
+
+from instrumentation import upstream
+
+
+# O banco fica dentro de html/ (o servidor faz chdir para lá)
+DB_FILE = "images.db"
+
+# Pragmas aplicados em toda conexão nova
+PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",      # seguro com WAL, fsync só no checkpoint
+    "PRAGMA busy_timeout = 5000",       # espera lock em vez de falhar com "database is locked"
+    "PRAGMA mmap_size = 67108864",      # 64 MB de leitura via mmap
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -8000",        # ~8 MB de page cache por conexão
+)
+
+_local = threading.local()
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=5.0, cached_statements=128)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def get_connection(path=None):
+    """Conexão da thread atual para ``path`` (padrão: images.db), criada sob demanda"""
+    path = path or DB_FILE
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        conn = _connect(path)
+        conns[path] = conn
+    return conn
+
+
+def close_connection(path=None):
+    conns = getattr(_local, "conns", None) or {}
+    conn = conns.pop(path or DB_FILE, None)
+    if conn is not None:
+        conn.close()
+
+
+def query_one(sql, params=()):
+    with upstream("sqlite"):
+        return get_connection().execute(sql, params).fetchone()
+
+
+def query_all(sql, params=()):
+    with upstream("sqlite"):
+        return get_connection().execute(sql, params).fetchall()
+
+
+def execute(sql, params=()):
+    """Executa uma escrita e faz commit; desfaz se der erro"""
+    conn = get_connection()
+    try:
+        with upstream("sqlite"):
+            cursor = conn.execute(sql, params)
+            conn.commit()
+        return cursor.rowcount
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def init_db():
+    conn = _connect(DB_FILE)
+    # auto_vacuum só muda com VACUUM: bancos antigos são convertidos uma vez
+    # para INCREMENTAL (páginas livres devolvidas aos poucos pela manutenção)
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    # WAL é persistente no arquivo: basta ativar uma vez
+    conn.execute("PRAGMA journal_mode = WAL")
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS image_captions (
+            filename TEXT PRIMARY KEY,
+            caption TEXT
+        )
+    ''')
+    # Tabela para avisos dispensados pelos usuários
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dismissed_notices (
+            user_id TEXT,
+            notice_id TEXT,
+            dismissed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, notice_id)
+        )
+    ''')
+    # Tabela para sessões de autenticação
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_sessions (
+            session_id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            user_name TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_access TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP NOT NULL
+        )
+    ''')
+    # Varredura das expiradas e listagem/revogação por usuário
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_sessions_expires
+        ON user_sessions (expires_at)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_sessions_user
+        ON user_sessions (user_id)
+    ''')
+    # Log de sessões revogadas (logout), lido pelos caches de sessão de
+    # todos os processos que compartilham o banco
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS session_revocations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            revoked_at REAL NOT NULL
+        )
+    ''')
+    # Sessões de jogo montadas a partir das linhas "joined/left the game" do
+    # log (ver player_sessions.py); leave_time NULL = sessão aberta
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_sessions (
+            id INTEGER PRIMARY KEY,
+            player_name TEXT NOT NULL,
+            join_time TEXT,
+            leave_time TEXT
+        )
+    ''')
+    # Cobre o MAX(leave_time) por jogador e a busca da sessão aberta
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_player_sessions_name_leave
+        ON player_sessions (player_name, leave_time)
+    ''')
+    # Último leave_time de cada jogador, mantido na mesma transação das sessões
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_last_seen (
+            player_name TEXT PRIMARY KEY,
+            last_seen TEXT NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        INSERT OR IGNORE INTO player_last_seen (player_name, last_seen)
+        SELECT player_name, MAX(leave_time) FROM player_sessions
+        WHERE player_name IS NOT NULL AND leave_time IS NOT NULL
+        GROUP BY player_name
+    ''')
+    # Checkpoint da ingestão das sessões por arquivo de log
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_session_state (
+            source TEXT PRIMARY KEY,
+            inode INTEGER,
+            offset INTEGER NOT NULL DEFAULT 0,
+            last_ts REAL,
+            done INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+
+# --- Sessões -------------------------------------------------------------
+
+def get_session(session_id):
+    """(user_id, user_name, expires_at) ou None"""
+    return query_one('''
+        SELECT user_id, user_name, expires_at
+        FROM user_sessions
+        WHERE session_id = ?
+    ''', (session_id,))
+
+
+def create_session(session_id, user_id, user_name, expires_at):
+    execute('''
+        INSERT INTO user_sessions (session_id, user_id, user_name, expires_at)
+        VALUES (?, ?, ?, ?)
+    ''', (session_id, user_id, user_name, expires_at))
+
+
+def touch_session(session_id):
+    execute('''
+        UPDATE user_sessions
+        SET last_access = CURRENT_TIMESTAMP
+        WHERE session_id = ?
+    ''', (session_id,))
+
+
+def touch_sessions(touches):
+    """Atualiza last_access em lote: touches = [(last_access, session_id), ...]"""
+    conn = get_connection()
+    try:
+        conn.executemany('''
+            UPDATE user_sessions
+            SET last_access = ?
+            WHERE session_id = ?
+        ''', touches)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def delete_session(session_id):
+    execute('DELETE FROM user_sessions WHERE session_id = ?', (session_id,))
+
+
+def revoke_session(session_id, revoked_at):
+    """Remove a sessão e registra a revogação para os outros processos"""
+    conn = get_connection()
+    try:
+        conn.execute('DELETE FROM user_sessions WHERE session_id = ?', (session_id,))
+        conn.execute('''
+            INSERT INTO session_revocations (session_id, revoked_at)
+            VALUES (?, ?)
+        ''', (session_id, revoked_at))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def revoke_user_sessions(user_id, revoked_at):
+    """Remove todas as sessões do usuário (uma revogação por sessão); devolve os ids"""
+    conn = get_connection()
+    try:
+        with upstream("sqlite"):
+            session_ids = [row[0] for row in conn.execute(
+                'SELECT session_id FROM user_sessions WHERE user_id = ?', (user_id,))]
+            conn.execute('DELETE FROM user_sessions WHERE user_id = ?', (user_id,))
+            conn.executemany('''
+                INSERT INTO session_revocations (session_id, revoked_at)
+                VALUES (?, ?)
+            ''', [(session_id, revoked_at) for session_id in session_ids])
+            conn.commit()
+        return session_ids
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def get_user_sessions(user_id):
+    """[(session_id, created_at, last_access, expires_at)] do usuário, mais recentes primeiro"""
+    return query_all('''
+        SELECT session_id, created_at, last_access, expires_at
+        FROM user_sessions
+        WHERE user_id = ?
+        ORDER BY last_access DESC
+    ''', (user_id,))
+
+
+def delete_expired_sessions(now, batch=500):
+    """Apaga até ``batch`` sessões com expires_at < now (pelo índice); devolve quantas"""
+    return execute('''
+        DELETE FROM user_sessions
+        WHERE rowid IN (
+            SELECT rowid FROM user_sessions
+            WHERE expires_at < ?
+            LIMIT ?
+        )
+    ''', (now, batch))
+
+
+def optimize(vacuum_pages=500):
+    """PRAGMA optimize e devolve até ``vacuum_pages`` páginas livres; devolve o freelist antes"""
+    conn = get_connection()
+    with upstream("sqlite"):
+        # Limita o ANALYZE que o optimize possa disparar em tabelas grandes
+        conn.execute("PRAGMA analysis_limit = 400")
+        conn.execute("PRAGMA optimize")
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free:
+            # Pelo execute() o sqlite3 só dá um passo (uma página); o
+            # executescript roda o pragma até o fim
+            conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});")
+        conn.commit()
+    return free
+
+
+def get_revocations_since(last_id):
+    return query_all('''
+        SELECT id, session_id FROM session_revocations
+        WHERE id > ?
+        ORDER BY id
+    ''', (last_id,))
+
+
+def last_revocation_id():
+    row = query_one('SELECT MAX(id) FROM session_revocations')
+    return row[0] or 0
+
+
+def prune_revocations(before):
+    execute('DELETE FROM session_revocations WHERE revoked_at < ?', (before,))
+
+
+# --- Imagens -------------------------------------------------------------
+
+def get_image_captions():
+    """{filename: caption} de todas as imagens com legenda"""
+    return dict(query_all('SELECT filename, caption FROM image_captions'))
+
+
+# --- Avisos --------------------------------------------------------------
+
+def get_dismissed_notices(user_id):
+    rows = query_all('SELECT notice_id FROM dismissed_notices WHERE user_id = ?', (user_id,))
+    return [row[0] for row in rows]
+
+
+def dismiss_notice(user_id, notice_id):
+    execute('''
+        INSERT OR REPLACE INTO dismissed_notices (user_id, notice_id)
+        VALUES (?, ?)
+    ''', (user_id, notice_id))
+
+
+# --- Jogadores -----------------------------------------------------------
+
+def get_last_seen():
+    """{player_name: último leave_time} da tabela materializada player_last_seen"""
+    return dict(query_all('SELECT player_name, last_seen FROM player_last_seen'))
+
+
+def get_player_last_seen(player_name):
+    row = query_one('SELECT last_seen FROM player_last_seen WHERE player_name = ?', (player_name,))
+    return row[0] if row else None
+
+
+def get_player_sessions(player_name, limit=50):
+    """Sessões mais recentes primeiro: [(join_time, leave_time), ...]"""
+    return query_all('''
+        SELECT join_time, leave_time FROM player_sessions
+        WHERE player_name = ?
+        ORDER BY id DESC
+        LIMIT ?
+    ''', (player_name, limit))
+
+
+def get_session_checkpoint(source):
+    """(inode, offset, last_ts, done) da ingestão de ``source`` ou None"""
+    return query_one('''
+        SELECT inode, offset, last_ts, done FROM player_session_state
+        WHERE source = ?
+    ''', (source,))
+
+
+def has_latest_checkpoint():
+    """True se algum latest.log já foi ingerido (o histórico .gz já foi lido)"""
+    return query_one('''
+        SELECT 1 FROM player_session_state WHERE source LIKE 'latest.log@%' LIMIT 1
+    ''') is not None
+
+
+def _close_sessions(conn, close_time, player_name=None):
+    """Fecha sessões abertas (de um jogador ou de todos) e atualiza player_last_seen"""
+    if player_name is None:
+        names = [row[0] for row in conn.execute(
+            'SELECT player_name FROM player_sessions WHERE leave_time IS NULL')]
+        conn.execute('UPDATE player_sessions SET leave_time = ? WHERE leave_time IS NULL',
+                     (close_time,))
+    else:
+        cursor = conn.execute('''
+            UPDATE player_sessions SET leave_time = ?
+            WHERE player_name = ? AND leave_time IS NULL
+        ''', (close_time, player_name))
+        names = [player_name] if cursor.rowcount else []
+    conn.executemany('''
+        INSERT INTO player_last_seen (player_name, last_seen) VALUES (?, ?)
+        ON CONFLICT(player_name) DO UPDATE SET
+            last_seen = MAX(last_seen, excluded.last_seen)
+    ''', [(name, close_time) for name in names])
+    return len(names)
+
+
+def apply_player_events(source, events, inode, offset, last_ts, done=0):
+    """Aplica eventos (kind, player_name, time) e grava o checkpoint na mesma transação.
+
+    kind: 'join', 'leave' ou 'close_all' (servidor parou/reiniciou).
+    """
+    conn = get_connection()
+    try:
+        for kind, player_name, at in events:
+            if kind == 'join':
+                # Join com sessão aberta: o leave se perdeu, fecha no join novo
+                _close_sessions(conn, at, player_name)
+                conn.execute('''
+                    INSERT INTO player_sessions (player_name, join_time) VALUES (?, ?)
+                ''', (player_name, at))
+            elif kind == 'leave':
+                if not _close_sessions(conn, at, player_name):
+                    # Leave sem join visto (ingestão começou no meio da sessão)
+                    conn.execute('''
+                        INSERT INTO player_sessions (player_name, join_time) VALUES (?, NULL)
+                    ''', (player_name,))
+                    _close_sessions(conn, at, player_name)
+            elif kind == 'close_all':
+                _close_sessions(conn, at)
+        conn.execute('''
+            INSERT INTO player_session_state (source, inode, offset, last_ts, done)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(source) DO UPDATE SET
+                inode = excluded.inode,
+                offset = excluded.offset,
+                last_ts = excluded.last_ts,
+                done = excluded.done
+        ''', (source, inode, offset, last_ts, done))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
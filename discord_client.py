@@ -0,0 +1,252 @@
+"""Cliente do serviço discord-bot (server.js, porta 3011).
+
+- Conexões HTTP keep-alive reaproveitadas num pool pequeno (sem abrir um
+  socket novo por requisição).
+- Lista de membros em cache por ``ttl`` segundos, com índice por id para o
+  avatar do /api/user-info.
+- Requisições simultâneas com o cache vencido esperam uma única busca no bot
+  (single-flight) em vez de cada uma fazer a sua.
+- Circuit breaker: depois de ``failure_threshold`` falhas seguidas o bot não
+  é chamado por ``reset_timeout`` segundos; nesse tempo os membros saem da
+  última resposta boa e as outras chamadas falham na hora, sem esperar o
+  timeout.
+"""
+import http.client
+import json
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+from app_logging import get_logger
+from instrumentation import upstream
+
+log = get_logger("discord")
+
+
+class DiscordError(Exception):
+    """Resposta de erro do discord-bot"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class DiscordUnavailable(DiscordError):
+    """Bot fora do ar (ou circuito aberto) e sem dados antigos para servir"""
+
+
+class CircuitOpen(DiscordUnavailable):
+    """Chamada recusada sem tentar: circuito aberto"""
+
+
+class ConnectionPool:
+    """Pool LIFO de conexões keep-alive para um único host"""
+
+    def __init__(self, host, port, size=4, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _get(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout), False
+
+    def _put(self, conn):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, method, path, body=None, headers=None):
+        """(status, corpo) da resposta; repete uma vez se a conexão reaproveitada caiu"""
+        while True:
+            conn, reused = self._get()
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                # Conexão ociosa fechada pelo outro lado: tenta com uma nova
+                if reused:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self._put(conn)
+            return response.status, data
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class CircuitBreaker:
+    """Fechado -> aberto após N falhas -> meio-aberto (uma tentativa) após o timeout"""
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            # meio-aberto: deixa passar só esta tentativa
+            self._probing = True
+            return True
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    log.warning("Circuito aberto após %s falhas", self.failures)
+                self.opened_at = time.monotonic()
+
+    def is_open(self):
+        return self.opened_at is not None
+
+
+class DiscordClient:
+    """Acesso ao discord-bot com pool, cache de membros e circuit breaker"""
+
+    def __init__(self, base_url, ttl=60.0, timeout=5.0, pool_size=4,
+                 failure_threshold=3, reset_timeout=30.0):
+        parts = urlsplit(base_url)
+        self.pool = ConnectionPool(parts.hostname, parts.port or 80, pool_size, timeout)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.ttl = ttl
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.upstream_requests = 0
+        self._members = None        # (corpo bruto, {id: membro}, buscado_em)
+        self._lock = threading.Lock()
+        self._inflight = None       # Event da busca em andamento
+        self._batch_supported = True
+
+    def _call(self, method, path, body=None, headers=None):
+        if not self.breaker.allow():
+            raise CircuitOpen("discord-bot indisponível (circuito aberto)")
+        self.upstream_requests += 1
+        try:
+            with upstream("discord"):
+                status, data = self.pool.request(method, path, body, headers)
+        except Exception:
+            self.breaker.failure()
+            raise
+        if status >= 500:
+            self.breaker.failure()
+            raise DiscordUnavailable(f"discord-bot respondeu {status}", status)
+        self.breaker.success()
+        if status >= 400:
+            raise DiscordError(f"discord-bot respondeu {status}", status)
+        return status, data
+
+    # --- membros ---------------------------------------------------------------
+
+    def _fetch_members(self):
+        _, data = self._call("GET", "/members")
+        members = json.loads(data.decode("utf-8")).get("members", [])
+        self._members = (data, {m.get("id"): m for m in members}, time.monotonic())
+
+    def members(self):
+        """(corpo JSON do /members, origem) com origem 'hit', 'miss' ou 'stale'"""
+        cached = self._members
+        if cached is not None and time.monotonic() - cached[2] < self.ttl:
+            self.hits += 1
+            return cached[0], "hit"
+
+        with self._lock:
+            event = self._inflight
+            leader = event is None
+            if leader:
+                event = self._inflight = threading.Event()
+
+        if leader:
+            self.misses += 1
+            try:
+                self._fetch_members()
+            except CircuitOpen:
+                pass
+            except Exception as e:
+                log.error("Erro ao buscar membros: %s", e)
+            finally:
+                with self._lock:
+                    self._inflight = None
+                event.set()
+        else:
+            # Outra requisição já está buscando: espera o resultado dela
+            event.wait(self.timeout + 1)
+
+        latest = self._members
+        if latest is None:
+            raise DiscordUnavailable("membros do Discord indisponíveis")
+        if latest is cached or time.monotonic() - latest[2] >= self.ttl:
+            return latest[0], "stale"
+        return latest[0], ("miss" if leader else "hit")
+
+    def member(self, user_id):
+        """Membro pelo id (dict) ou None; usa o mesmo cache de members()"""
+        try:
+            self.members()
+        except DiscordUnavailable:
+            return None
+        return self._members[1].get(user_id)
+
+    # --- autenticação ----------------------------------------------------------
+
+    def request_auth(self, body):
+        """POST /auth/request com o corpo JSON recebido do navegador (bytes)"""
+        return self._call("POST", "/auth/request", body,
+                          {"Content-Type": "application/json"})[1]
+
+    def check_auth(self, token):
+        """GET /auth/check/<token> -> dict"""
+        _, data = self._call("GET", f"/auth/check/{quote(str(token), safe='')}")
+        return json.loads(data.decode("utf-8"))
+
+    def check_auth_batch(self, tokens):
+        """{token: status} de vários tokens numa requisição (POST /auth/check).
+
+        Bots antigos sem a rota em lote respondem 404: cai para um
+        GET /auth/check/<token> por token.
+        """
+        if self._batch_supported:
+            body = json.dumps({"tokens": list(tokens)}).encode("utf-8")
+            try:
+                _, data = self._call("POST", "/auth/check", body,
+                                     {"Content-Type": "application/json"})
+                return json.loads(data.decode("utf-8")).get("results", {})
+            except DiscordError as e:
+                if e.status != 404:
+                    raise
+                log.info("discord-bot sem /auth/check em lote, consultando por token")
+                self._batch_supported = False
+        return {token: self.check_auth(token) for token in tokens}
@@ -0,0 +1,232 @@
+"""Hub de Server-Sent Events.
+
+Conexões SSE não ficam presas num worker do pool HTTP: depois de mandar os
+cabeçalhos, o handler entrega o socket para o hub (``add_client``) e volta
+para o pool. Uma única thread com ``selectors`` escreve para todos os
+clientes com sockets não bloqueantes.
+
+- Cada cliente tem um buffer limitado de frames; se o cliente é lento e o
+  buffer enche, os frames mais antigos são descartados (drop-oldest).
+- Um comentário ``: ping`` é enviado a cada ``heartbeat`` segundos para
+  manter proxies e o EventSource do navegador vivos.
+- Outras fontes podem usar o mesmo loop: ``add_reader`` registra um fd
+  (ex.: inotify) e ``call_every`` agenda uma função periódica.
+"""
+import collections
+import selectors
+import socket
+import threading
+import time
+
+from app_logging import get_logger
+
+log = get_logger("hub")
+
+
+HEARTBEAT_FRAME = b": ping\n\n"
+
+
+def sse_frame(data, event=None, event_id=None):
+    """Monta um frame SSE; ``data`` pode ter várias linhas"""
+    parts = []
+    if event_id is not None:
+        parts.append(f"id: {event_id}\n")
+    if event:
+        parts.append(f"event: {event}\n")
+    for line in data.split("\n"):
+        parts.append(f"data: {line}\n")
+    parts.append("\n")
+    return "".join(parts).encode("utf-8")
+
+
+class _Client:
+    __slots__ = ("sock", "channels", "frames", "pending", "dropped", "writing")
+
+    def __init__(self, sock, channels, max_frames):
+        self.sock = sock
+        self.channels = channels
+        self.frames = collections.deque(maxlen=max_frames)
+        self.pending = None     # memoryview do frame enviado pela metade
+        self.dropped = 0
+        self.writing = False
+
+
+class EventStreamHub(threading.Thread):
+    """Loop de eventos único para todas as conexões SSE"""
+
+    def __init__(self, max_frames=256, heartbeat=15.0, max_clients=1000):
+        super().__init__(name="event-hub", daemon=True)
+        self.max_frames = max_frames
+        self.heartbeat = heartbeat
+        self.max_clients = max_clients
+        self._sel = selectors.DefaultSelector()
+        self._clients = {}
+        self._inbox = collections.deque()
+        self._timers = []
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._sel.register(self._wake_r, selectors.EVENT_READ, None)
+        self._next_heartbeat = time.monotonic() + heartbeat
+
+    # --- API thread-safe ---------------------------------------------------
+
+    def client_count(self):
+        return len(self._clients)
+
+    def subscriber_count(self, channel):
+        return sum(1 for c in list(self._clients.values()) if channel in c.channels)
+
+    def full(self):
+        return len(self._clients) >= self.max_clients
+
+    def add_client(self, sock, channels, initial=()):
+        """Assume o socket (já com cabeçalhos enviados) e envia ``initial``"""
+        self._inbox.append(("add", sock, frozenset(channels), list(initial)))
+        self._wake()
+
+    def publish(self, channel, frame):
+        self._inbox.append(("pub", channel, frame, None))
+        self._wake()
+
+    def call_soon(self, fn):
+        """Executa ``fn`` na thread do hub"""
+        self._inbox.append(("call", fn, None, None))
+        self._wake()
+
+    # --- configuração (antes do start ou de dentro do loop) ----------------
+
+    def add_reader(self, fileobj, callback):
+        self._sel.register(fileobj, selectors.EVENT_READ, callback)
+
+    def call_every(self, interval, callback):
+        self._timers.append([time.monotonic() + interval, interval, callback])
+
+    # --- loop ----------------------------------------------------------------
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def run(self):
+        while True:
+            now = time.monotonic()
+            deadline = self._next_heartbeat
+            for timer in self._timers:
+                deadline = min(deadline, timer[0])
+            for key, events in self._sel.select(max(0.0, deadline - now)):
+                data = key.data
+                if data is None:
+                    self._drain_wake()
+                elif isinstance(data, _Client):
+                    if events & selectors.EVENT_READ:
+                        self._on_readable(data)
+                    if events & selectors.EVENT_WRITE and data.sock in self._clients:
+                        self._flush(data)
+                else:
+                    self._safe_call(data)
+            self._process_inbox()
+            self._run_timers()
+
+    def _safe_call(self, fn):
+        try:
+            fn()
+        except Exception as e:
+            log.error("Erro em callback do hub: %s", e)
+
+    def _drain_wake(self):
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def _process_inbox(self):
+        inbox = self._inbox
+        while inbox:
+            kind, a, b, c = inbox.popleft()
+            if kind == "pub":
+                for client in list(self._clients.values()):
+                    if a in client.channels:
+                        self._enqueue(client, b)
+            elif kind == "add":
+                self._register(a, b, c)
+            elif kind == "call":
+                self._safe_call(a)
+
+    def _run_timers(self):
+        now = time.monotonic()
+        for timer in self._timers:
+            if now >= timer[0]:
+                timer[0] = now + timer[1]
+                self._safe_call(timer[2])
+        if now >= self._next_heartbeat:
+            self._next_heartbeat = now + self.heartbeat
+            for client in list(self._clients.values()):
+                if not client.frames and client.pending is None:
+                    self._enqueue(client, HEARTBEAT_FRAME)
+
+    def _register(self, sock, channels, initial):
+        sock.setblocking(False)
+        client = _Client(sock, channels, self.max_frames)
+        self._clients[sock] = client
+        self._sel.register(sock, selectors.EVENT_READ, client)
+        for frame in initial:
+            client.frames.append(frame)
+        self._flush(client)
+
+    def _enqueue(self, client, frame):
+        if len(client.frames) == client.frames.maxlen:
+            client.dropped += 1     # deque com maxlen descarta o mais antigo
+        client.frames.append(frame)
+        if not client.writing:
+            self._flush(client)
+
+    def _flush(self, client):
+        sock = client.sock
+        try:
+            while True:
+                if client.pending is None:
+                    if not client.frames:
+                        break
+                    client.pending = memoryview(client.frames.popleft())
+                sent = sock.send(client.pending)
+                if sent < len(client.pending):
+                    client.pending = client.pending[sent:]
+                    raise BlockingIOError
+                client.pending = None
+        except BlockingIOError:
+            if not client.writing:
+                client.writing = True
+                self._sel.modify(sock, selectors.EVENT_READ | selectors.EVENT_WRITE, client)
+            return
+        except OSError:
+            self._drop(client)
+            return
+        if client.writing:
+            client.writing = False
+            self._sel.modify(sock, selectors.EVENT_READ, client)
+
+    def _on_readable(self, client):
+        # Clientes SSE não mandam nada depois da requisição: leitura = fechou
+        try:
+            data = client.sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(client)
+
+    def _drop(self, client):
+        self._clients.pop(client.sock, None)
+        try:
+            self._sel.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        try:
+            client.sock.close()
+        except OSError:
+            pass
@@ -0,0 +1,81 @@
+"""Envio de arquivos grandes (/downloads, /imagens) sem carregar em memória.
+
+O corpo vai do arquivo direto para o socket com ``os.sendfile`` (via
+``socket.sendfile``, que respeita o timeout do socket); sem sendfile, cai
+para escritas em blocos reaproveitando um único buffer (memoryview). A
+memória usada por download é a mesma para 1 KB ou 10 GB.
+
+Também trata ``Range: bytes=...`` (um intervalo) para downloads retomáveis.
+"""
+import mimetypes
+import os
+
+
+CHUNK_SIZE = 256 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def resolve_path(base_dir, rel_path):
+    """Caminho real de ``rel_path`` dentro de ``base_dir`` ou None se escapar dele"""
+    base = os.path.realpath(base_dir)
+    path = os.path.realpath(os.path.join(base, rel_path))
+    if path == base or os.path.commonpath([base, path]) != base:
+        return None
+    return path
+
+
+def guess_type(path):
+    ctype, _ = mimetypes.guess_type(path)
+    return ctype or 'application/octet-stream'
+
+
+def parse_range(header, size):
+    """``(início, fim)`` inclusivo do Range, ou None para mandar o arquivo inteiro.
+
+    Só um intervalo é suportado; pedidos com vários intervalos recebem o
+    arquivo inteiro (permitido pela RFC 9110). Levanta RangeNotSatisfiable
+    se o intervalo não cabe no arquivo.
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    spec = header[6:].strip()
+    if ',' in spec:
+        return None
+    first, sep, last = spec.partition('-')
+    if not sep:
+        return None
+    try:
+        if first == '':
+            # bytes=-N: últimos N bytes
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+def send_file(sock, f, offset, count):
+    """Copia ``count`` bytes de ``f`` (a partir de ``offset``) para ``sock``"""
+    if hasattr(os, 'sendfile'):
+        return sock.sendfile(f, offset, count)
+    # Sem sendfile: blocos lidos sempre no mesmo buffer
+    buffer = bytearray(min(CHUNK_SIZE, max(count, 1)))
+    view = memoryview(buffer)
+    f.seek(offset)
+    sent = 0
+    while sent < count:
+        n = f.readinto(view[:min(len(buffer), count - sent)])
+        if not n:
+            break
+        sock.sendall(view[:n])
+        sent += n
+    return sent
@@ -0,0 +1,86 @@
+"""Observador de diretório via inotify (Linux), sem dependências externas.
+
+``DirectoryWatcher`` expõe ``fileno()`` para ser registrado num ``selectors``
+junto com outros sockets; ``read()`` devolve os nomes de arquivo que mudaram.
+Fora do Linux (ou se o inotify não estiver disponível) ``open_watcher``
+devolve ``None`` e quem usa cai no modo de polling.
+"""
+import ctypes
+import ctypes.util
+import os
+import struct
+
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+DEFAULT_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT = struct.Struct("iIII")
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    return _libc
+
+
+class DirectoryWatcher:
+    """Eventos inotify de um diretório"""
+
+    def __init__(self, path, mask=DEFAULT_MASK):
+        libc = _load_libc()
+        self.path = path
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, os.strerror(err), path)
+
+    def fileno(self):
+        return self.fd
+
+    def read(self):
+        """Nomes que mudaram desde a última leitura (``None`` = fila estourou)"""
+        names = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return names
+            pos = 0
+            while pos + _EVENT.size <= len(data):
+                _wd, mask, _cookie, length = _EVENT.unpack_from(data, pos)
+                pos += _EVENT.size
+                name = data[pos:pos + length].rstrip(b"\0")
+                pos += length
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                if name:
+                    names.add(os.fsdecode(name))
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_watcher(path, mask=DEFAULT_MASK):
+    """DirectoryWatcher ou None se não der para usar inotify aqui"""
+    try:
+        return DirectoryWatcher(path, mask)
+    except (OSError, AttributeError):
+        return None
@@ -124,7 +124,7 @@ document.addEventListener('keydown', (e) => {
 
 // === Sistema de Autenticação Discord ===
 let authToken = null;
-let authCheckInterval = null;
+let authCheckController = null; // AbortController do long-poll de verificação
 let currentUserId = null;
 let currentUserName = null;
 
@@ -244,11 +244,15 @@ function showAuthWaiting(userId, userName) {
     document.getElementById('authWaiting').style.display = 'block';
 }
 
-// Verificar status da autenticação periodicamente
-function startAuthCheck() {
-    authCheckInterval = setInterval(async () => {
+// Verificar status da autenticação (long-poll: o servidor segura a
+// requisição até a confirmação no Discord ou por até 25s)
+async function startAuthCheck() {
+    const controller = new AbortController();
+    authCheckController = controller;
+    
+    while (!controller.signal.aborted) {
         try {
-            const response = await fetch('/api/discord/verify-auth', {
+            const response = await fetch('/api/discord/verify-auth?wait=25', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -257,30 +261,36 @@ function startAuthCheck() {
                     token: authToken,
                     userId: currentUserId,
                     userName: currentUserName
-                })
+                }),
+                signal: controller.signal
             });
             
             const data = await response.json();
             
             if (data.verified) {
-                clearInterval(authCheckInterval);
+                authCheckController = null;
                 document.getElementById('loginModal').style.display = 'none';
                 location.reload(); // Recarregar página após autenticação
+                return;
             } else if (data.expired) {
-                clearInterval(authCheckInterval);
                 cancelAuth();
                 alert('Tempo de autenticação expirado. Tente novamente.');
+                return;
             }
+            // pending: ainda aguardando, faz o próximo long-poll
         } catch (error) {
+            if (controller.signal.aborted) return;
             console.error('Erro ao verificar autenticação:', error);
+            await new Promise(resolve => setTimeout(resolve, 2000));
         }
-    }, 2000); // Verificar a cada 2 segundos
+    }
 }
 
 // Cancelar autenticação
 function cancelAuth() {
-    if (authCheckInterval) {
-        clearInterval(authCheckInterval);
+    if (authCheckController) {
+        authCheckController.abort();
+        authCheckController = null;
     }
     authToken = null;
     currentUserId = null;
@@ -457,10 +467,8 @@ function updateActiveTheme(theme) {
     });
 }
 
-async function loadStatus() {
+function renderStatus(data) {
     try {
-        const res = await fetch('/api/status');
-        const data = await res.json();
         const statusBadge = document.getElementById("statusBadge");
         const playersCount = document.getElementById("playersCount");
         const playersOnlineCount = document.getElementById("playersOnlineCount");
@@ -513,11 +521,8 @@ function updateDateTime() {
     document.getElementById('currentDateTime').innerHTML = dateTimeString;
 }
 
-async function updateSystemMetrics() {
+function renderSystemMetrics(data) {
     try {
-        const res = await fetch('/api/system-metrics');
-        const data = await res.json();
-        
         // Atualizar CPU
         const cpuValue = document.getElementById('cpuValue');
         const cpuBar = document.getElementById('cpuBar');
@@ -601,6 +606,71 @@ const logsModal = document.getElementById('logsModal');
 const logsCloseBtn = document.getElementById('logsCloseBtn');
 const logsContent = document.getElementById('logsContent');
 
+// Stream de logs ao vivo (SSE) enquanto o modal está aberto
+let logsStream = null;
+const MAX_LOG_LINES = 2000;
+
+function renderLogLine(line) {
+    let className = 'log-line info';
+    
+    // Detectar tipo de log baseado no conteúdo
+    if (line.includes('/WARN') || line.includes('WARNING')) {
+        className = 'log-line warn';
+    } else if (line.includes('/ERROR') || line.includes('Exception') || line.includes('Error')) {
+        className = 'log-line error';
+    } else if (line.includes('/DEBUG')) {
+        className = 'log-line debug';
+    }
+    
+    // Escapar HTML para evitar problemas
+    const escapedLine = line
+        .replace(/&/g, '&amp;')
+        .replace(/</g, '&lt;')
+        .replace(/>/g, '&gt;')
+        .replace(/"/g, '&quot;')
+        .replace(/'/g, '&#039;');
+    
+    return `<div class="${className}">${escapedLine}</div>`;
+}
+
+function appendLogLines(lines) {
+    // Só acompanha o final se o usuário já estava no final
+    const atBottom = logsContent.scrollHeight - logsContent.scrollTop - logsContent.clientHeight < 40;
+    const loading = logsContent.querySelector('.logs-loading');
+    if (loading) loading.remove();
+    
+    logsContent.insertAdjacentHTML('beforeend', lines.map(renderLogLine).join(''));
+    while (logsContent.childElementCount > MAX_LOG_LINES) {
+        logsContent.firstElementChild.remove();
+    }
+    
+    if (atBottom) {
+        logsContent.scrollTop = logsContent.scrollHeight;
+    }
+}
+
+function startLogsStream(cursor) {
+    stopLogsStream();
+    if (!window.EventSource) return;
+    
+    // cursor = "<inode>:<offset>": o servidor detecta rotação pelo inode
+    logsStream = new EventSource(`/api/logs/stream?since=${encodeURIComponent(cursor)}`);
+    logsStream.addEventListener('log', (e) => {
+        appendLogLines(e.data.split('\n'));
+    });
+    // Log rotacionado (ou cursor inválido): o servidor reenvia as últimas linhas
+    logsStream.addEventListener('reset', () => {
+        logsContent.innerHTML = '';
+    });
+}
+
+function stopLogsStream() {
+    if (logsStream) {
+        logsStream.close();
+        logsStream = null;
+    }
+}
+
 async function openLogsModal() {
     logsModal.classList.add('active');
     logsContent.innerHTML = '<div class="logs-loading">⟳ CARREGANDO LOGS...</div>';
@@ -612,37 +682,16 @@ async function openLogsModal() {
         if (data.success && data.logs) {
             if (data.logs.length === 0) {
                 logsContent.innerHTML = '<div class="logs-loading">NENHUM LOG ENCONTRADO</div>';
-                return;
-            }
-            
-            // Processar e exibir logs
-            const logsHtml = data.logs.map(line => {
-                let className = 'log-line info';
-                
-                // Detectar tipo de log baseado no conteúdo
-                if (line.includes('/WARN') || line.includes('WARNING')) {
-                    className = 'log-line warn';
-                } else if (line.includes('/ERROR') || line.includes('Exception') || line.includes('Error')) {
-                    className = 'log-line error';
-                } else if (line.includes('/DEBUG')) {
-                    className = 'log-line debug';
-                }
-                
-                // Escapar HTML para evitar problemas
-                const escapedLine = line
-                    .replace(/&/g, '&amp;')
-                    .replace(/</g, '&lt;')
-                    .replace(/>/g, '&gt;')
-                    .replace(/"/g, '&quot;')
-                    .replace(/'/g, '&#039;');
+            } else {
+                // Processar e exibir logs
+                logsContent.innerHTML = data.logs.map(renderLogLine).join('');
                 
-                return `<div class="${className}">${escapedLine}</div>`;
-            }).join('');
-            
-            logsContent.innerHTML = logsHtml;
+                // Auto-scroll para o final
+                logsContent.scrollTop = logsContent.scrollHeight;
+            }
             
-            // Auto-scroll para o final
-            logsContent.scrollTop = logsContent.scrollHeight;
+            // Continuar recebendo as linhas novas a partir do cursor
+            startLogsStream(data.cursor);
         } else {
             logsContent.innerHTML = `<div class="logs-error">ERRO AO CARREGAR LOGS:<br/>${data.error || 'Erro desconhecido'}</div>`;
         }
@@ -653,6 +702,7 @@ async function openLogsModal() {
 }
 
 function closeLogsModal() {
+    stopLogsStream();
     logsModal.classList.remove('active');
 }
 
@@ -796,14 +846,11 @@ document.addEventListener('click', (e) => {
 });
 
 // Discord Members Functionality
-async function loadDiscordMembers() {
+function renderDiscordMembers(data) {
     const membersList = document.getElementById('membersList');
     const membersCount = document.getElementById('membersCount');
     
     try {
-        const response = await fetch('http://10.150.135.158:3011/members');
-        const data = await response.json();
-        
         if (data.error) {
             throw new Error(data.message || 'Failed to load members');
         }
@@ -856,14 +903,11 @@ async function loadDiscordMembers() {
 }
 
 // Top Players Functionality
-async function loadTopPlayers() {
+function renderTopPlayers(data) {
     const topPlayersGrid = document.getElementById('topPlayersGrid');
     const topPlayersOnline = document.getElementById('topPlayersOnline');
     
     try {
-        const response = await fetch('/api/top-players');
-        const data = await response.json();
-        
         if (!data.success || !data.players || data.players.length === 0) {
             topPlayersGrid.innerHTML = `
                 <div style="text-align: center; padding: 20px; color: #666;">
@@ -1518,14 +1562,104 @@ initStorageTooltips();
 initStorageCellsRack();
 loadStorageCells(); // Load initial data for the toggle button
 
+// Dashboard: uma requisição traz só as seções que mudaram desde as versões
+// que já temos (status, métricas, top players e membros do Discord)
+const DASHBOARD_INTERVAL = 5000;
+const dashboardRenderers = {
+    status: renderStatus,
+    metrics: renderSystemMetrics,
+    top_players: renderTopPlayers,
+    discord: renderDiscordMembers
+};
+let dashboardEpoch = null;
+let dashboardVersions = {};
+
+async function loadDashboard() {
+    try {
+        const params = new URLSearchParams(dashboardVersions);
+        if (dashboardEpoch !== null) params.set('epoch', dashboardEpoch);
+        const res = await fetch(`/api/dashboard?${params}`);
+        const data = await res.json();
+        if (data.error) throw new Error(data.error);
+        
+        dashboardEpoch = data.epoch;
+        dashboardVersions = data.versions;
+        for (const [name, section] of Object.entries(data.sections)) {
+            if (dashboardRenderers[name]) dashboardRenderers[name](section);
+        }
+    } catch (error) {
+        console.error('Erro ao carregar o dashboard:', error);
+        // Força o reenvio de tudo na próxima resposta
+        dashboardVersions = {};
+        renderStatus({ error: String(error) });
+        renderDiscordMembers({ error: String(error) });
+    }
+}
+
+// Atualizações ao vivo (/api/live): o servidor empurra só as diferenças;
+// enquanto o stream está fora do ar o dashboard volta para o polling
+const LIVE_TOPICS = { status: renderStatus, metrics: renderSystemMetrics, leaderboard: renderTopPlayers, discord: renderDiscordMembers };
+let liveStream = null;
+let liveState = {};
+let dashboardTimer = null;
+
+function applyLiveDiff(topic, value, diff) {
+    if (topic === 'leaderboard') {
+        const players = {};
+        (value.players || []).forEach(p => { players[p.name] = p; });
+        (diff.upsert || []).forEach(p => { players[p.name] = p; });
+        (diff.removed || []).forEach(name => { delete players[name]; });
+        const order = diff.order || (value.players || []).map(p => p.name).filter(name => players[name]);
+        value = Object.assign({}, value, diff.set || {});
+        value.players = order.map(name => players[name]);
+        return value;
+    }
+    value = Object.assign({}, value, diff.set || {});
+    (diff.unset || []).forEach(key => { delete value[key]; });
+    return value;
+}
+
+function startDashboardPolling() {
+    if (dashboardTimer) return;
+    loadDashboard();
+    dashboardTimer = setInterval(loadDashboard, DASHBOARD_INTERVAL);
+}
+
+function stopDashboardPolling() {
+    clearInterval(dashboardTimer);
+    dashboardTimer = null;
+}
+
+function startLiveStream() {
+    if (liveStream) liveStream.close();
+    if (!window.EventSource) {
+        startDashboardPolling();
+        return;
+    }
+    liveState = {};
+    liveStream = new EventSource(`/api/live?topics=${Object.keys(LIVE_TOPICS).join(',')}`);
+    liveStream.onopen = stopDashboardPolling;
+    // O EventSource reconecta sozinho; até lá, polling
+    liveStream.onerror = startDashboardPolling;
+    Object.entries(LIVE_TOPICS).forEach(([topic, render]) => {
+        liveStream.addEventListener(topic, (e) => {
+            const msg = JSON.parse(e.data);
+            const current = liveState[topic];
+            if ('full' in msg) {
+                liveState[topic] = { v: msg.v, value: msg.full };
+            } else if (current && current.v === msg.base) {
+                liveState[topic] = { v: msg.v, value: applyLiveDiff(topic, current.value, msg.diff) };
+            } else {
+                // Perdemos alguma diferença: reconecta para receber o estado completo
+                startLiveStream();
+                return;
+            }
+            render(liveState[topic].value);
+        });
+    });
+}
+
 // Initialize
-loadStatus();
 updateDateTime();
-updateSystemMetrics();
-loadDiscordMembers();
-loadTopPlayers();
-setInterval(loadStatus, 5000);
+startLiveStream();
 setInterval(updateDateTime, 60000);
-setInterval(updateSystemMetrics, 2000);
-setInterval(loadDiscordMembers, 30000); // Atualiza membros a cada 30 segundos
-setInterval(loadTopPlayers, 15000); // Atualiza top players a cada 15 segundos
@@ -0,0 +1,191 @@
+"""Miniaturas e variantes responsivas das imagens de html/imagens.
+
+As variantes (larguras ``WIDTHS`` em WebP e, se o Pillow suportar, AVIF)
+são geradas fora do caminho das requisições, num ``ProcessPoolExecutor``.
+Ficam num cache endereçado por conteúdo (``<sha1 do original>-<w>.<fmt>``):
+a mesma imagem com outro nome reaproveita os arquivos, e um original
+editado gera nomes novos.
+
+Requisições só fazem um ``stat`` do original e consultam o índice em
+memória: se a variante ainda não existe (ou o original mudou), a geração é
+agendada e o original é servido nesse meio-tempo.
+Sem Pillow instalado o pipeline fica desligado e tudo sai no original.
+"""
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+    features = None
+
+from app_logging import get_logger
+
+log = get_logger("images")
+
+
+WIDTHS = (320, 640, 1280)
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+MIME = {"webp": "image/webp", "avif": "image/avif"}
+QUALITY = {"webp": 80, "avif": 55}
+
+
+def available_formats():
+    if Image is None:
+        return ()
+    formats = []
+    if features.check("avif"):
+        formats.append("avif")
+    if features.check("webp"):
+        formats.append("webp")
+    return tuple(formats)
+
+
+def make_variants(src_path, cache_dir, widths, formats):
+    """Roda no processo do pool: gera as variantes que ainda não existem.
+
+    Devolve ``(digest, largura, altura, {(w, fmt): nome_do_arquivo})``.
+    """
+    with open(src_path, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()[:20]
+
+    variants = {}
+    with Image.open(src_path) as img:
+        width, height = img.size
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+        for w in widths:
+            if w >= width:
+                continue
+            size = (w, max(1, round(height * w / width)))
+            resized = None
+            for fmt in formats:
+                name = f"{digest}-{w}.{fmt}"
+                path = os.path.join(cache_dir, name)
+                if not os.path.exists(path):
+                    if resized is None:
+                        resized = img.resize(size, Image.LANCZOS)
+                    tmp = f"{path}.{os.getpid()}.tmp"
+                    resized.save(tmp, fmt.upper(), quality=QUALITY[fmt])
+                    os.replace(tmp, path)
+                variants[(w, fmt)] = name
+    return digest, width, height, variants
+
+
+def _warmup():
+    return os.getpid()
+
+
+class ImagePipeline:
+    """Índice das variantes + pool de processos que as gera"""
+
+    def __init__(self, source_dir, cache_dir, widths=WIDTHS, workers=2):
+        self.source_dir = source_dir
+        self.cache_dir = cache_dir
+        self.widths = tuple(sorted(widths))
+        self.workers = workers
+        self.formats = available_formats()
+        self.enabled = bool(self.formats)
+        self.generated = 0
+        self._index = {}        # nome -> (chave do arquivo, digest, w, h, variantes)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def start_pool(self):
+        """Cria os processos do pool.
+
+        Usa fork e precisa ser chamado antes de qualquer thread do servidor
+        existir (o server.py não tem guarda ``__main__``, então spawn
+        reexecutaria o servidor nos filhos).
+        """
+        if not self.enabled:
+            log.warning("Pillow indisponível (ou sem WebP/AVIF), servindo só os originais")
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("fork"))
+        # Com fork, o primeiro submit cria todos os processos de uma vez
+        self._pool.submit(_warmup).result()
+        log.info("Variantes %s em %s (%s processos)", ", ".join(self.formats), self.widths, self.workers)
+
+    def _key(self, name):
+        try:
+            st = os.stat(os.path.join(self.source_dir, name))
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def scan(self):
+        """Agenda a geração para todas as imagens do diretório"""
+        if self._pool is None:
+            return
+        with os.scandir(self.source_dir) as entries:
+            names = [e.name for e in entries if e.is_file() and e.name.lower().endswith(SOURCE_EXTENSIONS)]
+        for name in names:
+            self.info(name)
+
+    def info(self, name):
+        """Entrada do índice de ``name`` ou None (e agenda a geração se faltar)"""
+        entry = self._index.get(name)
+        key = self._key(name)
+        if entry is not None and entry[0] == key:
+            return entry
+        if key is not None and self._pool is not None:
+            self._schedule(name, key)
+        return None
+
+    def _schedule(self, name, key):
+        with self._lock:
+            if name in self._pending:
+                return
+            self._pending.add(name)
+        src = os.path.join(self.source_dir, name)
+        future = self._pool.submit(make_variants, src, self.cache_dir, self.widths, self.formats)
+        future.add_done_callback(lambda f: self._done(name, key, f))
+
+    def _done(self, name, key, future):
+        with self._lock:
+            self._pending.discard(name)
+        try:
+            digest, width, height, variants = future.result()
+        except Exception as e:
+            log.error("Erro ao gerar variantes de %s: %s", name, e)
+            return
+        self._index[name] = (key, digest, width, height, variants)
+        self.generated += 1
+
+    def choose(self, name, width, accept):
+        """Arquivo de variante para ``?w=`` e o Accept do navegador, ou None.
+
+        Escolhe a menor largura >= pedida no primeiro formato aceito (AVIF
+        antes de WebP); None = servir o original.
+        """
+        entry = self.info(name)
+        if entry is None:
+            return None
+        variants = entry[4]
+        accept = accept or ""
+        for fmt in self.formats:
+            if MIME[fmt] not in accept:
+                continue
+            widths = [w for w in self.widths if (w, fmt) in variants]
+            if not widths:
+                continue
+            fits = [w for w in widths if w >= width]
+            if not fits:
+                # Maior que todas as variantes: o original é a melhor opção
+                return None
+            return variants[(fits[0], fmt)], MIME[fmt]
+        return None
+
+    def describe(self, name):
+        """Dimensões e larguras disponíveis (para o manifest)"""
+        entry = self.info(name)
+        if entry is None:
+            return None, None, []
+        widths = sorted({w for w, _ in entry[4]})
+        return entry[2], entry[3], widths
@@ -0,0 +1,198 @@
+"""Métricas no formato de texto do Prometheus (/metrics).
+
+- ``timing``: middleware do router que conta requisições por
+  rota/método/status e alimenta um histograma de latência por rota. O status
+  vem do ``send_response`` (``InstrumentedMixin``).
+- ``upstream(name)``: context manager que cronometra chamadas externas
+  (mcstatus, discord-bot, SQLite) num histograma por destino.
+- ``REGISTRY.add_collector(fn)``: funções chamadas só no scrape, para expor
+  contadores que já existem nos módulos (hits/misses dos caches etc.).
+
+O caminho quente é um ``perf_counter()``, um ``bisect`` e alguns
+incrementos sob um lock sem disputa: poucos microssegundos por requisição.
+O rótulo de rota é o padrão registrado no router (``/api/player-stats/{name}``,
+nunca o caminho cru), então o número de séries é fixo.
+"""
+import bisect
+import threading
+import time
+
+from app_logging import get_logger
+
+log = get_logger("metrics")
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names, values):
+    return ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    if isinstance(value, float):
+        if value != value:
+            return "NaN"
+        if value in (float("inf"), float("-inf")):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+class Histogram:
+    """Histograma com baldes fixos (contagem por balde não cumulativa)"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Contadores e histogramas com rótulos, renderizados no formato do Prometheus"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = {}         # (rota, método, status) -> contagem
+        self._latency = {}          # (rota, método) -> Histogram
+        self._upstream = {}         # (destino, resultado) -> Histogram
+        self._collectors = []
+
+    def observe_request(self, route, method, status, seconds):
+        with self._lock:
+            key = (route, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            hist = self._latency.get((route, method))
+            if hist is None:
+                hist = self._latency[(route, method)] = Histogram()
+            hist.observe(seconds)
+
+    def observe_upstream(self, target, outcome, seconds):
+        with self._lock:
+            hist = self._upstream.get((target, outcome))
+            if hist is None:
+                hist = self._upstream[(target, outcome)] = Histogram()
+            hist.observe(seconds)
+
+    def add_collector(self, fn):
+        """``fn()`` -> iterável de (nome, tipo, ajuda, [(rótulos, valor)]), chamada no scrape"""
+        self._collectors.append(fn)
+
+    def _histogram_lines(self, name, label_names, items):
+        lines = []
+        for values, hist in items:
+            base = _labels(label_names, values)
+            cumulative = 0
+            for bound, count in zip(hist.buckets, hist.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{base},le="+Inf"}} {hist.count}')
+            lines.append(f"{name}_sum{{{base}}} {_number(hist.sum)}")
+            lines.append(f"{name}_count{{{base}}} {hist.count}")
+        return lines
+
+    def render(self):
+        with self._lock:
+            requests = sorted(self._requests.items())
+            latency = sorted((k, self._copy(h)) for k, h in self._latency.items())
+            calls = sorted((k, self._copy(h)) for k, h in self._upstream.items())
+
+        out = [
+            "# HELP http_requests_total Requisições HTTP por rota, método e status",
+            "# TYPE http_requests_total counter",
+        ]
+        out += [f"http_requests_total{{{_labels(('route', 'method', 'code'), k)}}} {v}"
+                for k, v in requests]
+        out += [
+            "# HELP http_request_duration_seconds Latência das requisições por rota",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        out += self._histogram_lines("http_request_duration_seconds", ("route", "method"), latency)
+        out += [
+            "# HELP upstream_call_duration_seconds Chamadas a mcstatus, discord-bot e SQLite",
+            "# TYPE upstream_call_duration_seconds histogram",
+        ]
+        out += self._histogram_lines("upstream_call_duration_seconds", ("target", "outcome"), calls)
+
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                log.error("Erro em coletor de métricas: %s", e)
+                continue
+            for name, kind, help_text, samples in families:
+                out.append(f"# HELP {name} {help_text}")
+                out.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    if labels:
+                        out.append(f"{name}{{{_labels(labels.keys(), labels.values())}}} {_number(value)}")
+                    else:
+                        out.append(f"{name} {_number(value)}")
+        return "\n".join(out) + "\n"
+
+    @staticmethod
+    def _copy(hist):
+        copy = Histogram(hist.buckets)
+        copy.counts = list(hist.counts)
+        copy.sum = hist.sum
+        copy.count = hist.count
+        return copy
+
+
+REGISTRY = Registry()
+
+
+class upstream:
+    """``with upstream("discord"):`` cronometra a chamada (outcome ok/error)"""
+
+    __slots__ = ("target", "start")
+
+    def __init__(self, target):
+        self.target = target
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        REGISTRY.observe_upstream(self.target, "error" if exc_type else "ok",
+                                  time.perf_counter() - self.start)
+        return False
+
+
+class InstrumentedMixin:
+    """Guarda o status da resposta para o ``timing``"""
+
+    def send_response(self, code, message=None):
+        self._status_code = code
+        super().send_response(code, message)
+
+
+def timing(handler, next):
+    """Middleware: conta e cronometra pelo padrão da rota"""
+    handler._status_code = None
+    start = time.perf_counter()
+    try:
+        return next(handler)
+    except Exception:
+        if handler._status_code is None:
+            handler._status_code = 500
+        raise
+    finally:
+        route = handler.route.pattern
+        if route is None:
+            route = '/api/<other>' if handler.url_path.startswith('/api/') else '/<static>'
+        REGISTRY.observe_request(route, handler.command, handler._status_code or 0,
+                                 time.perf_counter() - start)
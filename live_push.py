@@ -0,0 +1,158 @@
+"""Atualizações ao vivo do dashboard por SSE (/api/live?topics=...).
+
+Uma thread olha as seções do ``Dashboard`` a cada ``interval`` segundos e,
+quando a versão de uma seção muda, publica no hub de eventos só a diferença
+para o estado anterior. Mudanças que acontecem dentro do mesmo ciclo saem
+num único frame (ex.: um jogador que entra e sai entre dois ciclos não gera
+nada). Sem clientes conectados a thread não monta nenhuma seção.
+
+Tópicos: ``status``, ``metrics``, ``players`` (entradas/saídas),
+``leaderboard`` e ``discord``. Ao conectar, o cliente recebe o estado
+completo de cada tópico (``{"v": n, "full": ...}``); depois, diferenças
+``{"v": n, "base": n-1, "diff": ...}``. Se ``base`` não bate com a versão
+que o cliente tem (frames descartados por lentidão), ele reconecta.
+"""
+import json
+import threading
+
+from app_logging import get_logger
+from event_hub import sse_frame
+
+log = get_logger("live")
+
+
+# tópico -> seção do dashboard de onde vem
+TOPICS = {
+    "status": "status",
+    "metrics": "metrics",
+    "players": "status",
+    "leaderboard": "top_players",
+    "discord": "discord",
+}
+
+
+def channel(topic):
+    return f"live:{topic}"
+
+
+def dict_diff(old, new):
+    """{"set": chaves novas/alteradas, "unset": chaves removidas} ou None"""
+    changed = {k: v for k, v in new.items() if k not in old or old[k] != v}
+    removed = [k for k in old if k not in new]
+    if not changed and not removed:
+        return None
+    diff = {"set": changed}
+    if removed:
+        diff["unset"] = removed
+    return diff
+
+
+def players_value(status):
+    return sorted(status.get("players_list") or [])
+
+
+def players_diff(old, new):
+    joined = [p for p in new if p not in old]
+    left = [p for p in old if p not in new]
+    if not joined and not left:
+        return None
+    return {"joined": joined, "left": left}
+
+
+def leaderboard_diff(old, new):
+    """Diferença do ranking: jogadores alterados, removidos e a nova ordem"""
+    diff = dict_diff({k: v for k, v in old.items() if k != "players"},
+                     {k: v for k, v in new.items() if k != "players"}) or {}
+    old_players = {p["name"]: p for p in old.get("players", [])}
+    new_players = new.get("players", [])
+    upsert = [p for p in new_players if old_players.get(p["name"]) != p]
+    order = [p["name"] for p in new_players]
+    removed = [name for name in old_players if name not in set(order)]
+    if upsert:
+        diff["upsert"] = upsert
+    if removed:
+        diff["removed"] = removed
+    if order != list(old_players):
+        diff["order"] = order
+    return diff or None
+
+
+DIFFS = {
+    "status": dict_diff,
+    "metrics": dict_diff,
+    "players": players_diff,
+    "leaderboard": leaderboard_diff,
+    "discord": dict_diff,
+}
+
+
+class LivePublisher(threading.Thread):
+    """Publica no hub as diferenças das seções do dashboard"""
+
+    def __init__(self, dashboard, hub, interval=1.0):
+        super().__init__(name="live-publisher", daemon=True)
+        self.dashboard = dashboard
+        self.hub = hub
+        self.interval = interval
+        self.frames = 0
+        self._state = {}        # tópico -> (versão do tópico, versão da seção, valor)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _frame(self, topic, payload):
+        return sse_frame(json.dumps(payload), event=topic)
+
+    def poll(self, topics=TOPICS):
+        """Compara as seções com o último estado publicado e publica as diferenças"""
+        with self._lock:
+            sections = {}
+            for topic in topics:
+                name = TOPICS[topic]
+                if name not in sections:
+                    sections[name] = self.dashboard.sections[name].current()
+                section_version, value = sections[name]
+                if topic == "players":
+                    value = players_value(value)
+
+                previous = self._state.get(topic)
+                if previous is None:
+                    self._state[topic] = (1, section_version, value)
+                    continue
+                version, seen, old = previous
+                if seen == section_version:
+                    continue
+                diff = DIFFS[topic](old, value)
+                if diff is None:
+                    self._state[topic] = (version, section_version, value)
+                    continue
+                self._state[topic] = (version + 1, section_version, value)
+                self.hub.publish(channel(topic), self._frame(
+                    topic, {"v": version + 1, "base": version, "diff": diff}))
+                self.frames += 1
+
+    def subscribe(self, sock, topics):
+        """Entrega ``sock`` ao hub com o estado completo de cada tópico.
+
+        O lock garante que nenhuma diferença publicada fica entre o estado
+        inicial e a primeira diferença que o cliente recebe.
+        """
+        self.poll(topics)
+        with self._lock:
+            initial = []
+            for topic in topics:
+                version, _, value = self._state[topic]
+                initial.append(self._frame(topic, {"v": version, "full": value}))
+            self.hub.add_client(sock, [channel(t) for t in topics], initial)
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            active = [t for t in TOPICS if self.hub.subscriber_count(channel(t))]
+            if not active:
+                continue
+            try:
+                self.poll(active)
+            except Exception as e:
+                log.error("Erro ao publicar atualizações: %s", e)
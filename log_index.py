@@ -0,0 +1,353 @@
+"""Índice pesquisável dos logs do Minecraft (latest.log + logs rotacionados .gz).
+
+Cada linha vira uma linha da tabela ``log_lines`` com timestamp, thread,
+nível e logger já extraídos; o texto vai para um índice FTS5 (ou ``LIKE``
+se o SQLite não tiver FTS5). O índice fica num banco separado (logs.db) para
+não disputar lock com as sessões em images.db.
+
+A ingestão é incremental: o offset já indexado de cada arquivo fica em
+``ingest_state`` e é gravado na mesma transação das linhas, então depois de
+um restart (ou crash) só os bytes novos são lidos. O ``LogWatcher`` só acorda
+a thread do indexador; a leitura é feita a partir do checkpoint.
+"""
+import gzip
+import hashlib
+import os
+import queue
+import re
+import threading
+import time
+
+import db
+from app_logging import get_logger
+from log_tail import read_since
+
+log = get_logger("logindex")
+
+
+LOG_INDEX_FILE = "logs.db"
+
+# Logs rotacionados pelo log4j: 2024-10-12-1.log.gz (debug-*.log.gz fica de fora)
+ROTATED_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})-\d+\.log\.gz$")
+
+# [18Oct2026 10:00:00.123] [Server thread/INFO] [minecraft/MinecraftServer]: msg
+FORGE_LINE_RE = re.compile(
+    r"^\[(\d{2})(\w{3})(\d{4}) (\d{2}):(\d{2}):(\d{2})(?:\.(\d{3}))?\] "
+    r"\[([^\]]*)/(\w+)\] (?:\[([^\]]*)\]: |: )?(.*)$")
+# [10:00:00] [Server thread/INFO]: msg  (vanilla, data vem do nome do arquivo)
+VANILLA_LINE_RE = re.compile(r"^\[(\d{2}):(\d{2}):(\d{2})\] \[([^\]]*)/(\w+)\]: (.*)$")
+
+MONTHS = {m: i for i, m in enumerate(
+    ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], 1)}
+
+LEVELS = ("TRACE", "DEBUG", "INFO", "WARN", "ERROR", "FATAL")
+
+BATCH_LINES = 5000
+HEAD_BYTES = 4096
+
+
+def parse_time(value):
+    """Epoch ou data ISO local ('2024-10-12', '2024-10-12T10:00[:00]') -> epoch"""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    value = value.replace("T", " ")
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return time.mktime(time.strptime(value, fmt))
+        except ValueError:
+            continue
+    raise ValueError(f"Data inválida: {value}")
+
+
+def fts_query(text):
+    """Converte texto livre em consulta FTS5 segura (todas as palavras, entre aspas)"""
+    terms = [t.replace('"', '""') for t in text.split()]
+    return " ".join(f'"{t}"' for t in terms)
+
+
+def like_pattern(text):
+    """Texto livre -> padrão ``LIKE '%...%'`` com ``%``/``_`` literais (``ESCAPE '\\'``)"""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class LineParser:
+    """Extrai (ts, thread, level, logger, message) mantendo contexto.
+
+    Linhas sem cabeçalho (stack traces, continuações) herdam timestamp,
+    thread e nível da última linha com cabeçalho.
+    """
+
+    def __init__(self, base_date=None):
+        self.base_date = base_date      # (ano, mês, dia) para o formato vanilla
+        self.ts = None
+        self.thread = None
+        self.level = "INFO"
+        self.logger = None
+
+    def parse(self, line):
+        line = line.rstrip("\r\n")
+        m = FORGE_LINE_RE.match(line)
+        if m:
+            day, mon, year, hh, mm, ss, ms, thread, level, logger, msg = m.groups()
+            month = MONTHS.get(mon[:3].title())
+            if month:
+                self.ts = time.mktime((int(year), month, int(day), int(hh), int(mm), int(ss), 0, 0, -1))
+                if ms:
+                    self.ts += int(ms) / 1000.0
+            self.thread, self.level, self.logger = thread, level.upper(), logger
+            return self.ts, thread, self.level, logger, msg
+
+        m = VANILLA_LINE_RE.match(line)
+        if m and self.base_date:
+            hh, mm, ss, thread, level, msg = m.groups()
+            y, mo, d = self.base_date
+            self.ts = time.mktime((y, mo, d, int(hh), int(mm), int(ss), 0, 0, -1))
+            self.thread, self.level, self.logger = thread, level.upper(), None
+            return self.ts, thread, self.level, None, msg
+
+        return self.ts, self.thread, self.level, self.logger, line
+
+
+class LogIndex:
+    """Acesso ao banco do índice (escrita só pela thread do indexador)"""
+
+    def __init__(self, path=LOG_INDEX_FILE):
+        self.path = path
+        self.fts = False
+
+    def conn(self):
+        return db.get_connection(self.path)
+
+    def init(self):
+        conn = self.conn()
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS log_lines (
+                id INTEGER PRIMARY KEY,
+                source TEXT NOT NULL,
+                ts REAL,
+                thread TEXT,
+                level TEXT,
+                logger TEXT,
+                message TEXT NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_log_lines_ts ON log_lines (ts)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_log_lines_level_ts ON log_lines (level, ts)')
+        # Checkpoint por arquivo: offset indexado + hash do início (identifica
+        # o latest.log depois que ele é rotacionado para .gz)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS ingest_state (
+                source TEXT PRIMARY KEY,
+                inode INTEGER,
+                offset INTEGER NOT NULL DEFAULT 0,
+                head_hash TEXT,
+                done INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        try:
+            conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS log_fts
+                USING fts5(message, content='log_lines', content_rowid='id')
+            ''')
+            self.fts = True
+        except Exception as e:
+            log.warning("FTS5 indisponível, busca por LIKE: %s", e)
+        conn.commit()
+
+    # --- checkpoints -------------------------------------------------------
+
+    def get_state(self, source):
+        return self.conn().execute(
+            'SELECT inode, offset, head_hash, done FROM ingest_state WHERE source = ?',
+            (source,)).fetchone()
+
+    def find_by_head(self, head_hash):
+        return self.conn().execute(
+            'SELECT source, offset FROM ingest_state WHERE head_hash = ? AND source LIKE ?',
+            (head_hash, 'latest.log@%')).fetchone()
+
+    def save_batch(self, source, rows, inode, offset, head_hash=None, done=0):
+        """Insere as linhas e grava o checkpoint na mesma transação"""
+        conn = self.conn()
+        try:
+            if rows:
+                cursor = conn.execute('SELECT COALESCE(MAX(id), 0) FROM log_lines')
+                first_id = cursor.fetchone()[0] + 1
+                conn.executemany('''
+                    INSERT INTO log_lines (id, source, ts, thread, level, logger, message)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', [(first_id + i, source) + row for i, row in enumerate(rows)])
+                if self.fts:
+                    conn.executemany('INSERT INTO log_fts (rowid, message) VALUES (?, ?)',
+                                     [(first_id + i, row[4]) for i, row in enumerate(rows)])
+            conn.execute('''
+                INSERT INTO ingest_state (source, inode, offset, head_hash, done)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(source) DO UPDATE SET
+                    inode = excluded.inode,
+                    offset = excluded.offset,
+                    head_hash = COALESCE(excluded.head_hash, ingest_state.head_hash),
+                    done = excluded.done
+            ''', (source, inode, offset, head_hash, done))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    # --- busca ---------------------------------------------------------------
+
+    def search(self, levels=None, q=None, ts_from=None, ts_to=None, limit=100, before=None):
+        """Mais recentes primeiro; paginação por cursor (``before`` = id)"""
+        where = []
+        params = []
+        join = ""
+        if q:
+            if self.fts:
+                join = "JOIN log_fts ON log_fts.rowid = l.id"
+                where.append("log_fts MATCH ?")
+                params.append(fts_query(q))
+            else:
+                where.append("l.message LIKE ? ESCAPE '\\'")
+                params.append(like_pattern(q))
+        if levels:
+            where.append(f"l.level IN ({','.join('?' * len(levels))})")
+            params.extend(levels)
+        if ts_from is not None:
+            where.append("l.ts >= ?")
+            params.append(ts_from)
+        if ts_to is not None:
+            where.append("l.ts <= ?")
+            params.append(ts_to)
+        if before is not None:
+            where.append("l.id < ?")
+            params.append(before)
+
+        sql = f'''
+            SELECT l.id, l.source, l.ts, l.thread, l.level, l.logger, l.message
+            FROM log_lines l {join}
+            {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY l.id DESC
+            LIMIT ?
+        '''
+        params.append(limit + 1)
+        rows = self.conn().execute(sql, params).fetchall()
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+
+class LogIndexer(threading.Thread):
+    """Thread que mantém o índice em dia com os arquivos de log"""
+
+    def __init__(self, log_path, index, rescan_interval=300.0):
+        super().__init__(name="log-indexer", daemon=True)
+        self.log_path = log_path
+        self.log_dir = os.path.dirname(log_path) or "."
+        self.index = index
+        self.rescan_interval = rescan_interval
+        self._wake = queue.Queue()
+        self._parser = None
+        self._parser_source = None
+
+    def notify(self, *args):
+        """Listener do LogWatcher: só acorda a thread (sem ler nada aqui)"""
+        self._wake.put(True)
+
+    def run(self):
+        next_rescan = 0
+        while True:
+            try:
+                if time.monotonic() >= next_rescan:
+                    self.ingest_rotated()
+                    next_rescan = time.monotonic() + self.rescan_interval
+                self.ingest_latest()
+            except Exception as e:
+                log.error("Erro na ingestão de logs: %s", e)
+            try:
+                self._wake.get(timeout=self.rescan_interval)
+                # várias notificações acumuladas = uma leitura só
+                while not self._wake.empty():
+                    self._wake.get_nowait()
+            except queue.Empty:
+                pass
+
+    # --- latest.log ----------------------------------------------------------
+
+    def _head_hash(self, fileobj):
+        head = fileobj.read(HEAD_BYTES)
+        return hashlib.sha1(head).hexdigest() if len(head) == HEAD_BYTES else None
+
+    def ingest_latest(self):
+        try:
+            st = os.stat(self.log_path)
+        except FileNotFoundError:
+            return
+        source = f"latest.log@{st.st_ino}"
+        state = self.index.get_state(source)
+        offset = state[1] if state else 0
+        head_hash = state[2] if state else None
+
+        if head_hash is None:
+            with open(self.log_path, "rb") as f:
+                head_hash = self._head_hash(f)
+
+        if self._parser_source != source:
+            self._parser = LineParser(time.localtime(st.st_mtime)[:3])
+            self._parser_source = source
+
+        while True:
+            lines, new_offset, inode, reset = read_since(self.log_path, offset, st.st_ino)
+            if reset or inode != st.st_ino:
+                return      # rotacionou no meio: a próxima rodada pega o arquivo novo
+            if new_offset == offset:
+                return
+            rows = [self._parser.parse(line) for line in lines]
+            self.index.save_batch(source, rows, inode, new_offset, head_hash)
+            offset = new_offset
+
+    # --- .log.gz rotacionados -----------------------------------------------
+
+    def ingest_rotated(self):
+        try:
+            names = sorted(os.listdir(self.log_dir))
+        except FileNotFoundError:
+            return
+        for name in names:
+            m = ROTATED_RE.match(name)
+            if not m:
+                continue
+            state = self.index.get_state(name)
+            if state and state[3]:
+                continue
+            self.ingest_gz(name, tuple(int(x) for x in m.groups()), state[1] if state else 0)
+
+    def ingest_gz(self, name, base_date, resume=0):
+        path = os.path.join(self.log_dir, name)
+        parser = LineParser(base_date)
+        with gzip.open(path, "rb") as f:
+            head_hash = self._head_hash(f)
+            f.seek(0)
+            # Se este .gz é um latest.log já indexado, pula o que já foi lido
+            skip = 0
+            match = self.index.find_by_head(head_hash) if head_hash else None
+            if match:
+                skip = match[1]
+            # Retoma uma ingestão interrompida do mesmo .gz
+            skip = max(skip, resume)
+            f.seek(skip)
+
+            offset = skip
+            rows = []
+            for raw in f:
+                offset += len(raw)
+                rows.append(parser.parse(raw.decode("utf-8", errors="ignore")))
+                if len(rows) >= BATCH_LINES:
+                    self.index.save_batch(name, rows, None, offset, head_hash)
+                    rows = []
+        self.index.save_batch(name, rows, None, offset, head_hash, done=1)
+        log.info("%s indexado (%s bytes novos)", name, offset - skip)
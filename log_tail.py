@@ -0,0 +1,128 @@
+"""Leitura incremental do latest.log do Minecraft.
+
+O log de um servidor modado chega a centenas de MB, então nada aqui lê o
+arquivo inteiro:
+
+- ``tail_lines`` volta a partir do fim do arquivo em blocos até achar as
+  últimas N linhas;
+- ``read_since`` lê só os bytes adicionados depois de um cursor (offset em
+  bytes) e detecta rotação do log pelo inode e pelo tamanho.
+
+Os offsets devolvidos sempre apontam para o início de uma linha: uma linha
+ainda sendo escrita (sem ``\\n``) fica para a próxima leitura.
+"""
+import os
+
+
+BLOCK_SIZE = 64 * 1024
+# Limite de bytes devolvidos por chamada de read_since
+MAX_READ = 1024 * 1024
+
+
+def _decode(data):
+    return data.decode("utf-8", errors="ignore").splitlines(keepends=True)
+
+
+def tail_lines(path, n, block_size=BLOCK_SIZE, end=None):
+    """(linhas, offset_final, inode) com as últimas ``n`` linhas completas.
+
+    ``end`` limita a leitura a um offset (por padrão, o fim do arquivo).
+    """
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        pos = st.st_size if end is None else min(end, st.st_size)
+        chunks = []
+        newlines = 0
+        # n + 1 quebras garantem que a primeira linha do resultado está inteira
+        while pos > 0 and newlines <= n:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+        data = b"".join(reversed(chunks))
+
+    cut = data.rfind(b"\n") + 1
+    offset = pos + cut
+    lines = _decode(data[:cut])[-n:] if n > 0 else []
+    return lines, offset, st.st_ino
+
+
+def read_since(path, offset, inode=None, tail=500, max_bytes=MAX_READ):
+    """Linhas completas escritas depois de ``offset``.
+
+    Devolve ``(linhas, novo_offset, inode, reset)``. Se o arquivo foi
+    rotacionado (inode diferente) ou truncado (menor que o cursor), o cursor
+    não vale mais: devolve o tail do arquivo novo com ``reset=True``.
+
+    Sem ``inode`` só o truncamento é detectado (um arquivo novo que já
+    passou do offset seria lido do meio): cursores que vêm de clientes
+    sempre carregam o inode junto (``<inode>:<offset>``).
+    """
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        if (inode is not None and st.st_ino != inode) or st.st_size < offset:
+            lines, new_offset, new_inode = tail_lines(path, tail)
+            return lines, new_offset, new_inode, True
+
+        if st.st_size == offset:
+            return [], offset, st.st_ino, False
+
+        f.seek(offset)
+        data = f.read(min(st.st_size - offset, max_bytes))
+
+    end = data.rfind(b"\n") + 1
+    return _decode(data[:end]), offset + end, st.st_ino, False
+
+
+def read_range(path, start, end):
+    """Linhas entre dois offsets de linha (``start`` incluso, ``end`` não)"""
+    if end <= start:
+        return []
+    with open(path, "rb") as f:
+        f.seek(start)
+        return _decode(f.read(end - start))
+
+
+class LogFollower:
+    """Acompanha um arquivo de log guardando inode e offset entre leituras"""
+
+    def __init__(self, path, start_at_end=True):
+        self.path = path
+        self.inode = None
+        self.offset = 0
+        self.start_at_end = start_at_end
+
+    def poll(self, max_bytes=MAX_READ):
+        """(linhas, offset_inicial, offset_final, reset) das linhas novas.
+
+        ``reset`` indica que o arquivo foi rotacionado/truncado e a leitura
+        recomeçou do início do arquivo novo.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return [], self.offset, self.offset, False
+
+        reset = False
+        if self.inode is None:
+            self.inode = st.st_ino
+            if self.start_at_end:
+                # Começa do fim, alinhado ao início de uma linha
+                _, self.offset, self.inode = tail_lines(self.path, 0)
+                return [], self.offset, self.offset, False
+        elif st.st_ino != self.inode or st.st_size < self.offset:
+            self.inode = st.st_ino
+            self.offset = 0
+            reset = True
+
+        start = self.offset
+        lines, self.offset, inode, _ = read_since(self.path, start, None, max_bytes=max_bytes)
+        if inode != self.inode:
+            # Rotacionou entre o stat e o open: a próxima chamada detecta a
+            # troca de inode e recomeça do início do arquivo novo
+            self.inode = -1
+            self.offset = start
+            return [], start, start, reset
+        return lines, start, self.offset, reset
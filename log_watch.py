@@ -0,0 +1,137 @@
+"""Observador único do latest.log, compartilhado por todos os consumidores.
+
+O arquivo é lido uma vez por mudança (inotify no diretório do log, ou
+polling se o inotify não estiver disponível) e as linhas novas são:
+
+- publicadas no canal ``logs`` do ``EventStreamHub`` como um frame SSE
+  (``event: log``, ``id: <inode>:<offset>``), sem reler o arquivo por cliente;
+- entregues aos listeners registrados com ``add_listener``.
+
+Tudo roda na thread do hub; listeners que fazem trabalho pesado (SQLite,
+parsing) devem só enfileirar as linhas para a própria thread.
+"""
+import json
+import os
+import threading
+
+from app_logging import get_logger
+from event_hub import sse_frame
+from file_watch import open_watcher
+from log_tail import LogFollower, MAX_READ, read_range, tail_lines
+
+log = get_logger("logs")
+
+
+CHANNEL = "logs"
+
+
+def parse_cursor(value, inode=None):
+    """'<inode>:<offset>' (Last-Event-ID) ou '<offset>' -> (offset, inode).
+
+    ``inode`` é usado quando o cursor não traz o seu (``?inode=`` separado).
+    Cursor malformado vem do cliente, não é erro do servidor: vira
+    ``(None, None)`` e quem chama recomeça pelo tail, como com um cursor velho.
+    """
+    if not value:
+        return None, None
+    offset = value
+    if ":" in value:
+        inode, offset = value.split(":", 1)
+    try:
+        offset = int(offset)
+        inode = int(inode) if inode is not None else None
+    except ValueError:
+        return None, None
+    if offset < 0:
+        return None, None
+    return offset, inode
+
+
+class LogWatcher:
+    """Lê o log uma vez por mudança e distribui as linhas novas"""
+
+    def __init__(self, path, hub, poll_interval=1.0, safety_poll=5.0, tail=500):
+        self.path = path
+        self.hub = hub
+        self.poll_interval = poll_interval
+        self.safety_poll = safety_poll
+        self.tail = tail
+        self.follower = LogFollower(path)
+        self.inotify = None
+        self._name = os.path.basename(path)
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback):
+        """``callback(lines, start, end, inode, reset)`` na thread do hub"""
+        self._listeners.append(callback)
+
+    def attach(self):
+        """Registra o observador no loop do hub (chamar antes de hub.start())"""
+        self.inotify = open_watcher(os.path.dirname(self.path) or ".")
+        if self.inotify is not None:
+            self.hub.add_reader(self.inotify, self._on_inotify)
+            # inotify pode perder eventos (ex.: diretório recriado): checagem lenta de segurança
+            self.hub.call_every(self.safety_poll, self.check)
+        else:
+            log.warning("inotify indisponível, usando polling a cada %ss", self.poll_interval)
+            self.hub.call_every(self.poll_interval, self.check)
+        self.check()
+
+    def _on_inotify(self):
+        names = self.inotify.read()
+        if names is None or self._name in names:
+            self.check()
+
+    def check(self):
+        with self._lock:
+            while True:
+                lines, start, end, reset = self.follower.poll()
+                inode = self.follower.inode
+                if reset:
+                    self.hub.publish(CHANNEL, self._reset_frame(inode, start))
+                if lines:
+                    self.hub.publish(CHANNEL, self._lines_frame(lines, inode, end))
+                    for listener in self._listeners:
+                        try:
+                            listener(lines, start, end, inode, reset)
+                        except Exception as e:
+                            log.error("Erro em listener do log: %s", e)
+                # Rajadas maiores que MAX_READ continuam na mesma chamada
+                if end - start < MAX_READ // 2:
+                    break
+
+    def _lines_frame(self, lines, inode, end):
+        data = "".join(lines).rstrip("\n").replace("\r", "")
+        return sse_frame(data, event="log", event_id=f"{inode}:{end}")
+
+    def _reset_frame(self, inode, offset):
+        return sse_frame(json.dumps({"inode": inode, "offset": offset}), event="reset",
+                         event_id=f"{inode}:{offset}")
+
+    def subscribe(self, sock, since=None, inode=None):
+        """Entrega ``sock`` ao hub já com as linhas que o cliente perdeu.
+
+        Com cursor válido (offset e inode do arquivo atual) manda o que foi
+        escrito entre o cursor e o ponto atual do observador; sem cursor,
+        sem inode (não dá para detectar rotação) ou com inode diferente manda um
+        ``reset`` e as últimas ``tail`` linhas. O lock garante que nenhuma
+        linha fica de fora nem chega duplicada.
+        """
+        with self._lock:
+            f = self.follower
+            initial = []
+            if f.inode is not None and f.inode >= 0:
+                valid = (since is not None and inode == f.inode
+                         and since <= f.offset and f.offset - since <= MAX_READ)
+                try:
+                    if valid:
+                        lines = read_range(self.path, since, f.offset)
+                    else:
+                        lines, _, _ = tail_lines(self.path, self.tail, end=f.offset)
+                        initial.append(self._reset_frame(f.inode, f.offset))
+                    if lines:
+                        initial.append(self._lines_frame(lines, f.inode, f.offset))
+                except OSError as e:
+                    log.error("Erro ao ler backlog do log: %s", e)
+            self.hub.add_client(sock, [CHANNEL], initial)
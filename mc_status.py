@@ -0,0 +1,145 @@
+"""Poller do status do servidor Minecraft.
+
+Uma única thread faz o ping (``JavaServer.status()``) num intervalo fixo e
+publica um snapshot imutável. Os handlers só leem ``poller.snapshot()``, então
+o servidor recebe um ping por intervalo independente de quantas abas estão
+abertas.
+
+Quando o ping falha, o último snapshot bom continua sendo servido (marcado como
+``stale``) por até ``stale_limit`` segundos enquanto o poller tenta de novo com
+backoff exponencial; depois disso o snapshot passa a indicar o erro.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from mcstatus import JavaServer
+
+from app_logging import get_logger
+from instrumentation import upstream
+
+log = get_logger("status")
+
+
+StatusSnapshot = namedtuple("StatusSnapshot", [
+    "seq",              # incrementa a cada publicação
+    "online",
+    "version",
+    "protocol",
+    "motd",
+    "players_online",
+    "players_max",
+    "players_list",     # tupla de nomes
+    "latency",
+    "fetched_at",       # epoch do último ping bem sucedido (ou da falha)
+    "stale",
+    "error",
+])
+
+
+def _offline_snapshot(seq, error, fetched_at=None):
+    return StatusSnapshot(
+        seq=seq, online=False, version=None, protocol=None, motd=None,
+        players_online=0, players_max=0, players_list=(), latency=None,
+        fetched_at=fetched_at, stale=False, error=error,
+    )
+
+
+def snapshot_to_dict(snap):
+    """Formato da resposta de /api/status (mesmas chaves de antes + frescor)"""
+    if not snap.online:
+        return {"error": snap.error, "fetched_at": snap.fetched_at}
+    data = {
+        "version": snap.version,
+        "protocol": snap.protocol,
+        "motd": snap.motd,
+        "players_online": snap.players_online,
+        "players_max": snap.players_max,
+        "ping": snap.latency,
+        "players_list": list(snap.players_list),
+        "fetched_at": snap.fetched_at,
+        "stale": snap.stale,
+    }
+    if snap.error:
+        data["last_error"] = snap.error
+    return data
+
+
+class StatusPoller(threading.Thread):
+    """Thread que pinga o servidor e mantém o snapshot mais recente"""
+
+    def __init__(self, host, port, interval=5.0, max_backoff=60.0, stale_limit=30.0, timeout=3.0):
+        super().__init__(name="mc-status-poller", daemon=True)
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.stale_limit = stale_limit
+        self.timeout = timeout
+        self.failures = 0
+        self._seq = 0
+        self._last_good = None
+        self._snapshot = _offline_snapshot(0, "Status ainda não disponível")
+        self._stop_event = threading.Event()
+
+    def snapshot(self):
+        """Snapshot atual (leitura de um atributo, sem lock)"""
+        return self._snapshot
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _publish(self, snap):
+        self._snapshot = snap
+
+    def poll_once(self):
+        self._seq += 1
+        try:
+            with upstream("mcstatus"):
+                status = JavaServer(self.host, self.port, timeout=self.timeout).status()
+        except Exception as e:
+            self.failures += 1
+            now = time.time()
+            good = self._last_good
+            if good is not None and now - good.fetched_at <= self.stale_limit:
+                # stale-while-revalidate: mantém os dados antigos enquanto tenta de novo
+                self._publish(good._replace(seq=self._seq, stale=True, error=str(e)))
+            else:
+                self._publish(_offline_snapshot(self._seq, str(e), now))
+            return False
+
+        players = ()
+        if status.players.sample:
+            players = tuple(player.name for player in status.players.sample)
+
+        snap = StatusSnapshot(
+            seq=self._seq,
+            online=True,
+            version=status.version.name,
+            protocol=status.version.protocol,
+            motd=str(status.description),
+            players_online=status.players.online,
+            players_max=status.players.max,
+            players_list=players,
+            latency=status.latency,
+            fetched_at=time.time(),
+            stale=False,
+            error=None,
+        )
+        self.failures = 0
+        self._last_good = snap
+        self._publish(snap)
+        return True
+
+    def next_delay(self):
+        if self.failures == 0:
+            return self.interval
+        return min(self.interval * (2 ** self.failures), self.max_backoff)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                log.error("Erro inesperado no poller: %s", e)
+            self._stop_event.wait(self.next_delay())
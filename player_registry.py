@@ -0,0 +1,143 @@
+"""Registro de jogadores descoberto a partir de /minecraft-stats e usercache.json.
+
+Todo jogador que já entrou no mundo tem um ``<uuid>.json`` em
+/minecraft-stats; o nome vem do ``usercache.json`` do servidor. Uma thread
+relê o diretório a cada ``interval`` segundos e mantém em memória:
+
+- os índices nome -> UUID (sem diferenciar maiúsculas) e UUID -> nome;
+- o ranking por tempo jogado, já ordenado, refeito só quando algum
+  arquivo de stats muda (mtime/tamanho) ou aparece/some.
+
+Requisições só leem o snapshot publicado, sem tocar no disco.
+"""
+import json
+import os
+import threading
+from collections import namedtuple
+
+from app_logging import get_logger
+
+log = get_logger("players")
+
+
+LeaderboardEntry = namedtuple("LeaderboardEntry", ["uuid", "name", "play_time_ticks"])
+
+
+def load_usercache(path):
+    """usercache.json -> {uuid: nome}"""
+    with open(path, "r") as f:
+        entries = json.load(f)
+    return {e["uuid"]: e["name"] for e in entries if e.get("uuid") and e.get("name")}
+
+
+class PlayerRegistry(threading.Thread):
+    """Índices nome/UUID e ranking por tempo jogado, atualizados em background"""
+
+    def __init__(self, stats_repo, usercache_path, interval=30.0):
+        super().__init__(name="player-registry", daemon=True)
+        self.stats_repo = stats_repo
+        self.usercache_path = usercache_path
+        self.interval = interval
+        self._names = {}
+        self._usercache_key = None
+        self._files = {}        # uuid -> (mtime_ns, size) do arquivo de stats
+        self._play_time = {}    # uuid -> ticks
+        self._by_name = {}
+        self._by_uuid = {}
+        self._leaderboard = ()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def uuid_for(self, name):
+        """UUID do jogador pelo nome (sem diferenciar maiúsculas) ou None"""
+        return self._by_name.get(name.lower())
+
+    def name_for(self, uuid):
+        return self._by_uuid.get(uuid)
+
+    def leaderboard(self):
+        """Tupla de LeaderboardEntry, do maior tempo jogado para o menor"""
+        return self._leaderboard
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _refresh_usercache(self):
+        try:
+            st = os.stat(self.usercache_path)
+        except OSError:
+            return False
+        key = (st.st_mtime_ns, st.st_size)
+        if key == self._usercache_key:
+            return False
+        try:
+            self._names = load_usercache(self.usercache_path)
+        except (OSError, ValueError) as e:
+            log.error("Erro ao ler %s: %s", self.usercache_path, e)
+            return False
+        self._usercache_key = key
+        return True
+
+    def refresh(self):
+        """Relê o diretório de stats; reconstrói índices/ranking se algo mudou"""
+        with self._lock:
+            changed = self._refresh_usercache()
+            seen = set()
+            try:
+                entries = list(os.scandir(self.stats_repo.stats_dir))
+            except OSError as e:
+                log.error("Erro ao listar %s: %s", self.stats_repo.stats_dir, e)
+                entries = []
+
+            for entry in entries:
+                if not entry.name.endswith(".json"):
+                    continue
+                uuid = entry.name[:-5]
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                seen.add(uuid)
+                key = (st.st_mtime_ns, st.st_size)
+                if self._files.get(uuid) == key:
+                    continue
+                try:
+                    # Também deixa o cache do StatsRepository quente
+                    self._play_time[uuid] = self.stats_repo.get_stats(uuid)["play_time_ticks"]
+                except Exception as e:
+                    log.error("Erro ao ler stats de %s: %s", uuid, e)
+                    continue
+                self._files[uuid] = key
+                changed = True
+
+            for uuid in list(self._files):
+                if uuid not in seen:
+                    del self._files[uuid]
+                    self._play_time.pop(uuid, None)
+                    changed = True
+
+            if changed:
+                self._rebuild()
+            return changed
+
+    def _rebuild(self):
+        by_uuid = {}
+        for uuid in self._files:
+            # Sem entrada no usercache: usa o próprio UUID como nome
+            by_uuid[uuid] = self._names.get(uuid, uuid)
+        by_name = {name.lower(): uuid for uuid, name in by_uuid.items()}
+        board = sorted(
+            (LeaderboardEntry(uuid, by_uuid[uuid], self._play_time.get(uuid, 0)) for uuid in by_uuid),
+            key=lambda e: (-e.play_time_ticks, e.name.lower()),
+        )
+        # Publica dicionários/tupla novos: leitores nunca veem estado parcial
+        self._by_uuid = by_uuid
+        self._by_name = by_name
+        self._leaderboard = tuple(board)
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                log.error("Erro ao atualizar registro de jogadores: %s", e)
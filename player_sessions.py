@@ -0,0 +1,150 @@
+"""Sessões dos jogadores a partir das linhas "joined/left the game" do log.
+
+Cada join abre uma linha em ``player_sessions`` e o leave correspondente a
+fecha; ``player_last_seen`` é atualizada na mesma transação, então o
+/api/top-players lê o last_seen sem agregar nada.
+
+Como no índice de logs, a leitura é incremental: o offset do latest.log
+(por inode) e o timestamp da última linha ficam em ``player_session_state``
+gravados junto com as sessões, e depois de um restart (ou crash) só os bytes
+novos são lidos. Na primeira execução os .log.gz rotacionados são lidos uma
+vez, em ordem, para montar o histórico.
+
+Servidor parando ("Stopping server") fecha todas as sessões abertas; um
+"Starting minecraft server" com sessões ainda abertas (crash) as fecha no
+horário da última linha vista antes dele.
+"""
+import gzip
+import os
+import queue
+import re
+import threading
+import time
+
+import db
+from app_logging import get_logger
+from log_index import LineParser, ROTATED_RE
+from log_tail import read_since
+
+log = get_logger("sessions")
+
+
+JOIN_LEAVE_RE = re.compile(r"^(\w{1,16}) (joined|left) the game$")
+SERVER_START = "Starting minecraft server"
+SERVER_STOP = "Stopping server"
+
+
+def iso_time(ts):
+    """Formato guardado no banco (ISO local, lido com datetime.fromisoformat)"""
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(ts))
+
+
+class SessionTracker(threading.Thread):
+    """Thread que transforma joins/leaves do log em sessões no SQLite"""
+
+    def __init__(self, log_path, rescan_interval=300.0):
+        super().__init__(name="session-tracker", daemon=True)
+        self.log_path = log_path
+        self.log_dir = os.path.dirname(log_path) or "."
+        self.rescan_interval = rescan_interval
+        self.events = 0
+        self._wake = queue.Queue()
+        self._parser = None
+        self._parser_source = None
+        self._last_ts = None
+
+    def notify(self, *args):
+        """Listener do LogWatcher: só acorda a thread"""
+        self._wake.put(True)
+
+    def parse(self, lines, parser):
+        """Eventos (kind, jogador, horário ISO) das linhas; atualiza o último ts visto"""
+        events = []
+        prev = None
+        for line in lines:
+            # Só linhas candidatas passam pelo parse completo
+            if "the game" not in line and SERVER_START not in line and SERVER_STOP not in line:
+                prev = line
+                continue
+            before = parser.parse(prev)[0] if prev is not None else self._last_ts
+            ts, thread, level, logger, msg = parser.parse(line)
+            prev = line
+            if ts is None:
+                continue
+            match = JOIN_LEAVE_RE.match(msg)
+            if match:
+                kind = "join" if match.group(2) == "joined" else "leave"
+                events.append((kind, match.group(1), iso_time(ts)))
+            elif msg.startswith(SERVER_STOP):
+                events.append(("close_all", None, iso_time(ts)))
+            elif msg.startswith(SERVER_START):
+                # Sessões ainda abertas aqui = crash: fecha na última linha antes
+                events.append(("close_all", None, iso_time(before or ts)))
+        if prev is not None:
+            self._last_ts = parser.parse(prev)[0] or self._last_ts
+        self.events += len(events)
+        return events
+
+    # --- histórico (.log.gz) -------------------------------------------------
+
+    def backfill(self):
+        """Lê os .log.gz uma única vez (só antes do primeiro checkpoint do latest.log)"""
+        try:
+            names = sorted(n for n in os.listdir(self.log_dir) if ROTATED_RE.match(n))
+        except FileNotFoundError:
+            return
+        for name in names:
+            state = db.get_session_checkpoint(name)
+            if state and state[3]:
+                continue
+            self._last_ts = state[2] if state else self._last_ts
+            parser = LineParser(tuple(int(x) for x in ROTATED_RE.match(name).groups()))
+            # Linha a linha direto do gzip: o arquivo nunca fica inteiro na memória
+            with gzip.open(os.path.join(self.log_dir, name), "rb") as f:
+                events = self.parse((raw.decode("utf-8", errors="ignore") for raw in f), parser)
+            db.apply_player_events(name, events, None, 0, self._last_ts, done=1)
+            log.info("%s: %s eventos de sessão", name, len(events))
+
+    # --- latest.log ----------------------------------------------------------
+
+    def ingest_latest(self):
+        try:
+            st = os.stat(self.log_path)
+        except FileNotFoundError:
+            return
+        source = f"latest.log@{st.st_ino}"
+        state = db.get_session_checkpoint(source)
+        offset = state[1] if state else 0
+        if state and state[2] is not None:
+            self._last_ts = state[2]
+
+        if self._parser_source != source:
+            self._parser = LineParser(time.localtime(st.st_mtime)[:3])
+            self._parser_source = source
+
+        while True:
+            lines, new_offset, inode, reset = read_since(self.log_path, offset, st.st_ino)
+            if reset or inode != st.st_ino or new_offset == offset:
+                return
+            events = self.parse(lines, self._parser)
+            db.apply_player_events(source, events, inode, new_offset, self._last_ts)
+            offset = new_offset
+
+    def run(self):
+        try:
+            # Depois do primeiro latest.log, os .gz novos são logs já lidos
+            if not db.has_latest_checkpoint():
+                self.backfill()
+        except Exception as e:
+            log.error("Erro ao ler o histórico de sessões: %s", e)
+        while True:
+            try:
+                self.ingest_latest()
+            except Exception as e:
+                log.error("Erro ao registrar sessões: %s", e)
+            try:
+                self._wake.get(timeout=self.rescan_interval)
+                while not self._wake.empty():
+                    self._wake.get_nowait()
+            except queue.Empty:
+                pass
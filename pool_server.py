@@ -0,0 +1,161 @@
+"""Servidor HTTP com pool fixo de workers, keep-alive HTTP/1.1 e backpressure.
+
+Substitui o ``socketserver.TCPServer`` single-threaded: cada conexão aceita vai
+para uma fila limitada e é atendida por um dos ``workers`` threads. Quando a fila
+enche, a conexão nova recebe ``503`` na hora (com ``Retry-After``) em vez de
+ficar esperando atrás de um ping lento ao Minecraft ou de um timeout do bot.
+"""
+import queue
+import socketserver
+import threading
+
+
+_REJECT_BODY = b'{"error": "Servidor ocupado, tente novamente"}'
+REJECT_RESPONSE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: " + str(len(_REJECT_BODY)).encode() + b"\r\n"
+    b"Retry-After: 1\r\n"
+    b"Connection: close\r\n"
+    b"\r\n" + _REJECT_BODY
+)
+
+
+class PooledHTTPServer(socketserver.TCPServer):
+    """TCPServer que despacha conexões para um pool limitado de threads"""
+
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, workers=32, queue_size=128):
+        self.workers = workers
+        self.pending = queue.Queue(maxsize=queue_size)
+        self.request_queue_size = max(queue_size, 5)
+        self.rejected = 0
+        self._detached = set()
+        self._detached_lock = threading.Lock()
+        self._threads = []
+        super().__init__(server_address, handler_class)
+        for i in range(workers):
+            t = threading.Thread(target=self._worker, name=f"http-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def process_request(self, request, client_address):
+        """Chamado pela thread do accept: só enfileira, nunca bloqueia"""
+        try:
+            self.pending.put_nowait((request, client_address))
+        except queue.Full:
+            self.reject_request(request)
+
+    def reject_request(self, request):
+        self.rejected += 1
+        try:
+            request.sendall(REJECT_RESPONSE)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def saturated(self):
+        """True quando há conexões esperando worker livre.
+
+        Os handlers usam isso para encerrar o keep-alive depois da resposta
+        atual e devolver o worker para a fila.
+        """
+        return not self.pending.empty()
+
+    def detach(self, request):
+        """Entrega o socket a outro dono (ex.: hub de SSE).
+
+        O worker termina normalmente, mas não fecha a conexão.
+        """
+        with self._detached_lock:
+            self._detached.add(request)
+
+    def _worker(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                with self._detached_lock:
+                    detached = request in self._detached
+                    self._detached.discard(request)
+                if not detached:
+                    self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        for _ in self._threads:
+            try:
+                self.pending.put_nowait(None)
+            except queue.Full:
+                break
+
+
+class _DeferredBody:
+    """Segura cabeçalhos + corpo até o fim do handler para calcular Content-Length"""
+
+    closed = False
+
+    def __init__(self, handler, raw):
+        self.handler = handler
+        self.raw = raw
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+        return len(data)
+
+    def flush(self):
+        handler = self.handler
+        body = b"".join(self.chunks)
+        headers = handler._deferred_headers
+        headers.insert(-1, f"Content-Length: {len(body)}\r\n".encode("latin-1"))
+        handler.wfile = self.raw
+        self.raw.write(b"".join(headers) + body)
+        self.raw.flush()
+
+
+class KeepAliveMixin:
+    """Keep-alive HTTP/1.1 para handlers que não mandam Content-Length.
+
+    Os handlers do MyHandler escrevem o corpo depois de ``end_headers()`` sem
+    informar o tamanho, o que obrigaria fechar a conexão a cada resposta.
+    Aqui os cabeçalhos ficam retidos até o handler terminar e o Content-Length
+    é preenchido automaticamente.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == "content-length":
+            self._has_length = True
+        super().send_header(keyword, value)
+
+    def send_response(self, code, message=None):
+        self._has_length = False
+        super().send_response(code, message)
+
+    def end_headers(self):
+        server = self.server
+        if hasattr(server, "saturated") and server.saturated():
+            # Backpressure: libera o worker assim que esta resposta terminar
+            self.send_header("Connection", "close")
+            self.close_connection = True
+
+        if (getattr(self, "_has_length", True) or self.close_connection
+                or self.request_version == "HTTP/0.9"):
+            # Corpo delimitado pelo tamanho ou pelo fechamento da conexão
+            super().end_headers()
+            return
+
+        self._headers_buffer.append(b"\r\n")
+        self._deferred_headers = self._headers_buffer
+        self._headers_buffer = []
+        self.wfile = _DeferredBody(self, self.wfile)
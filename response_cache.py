@@ -0,0 +1,66 @@
+"""Respostas JSON já serializadas para os endpoints consultados em polling.
+
+Os dados desses endpoints vêm de caches com versão (snapshot do poller,
+seções do dashboard, cache de membros do discord-bot). ``PreparedCache``
+guarda, por chave, os bytes da última versão junto com o gzip e o ETag;
+enquanto a versão não muda, a requisição só escreve esses bytes (ou
+responde 304 a um ``If-None-Match`` igual), sem ``json.dumps`` nem gzip.
+
+Com o ``orjson`` instalado a serialização usa ele; sem, o ``json`` da
+biblioteca padrão.
+"""
+import gzip
+import hashlib
+import json
+from collections import namedtuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Abaixo disso gzip não compensa
+MIN_COMPRESS_SIZE = 1024
+
+Prepared = namedtuple("Prepared", ["body", "gzip", "etag"])
+
+
+def dumps(data):
+    """JSON em bytes (orjson se disponível)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            # Chaves não-str, inteiros grandes etc.: o json aceita
+            pass
+    return json.dumps(data).encode("utf-8")
+
+
+def prepare(data):
+    """Corpo, gzip (só acima de MIN_COMPRESS_SIZE) e ETag; ``data`` pode já ser bytes"""
+    body = data if isinstance(data, bytes) else dumps(data)
+    compressed = gzip.compress(body, compresslevel=6) if len(body) >= MIN_COMPRESS_SIZE else None
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    return Prepared(body, compressed, etag)
+
+
+class PreparedCache:
+    """Última resposta preparada por chave, refeita só quando a versão muda"""
+
+    def __init__(self):
+        self._entries = {}          # chave -> (versão, Prepared)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version, build):
+        """Prepared de ``build()`` para ``version`` (``build`` só roda em versão nova)"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+        # Duas requisições na troca de versão montam o mesmo resultado: sem lock
+        self.misses += 1
+        prepared = prepare(build())
+        self._entries[key] = (version, prepared)
+        return prepared
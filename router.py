@@ -0,0 +1,209 @@
+"""Roteamento das requisições do MyHandler.
+
+- Rotas sem parâmetro ficam num dict ``(método, caminho)``: uma consulta.
+- Rotas com parâmetro (``/api/player-stats/{name}``) ou com resto do
+  caminho (``/downloads/{path*}``) ficam numa árvore por segmento; a busca
+  custa o número de segmentos do caminho, não o número de rotas.
+- A URL é separada uma vez (``handler.url_path``, ``handler.query``,
+  ``handler.params``); query string não atrapalha o match.
+- Cada rota tem uma cadeia de middlewares ``mw(handler, next)`` montada no
+  registro (nada é criado por requisição).
+"""
+import functools
+import gzip
+from collections import namedtuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from asset_cache import etag_matches
+from response_cache import MIN_COMPRESS_SIZE, dumps
+
+
+Route = namedtuple("Route", ["method", "pattern", "call"])
+
+
+class _Node:
+    __slots__ = ("children", "param", "param_name", "rest", "routes")
+
+    def __init__(self):
+        self.children = {}
+        self.param = None           # nó de {nome}
+        self.param_name = None
+        self.rest = None            # (nome, {método: Route}) de {nome*}
+        self.routes = {}            # método -> Route
+
+
+def _segments(path):
+    return [s for s in path.split("/") if s]
+
+
+def normalize(path):
+    """'/inicio/' -> '/inicio' (a raiz continua '/')"""
+    return path.rstrip("/") or "/"
+
+
+class Router:
+    """Registro de rotas com match exato, parâmetros e middlewares"""
+
+    def __init__(self):
+        self._exact = {}
+        self._root = _Node()
+        self._fallback = {}
+
+    def add(self, method, pattern, endpoint, middleware=()):
+        route = Route(method, pattern, _chain(middleware, endpoint))
+        if "{" not in pattern:
+            self._exact[(method, normalize(pattern))] = route
+            return route
+        node = self._root
+        for segment in _segments(pattern):
+            if segment.startswith("{") and segment.endswith("*}"):
+                if node.rest is None:
+                    node.rest = (segment[1:-2], {})
+                node.rest[1][method] = route
+                return route
+            if segment.startswith("{"):
+                if node.param is None:
+                    node.param = _Node()
+                    node.param_name = segment[1:-1]
+                node = node.param
+            else:
+                node = node.children.setdefault(segment, _Node())
+        node.routes[method] = route
+        return route
+
+    def get(self, pattern, endpoint, middleware=()):
+        return self.add("GET", pattern, endpoint, middleware)
+
+    def post(self, pattern, endpoint, middleware=()):
+        return self.add("POST", pattern, endpoint, middleware)
+
+    def fallback(self, method, endpoint, middleware=()):
+        """Chamado quando nenhuma rota casa (estáticos, 404)"""
+        self._fallback[method] = Route(method, None, _chain(middleware, endpoint))
+
+    def match(self, method, path):
+        """(Route, params) ou (None, {})"""
+        route = self._exact.get((method, normalize(path)))
+        if route is not None:
+            return route, {}
+
+        # Segmento fixo tem prioridade sobre {nome}; sem backtracking
+        params = {}
+        rest = None
+        node = self._root
+        segments = _segments(path)
+        for i, segment in enumerate(segments):
+            if node.rest is not None and method in node.rest[1]:
+                rest = (node.rest, i, dict(params))
+            child = node.children.get(segment)
+            if child is None and node.param is not None:
+                params[node.param_name] = unquote(segment)
+                child = node.param
+            if child is None:
+                node = None
+                break
+            node = child
+        if node is not None and method in node.routes:
+            return node.routes[method], params
+        if rest is not None:
+            (name, routes), i, params = rest
+            params[name] = unquote("/".join(segments[i:]))
+            return routes[method], params
+        return None, {}
+
+    def dispatch(self, handler):
+        """Separa a URL, acha a rota e roda a cadeia; True se algo tratou"""
+        parts = urlsplit(handler.path)
+        handler.url_path = parts.path
+        handler.query = parse_qs(parts.query)
+        handler.cors_origin = None
+        handler.compress = False
+        route, params = self.match(handler.command, parts.path)
+        if route is None:
+            route = self._fallback.get(handler.command)
+            if route is None:
+                return False
+        handler.route = route
+        handler.params = params
+        route.call(handler)
+        return True
+
+
+def _chain(middleware, endpoint):
+    call = endpoint
+    for mw in reversed(tuple(middleware)):
+        call = functools.partial(mw, next=call)
+    return call
+
+
+# --- middlewares genéricos ---------------------------------------------------
+
+def cors(handler, next):
+    """Access-Control-Allow-Origin: * em todas as respostas da rota"""
+    handler.cors_origin = "*"
+    return next(handler)
+
+
+def compress(handler, next):
+    """Permite gzip no send_json/send_prepared se o cliente aceitar"""
+    handler.compress = "gzip" in handler.headers.get("Accept-Encoding", "")
+    return next(handler)
+
+
+class RoutedMixin:
+    """``send_json``/``send_prepared`` e o cabeçalho de CORS dos middlewares"""
+
+    cors_origin = None
+    compress = False
+
+    def end_headers(self):
+        if self.cors_origin:
+            self.send_header("Access-Control-Allow-Origin", self.cors_origin)
+            # Vale só para esta resposta (OPTIONS/HEAD não passam pelo router)
+            self.cors_origin = None
+        super().end_headers()
+
+    def send_json(self, data, status=200, headers=()):
+        """Responde ``data`` (objeto, ou JSON já serializado em str/bytes)"""
+        if isinstance(data, str):
+            body = data.encode("utf-8")
+        elif isinstance(data, bytes):
+            body = data
+        else:
+            body = dumps(data)
+        self.send_response(status)
+        self.send_header("Content-type", "application/json")
+        for name, value in headers:
+            self.send_header(name, value)
+        if self.compress and len(body) >= MIN_COMPRESS_SIZE:
+            body = gzip.compress(body, compresslevel=5)
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_prepared(self, prepared, status=200, headers=()):
+        """Escreve um ``response_cache.Prepared``; If-None-Match igual vira 304"""
+        if_none_match = self.headers.get("If-None-Match")
+        if status == 200 and if_none_match and etag_matches(prepared.etag, if_none_match):
+            self.send_response(304)
+            self.send_header("ETag", prepared.etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = prepared.body
+        self.send_response(status)
+        self.send_header("Content-type", "application/json")
+        self.send_header("ETag", prepared.etag)
+        self.send_header("Cache-Control", "no-cache")
+        for name, value in headers:
+            self.send_header(name, value)
+        if prepared.gzip is not None:
+            self.send_header("Vary", "Accept-Encoding")
+            if self.compress:
+                body = prepared.gzip
+                self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
@@ -387,12 +387,10 @@ app.post("/auth/request", async (req, res) => {
   }
 });
 
-// Rota para verificar status de autenticação
-app.get("/auth/check/:token", (req, res) => {
-  const { token } = req.params;
-  
+// Status de um token de autenticação pendente
+function authStatus(token) {
   if (!pendingAuth[token]) {
-    return res.json({ verified: false, expired: true });
+    return { verified: false, expired: true };
   }
   
   const auth = pendingAuth[token];
@@ -400,14 +398,30 @@ app.get("/auth/check/:token", (req, res) => {
   // Verificar se expirou (5 minutos)
   if (Date.now() - auth.timestamp > 5 * 60 * 1000) {
     delete pendingAuth[token];
-    return res.json({ verified: false, expired: true });
+    return { verified: false, expired: true };
   }
   
-  res.json({ 
+  return {
     verified: auth.verified,
     expired: false,
     userName: auth.userName
-  });
+  };
+}
+
+// Rota para verificar status de autenticação
+app.get("/auth/check/:token", (req, res) => {
+  res.json(authStatus(req.params.token));
+});
+
+// Verificação em lote: o site consulta todos os logins pendentes numa
+// requisição só ({ tokens: [...] } -> { results: { token: status } })
+app.post("/auth/check", (req, res) => {
+  const tokens = Array.isArray(req.body?.tokens) ? req.body.tokens.slice(0, 500) : [];
+  const results = {};
+  for (const token of tokens) {
+    results[token] = authStatus(String(token));
+  }
+  res.json({ results });
 });
 
 app.listen(PORT, () => console.log("API Discord rodando na porta", PORT));
@@ -1,21 +1,113 @@
 import http.server
-import socketserver
+import ipaddress
+import logging
 import os
 import json
 import uuid
 import cgi
-import sqlite3
 import time
-from pathlib import Path
-from mcstatus import JavaServer
-import psutil
+import threading
 from http.cookies import SimpleCookie
+from urllib.parse import unquote
+from pool_server import PooledHTTPServer, KeepAliveMixin
+from mc_status import StatusPoller, snapshot_to_dict
+from session_cache import SessionCache
+from log_tail import tail_lines, read_since
+from event_hub import EventStreamHub
+from log_watch import LogWatcher, parse_cursor
+from log_index import LogIndex, LogIndexer, parse_time
+from stats_repo import StatsRepository
+from player_registry import PlayerRegistry
+from stats_history import StatsHistory, StatsSampler, METRICS, parse_range as parse_history_range
+from discord_client import DiscordClient
+from auth_waiter import AuthWaiter
+from asset_cache import AssetCache, choose_encoding, etag_matches, not_modified
+from file_sender import RangeNotSatisfiable, guess_type, parse_range, resolve_path, send_file
+from image_variants import ImagePipeline, SOURCE_EXTENSIONS
+from dashboard import Dashboard
+from instrumentation import REGISTRY, InstrumentedMixin, timing
+from system_metrics import MetricsSampler, parse_window, sample_to_dict
+from server_health import HealthCollector
+from player_sessions import SessionTracker
+from live_push import LivePublisher, TOPICS as LIVE_TOPICS
+from router import Router, RoutedMixin, compress, cors
+from response_cache import PreparedCache
+import app_logging
+import db
 
 PORT = 3010
+# Pool de atendimento: número de workers, tamanho da fila de conexões
+# pendentes (acima disso responde 503) e tempo ocioso do keep-alive
+HTTP_WORKERS = int(os.environ.get("HTTP_WORKERS", "32"))
+HTTP_QUEUE_SIZE = int(os.environ.get("HTTP_QUEUE_SIZE", "128"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.environ.get("HTTP_KEEPALIVE_TIMEOUT", "15"))
 DIRECTORY = "html"
 IMAGES_DIR = "html/imagens"
+# Processos que geram as variantes WebP/AVIF das imagens (em html/image_cache)
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", "2"))
+# Servidor Minecraft consultado pelo poller de status (um ping por intervalo)
+MINECRAFT_HOST = "10.150.135.158"
+MINECRAFT_PORT = 25565
+STATUS_POLL_INTERVAL = float(os.environ.get("STATUS_POLL_INTERVAL", "5"))
 # Caminho do log do servidor Minecraft (dentro do container Docker)
 MINECRAFT_LOG_PATH = "/minecraft-logs/latest.log"
+# Linhas devolvidas por /api/logs quando não há cursor (?since=)
+LOG_TAIL_LINES = 500
+# usercache.json do servidor (nomes dos jogadores) e intervalo de releitura
+# do diretório de stats
+USERCACHE_PATH = os.environ.get("USERCACHE_PATH", "/minecraft-usercache.json")
+PLAYER_REFRESH_INTERVAL = float(os.environ.get("PLAYER_REFRESH_INTERVAL", "30"))
+# Serviço discord-bot (server.js) e validade do cache da lista de membros
+DISCORD_BOT_URL = os.environ.get("DISCORD_BOT_URL", "http://discord-bot:3011")
+DISCORD_MEMBERS_TTL = float(os.environ.get("DISCORD_MEMBERS_TTL", "60"))
+# Long-poll do login: espera máxima por requisição e intervalo da consulta
+# única (em lote) ao discord-bot enquanto há logins esperando
+AUTH_LONGPOLL_TIMEOUT = float(os.environ.get("AUTH_LONGPOLL_TIMEOUT", "25"))
+AUTH_POLL_INTERVAL = float(os.environ.get("AUTH_POLL_INTERVAL", "1"))
+# Transferências acima de LARGE_FILE_SIZE (downloads de modpack etc.) prendem
+# um worker por muito tempo: no máximo DOWNLOAD_MAX_CONCURRENT ao mesmo tempo
+LARGE_FILE_SIZE = 1024 * 1024
+DOWNLOAD_MAX_CONCURRENT = int(os.environ.get("DOWNLOAD_MAX_CONCURRENT", "8"))
+# Recarrega páginas/estáticos editados em html/ sem reiniciar (0 desliga)
+ASSET_WATCH = os.environ.get("ASSET_WATCH", "1") != "0"
+# Histórico de stats: intervalo de amostragem (s) e dias de amostras brutas
+STATS_SAMPLE_INTERVAL = float(os.environ.get("STATS_SAMPLE_INTERVAL", "300"))
+STATS_RAW_DAYS = int(os.environ.get("STATS_RAW_DAYS", "7"))
+# Amostragem do host (CPU, RAM, disco, rede, processo Java): intervalo e
+# quantos segundos ficam no buffer para ?window=
+METRICS_INTERVAL = float(os.environ.get("METRICS_INTERVAL", "2"))
+METRICS_HISTORY = int(os.environ.get("METRICS_HISTORY", "3600"))
+JAVA_PROCESS_NAME = os.environ.get("JAVA_PROCESS_NAME", "java")
+# Janela padrão do /api/server-health e quanto tempo de status fica guardado
+SERVER_HEALTH_WINDOW = os.environ.get("SERVER_HEALTH_WINDOW", "15m")
+SERVER_HEALTH_HISTORY = int(os.environ.get("SERVER_HEALTH_HISTORY", "3600"))
+# Intervalo (s) em que as mudanças do dashboard são juntadas e enviadas por
+# /api/live
+LIVE_PUSH_INTERVAL = float(os.environ.get("LIVE_PUSH_INTERVAL", "1"))
+# Manutenção do images.db: varredura das sessões expiradas (intervalo em s e
+# linhas por lote) e PRAGMA optimize + incremental_vacuum
+SESSION_SWEEP_INTERVAL = float(os.environ.get("SESSION_SWEEP_INTERVAL", "300"))
+SESSION_SWEEP_BATCH = int(os.environ.get("SESSION_SWEEP_BATCH", "500"))
+DB_OPTIMIZE_INTERVAL = float(os.environ.get("DB_OPTIMIZE_INTERVAL", "21600"))
+# /metrics exige sessão, exceto para clientes nessas redes (ex.: o Prometheus
+# na rede do compose). Não inclua a rede do bridge se a porta for publicada:
+# o docker-proxy faz conexões externas chegarem com o IP do gateway
+METRICS_ALLOW = os.environ.get("METRICS_ALLOW", "127.0.0.0/8,::1/128")
+# Logging: em produção só INFO e acima, no máximo LOG_RATE_LIMIT linhas/s por
+# categoria abaixo de WARNING (0 desliga); LOG_MODE=debug liga o passo a passo
+# de cada requisição. LOG_SAMPLE="http=100" guarda 1 a cada N por categoria
+LOG_MODE = os.environ.get("LOG_MODE", "production")
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "DEBUG" if LOG_MODE == "debug" else "INFO").upper()
+LOG_RATE_LIMIT = float(os.environ.get("LOG_RATE_LIMIT", "20" if LOG_MODE == "production" else "0"))
+LOG_SAMPLE = os.environ.get("LOG_SAMPLE", "")
+
+app_logging.configure(LOG_LEVEL, LOG_RATE_LIMIT, sample=app_logging.parse_sample(LOG_SAMPLE))
+log = app_logging.get_logger("server")
+http_log = app_logging.get_logger("http")
+auth_log = app_logging.get_logger("auth")
+session_log = app_logging.get_logger("session")
+players_log = app_logging.get_logger("players")
+logs_log = app_logging.get_logger("logs")
 
 # NOTA: Sistema de sessões agora usa SQLite (tabela user_sessions)
 # Não é mais armazenado em memória
@@ -26,248 +118,250 @@ os.makedirs(IMAGES_DIR, exist_ok=True)
 # Mudar para o diretório HTML
 os.chdir(DIRECTORY)
 
-# Agora o banco fica dentro de html/
-DB_FILE = "images.db"
-
-# Inicializar banco de dados
-def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS image_captions (
-            filename TEXT PRIMARY KEY,
-            caption TEXT
-        )
-    ''')
-    # Tabela para avisos dispensados pelos usuários
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS dismissed_notices (
-            user_id TEXT,
-            notice_id TEXT,
-            dismissed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            PRIMARY KEY (user_id, notice_id)
-        )
-    ''')
-    # Tabela para sessões de autenticação
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_sessions (
-            session_id TEXT PRIMARY KEY,
-            user_id TEXT NOT NULL,
-            user_name TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            last_access TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            expires_at TIMESTAMP NOT NULL
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
-init_db()
-
-class MyHandler(http.server.SimpleHTTPRequestHandler):
+# Inicializar banco de dados (html/images.db, ver db.py)
+db.init_db()
+
+status_poller = StatusPoller(MINECRAFT_HOST, MINECRAFT_PORT, interval=STATUS_POLL_INTERVAL)
+session_cache = SessionCache(sweep_interval=SESSION_SWEEP_INTERVAL, sweep_batch=SESSION_SWEEP_BATCH,
+                             optimize_interval=DB_OPTIMIZE_INTERVAL)
+# Conexões SSE ficam no hub (uma thread), não nos workers do pool
+event_hub = EventStreamHub()
+log_watcher = LogWatcher(MINECRAFT_LOG_PATH, event_hub, tail=LOG_TAIL_LINES)
+# Índice de busca dos logs (html/logs.db), alimentado em background
+log_index = LogIndex()
+log_index.init()
+log_indexer = LogIndexer(MINECRAFT_LOG_PATH, log_index)
+log_watcher.add_listener(log_indexer.notify)
+# Sessões de jogo (joined/left the game) -> player_sessions/player_last_seen
+session_tracker = SessionTracker(MINECRAFT_LOG_PATH)
+log_watcher.add_listener(session_tracker.notify)
+download_slots = threading.BoundedSemaphore(DOWNLOAD_MAX_CONCURRENT)
+# Pool de processos das variantes de imagem: criado aqui, antes de qualquer
+# thread do servidor existir (usa fork)
+image_pipeline = ImagePipeline("imagens", "image_cache", workers=IMAGE_WORKERS)
+image_pipeline.start_pool()
+# Thread de escrita dos logs só depois do fork do pool
+app_logging.start()
+# Páginas e estáticos da raiz de html/ em memória (com gzip/brotli)
+asset_cache = AssetCache()
+asset_cache.preload()
+stats_repo = StatsRepository()
+# Jogadores descobertos em /minecraft-stats + usercache.json
+player_registry = PlayerRegistry(stats_repo, USERCACHE_PATH, interval=PLAYER_REFRESH_INTERVAL)
+player_registry.refresh()
+# Séries temporais dos contadores (html/stats_history.db)
+stats_history = StatsHistory(raw_days=STATS_RAW_DAYS)
+stats_history.init()
+discord_client = DiscordClient(DISCORD_BOT_URL, ttl=DISCORD_MEMBERS_TTL)
+auth_waiter = AuthWaiter(discord_client, interval=AUTH_POLL_INTERVAL)
+# Métricas do host amostradas em background (buffer circular)
+metrics_sampler = MetricsSampler(METRICS_INTERVAL, METRICS_HISTORY, java_name=JAVA_PROCESS_NAME)
+metrics_sampler.sample_once()
+# TPS/MSPT (avisos de lag do log) e série de jogadores/latência do poller
+health_collector = HealthCollector(status_poller, history=SERVER_HEALTH_HISTORY,
+                                   interval=STATUS_POLL_INTERVAL)
+stats_sampler = StatsSampler(player_registry, stats_repo, stats_history, interval=STATS_SAMPLE_INTERVAL)
+
+def build_top_players():
+    """Top players dos arquivos de stats do Minecraft + last_seen do SQLite"""
+    from datetime import datetime, timedelta
+    
+    # Jogadores online agora (snapshot do poller de status)
+    online_players = status_poller.snapshot().players_list
+    
+    # Buscar last_seen do SQLite
+    last_seen_data = {}
+    try:
+        last_seen_data = db.get_last_seen()
+    except Exception as e:
+        players_log.error("Erro ao buscar last_seen do SQLite: %s", e)
+    
+    players = []
+    
+    # Ranking já ordenado pelo registro de jogadores (refeito só
+    # quando algum arquivo de stats muda)
+    for entry in player_registry.leaderboard():
+        name = entry.name
+        try:
+            # Tempo jogado em ticks (20 ticks = 1 segundo)
+            play_time_ticks = entry.play_time_ticks
+            total_seconds = play_time_ticks // 20
+            hours = total_seconds // 3600
+            minutes = (total_seconds % 3600) // 60
+            
+            # Verificar se está online
+            is_online = name in online_players
+            
+            # Buscar last_seen do SQLite
+            last_seen_str = "Desconhecido"
+            last_seen_full = None  # Data completa para tooltip
+            if is_online:
+                last_seen_str = "Agora"
+                last_seen_full = datetime.now().strftime("%d/%m/%Y %H:%M")
+            elif name in last_seen_data and last_seen_data[name]:
+                try:
+                    last_seen = last_seen_data[name]
+                    last_seen_dt = datetime.fromisoformat(last_seen.replace('Z', '+00:00'))
+                    last_seen_full = last_seen_dt.strftime("%d/%m/%Y %H:%M")
+                    now = datetime.now(last_seen_dt.tzinfo) if last_seen_dt.tzinfo else datetime.now()
+                    time_diff = now - last_seen_dt
+                    
+                    if time_diff < timedelta(hours=1):
+                        mins = int(time_diff.total_seconds() / 60)
+                        last_seen_str = f"Há {mins} min"
+                    elif time_diff < timedelta(days=1):
+                        hrs = int(time_diff.total_seconds() / 3600)
+                        last_seen_str = f"Há {hrs}h"
+                    elif time_diff < timedelta(days=2):
+                        last_seen_str = "Ontem"
+                    else:
+                        last_seen_str = last_seen_dt.strftime("%d/%m/%Y")
+                except:
+                    last_seen_str = "Desconhecido"
+            
+            # Calcular barra de progresso (baseado no total de horas, max 500h = 100%)
+            progress = min(100, (hours / 500) * 100)
+            
+            players.append({
+                "name": name,
+                "playtime": f"{hours}h {minutes}m",
+                "playtime_seconds": total_seconds,
+                "last_seen": last_seen_str,
+                "last_seen_full": last_seen_full,
+                "is_online": is_online,
+                "progress": round(progress, 1)
+            })
+            
+        except Exception as e:
+            players_log.error("Erro ao ler stats de %s: %s", name, e)
+    
+    # Adicionar rank (ranking já vem ordenado por tempo jogado)
+    for idx, player in enumerate(players, 1):
+        player['rank'] = idx
+    
+    # Contar quantos estão online
+    online_count = sum(1 for p in players if p["is_online"])
+    
+    response_data = {
+        "success": True,
+        "players": players,
+        "online_count": online_count,
+        "total_players": len(players)
+    }
+    return response_data
+
+
+def build_discord_members():
+    """Lista de membros do cache do discord-bot (mesmo formato do /members)"""
+    try:
+        data, _ = discord_client.members()
+    except Exception as e:
+        return {"error": str(e), "members": []}
+    return json.loads(data.decode("utf-8"))
+
+
+def _status_key(data):
+    # fetched_at muda a cada ping: não conta como mudança da seção
+    return {k: v for k, v in data.items() if k != "fetched_at"}
+
+
+# /api/dashboard: cada seção remontada no máximo a cada max_age segundos
+dashboard = Dashboard()
+dashboard.add("status", lambda: snapshot_to_dict(status_poller.snapshot()), 1, key=_status_key)
+dashboard.add("metrics", lambda: sample_to_dict(metrics_sampler.latest()), METRICS_INTERVAL)
+dashboard.add("top_players", build_top_players, 15)
+dashboard.add("discord", build_discord_members, 5)
+# Respostas já serializadas dos endpoints de polling, por versão da fonte
+responses = PreparedCache()
+# Diferenças das seções empurradas por SSE (/api/live)
+live_publisher = LivePublisher(dashboard, event_hub, interval=LIVE_PUSH_INTERVAL)
+
+def cache_metrics():
+    """Contadores de hit/miss dos caches já existentes, lidos no scrape"""
+    caches = {
+        "stats_repo": (stats_repo.hits, stats_repo.misses),
+        "sessions": (session_cache.hits, session_cache.misses),
+        "discord_members": (discord_client.hits, discord_client.misses),
+        "assets": (asset_cache.hits, asset_cache.misses),
+        "responses": (responses.hits, responses.misses),
+    }
+    yield ("cache_hits_total", "counter", "Acertos por cache",
+           [({"cache": name}, hits) for name, (hits, _) in caches.items()])
+    yield ("cache_misses_total", "counter", "Faltas por cache",
+           [({"cache": name}, misses) for name, (_, misses) in caches.items()])
+    yield ("cache_hit_ratio", "gauge", "Acertos / (acertos + faltas) desde o início",
+           [({"cache": name}, round(hits / (hits + misses), 4) if hits + misses else 0.0)
+            for name, (hits, misses) in caches.items()])
+    yield ("sse_clients", "gauge", "Conexões SSE abertas (logs e /api/live)",
+           [({}, event_hub.client_count())])
+    yield ("discord_upstream_requests_total", "counter", "Chamadas feitas ao discord-bot",
+           [({}, discord_client.upstream_requests)])
+    yield ("discord_circuit_open", "gauge", "1 se o circuito do discord-bot está aberto",
+           [({}, int(discord_client.breaker.is_open()))])
+    yield ("mcstatus_failures_total", "counter", "Pings ao servidor Minecraft que falharam",
+           [({}, status_poller.failures)])
+
+
+REGISTRY.add_collector(cache_metrics)
+
+class MyHandler(InstrumentedMixin, RoutedMixin, KeepAliveMixin, http.server.SimpleHTTPRequestHandler):
+
+    # Fecha conexões keep-alive ociosas para não prender workers
+    timeout = HTTP_KEEPALIVE_TIMEOUT
 
     def check_auth(self):
         """Verifica se o usuário está autenticado via cookie e banco de dados"""
         cookie_header = self.headers.get('Cookie', '')
-        print(f"[AUTH] Verificando autenticação... Cookie: {cookie_header}")
         
         cookie = SimpleCookie(cookie_header)
         if 'session_id' in cookie:
             session_id = cookie['session_id'].value
-            print(f"[AUTH] Session ID encontrado: {session_id}")
             
             try:
-                conn = sqlite3.connect(DB_FILE)
-                cursor = conn.cursor()
-                
-                # Buscar sessão no banco de dados
-                cursor.execute('''
-                    SELECT user_id, user_name, expires_at 
-                    FROM user_sessions 
-                    WHERE session_id = ?
-                ''', (session_id,))
-                
-                result = cursor.fetchone()
+                # Cache de sessões: banco só no miss; expiração e last_access
+                # são tratados pelo cache
+                result = session_cache.get(session_id)
                 
                 if result:
-                    user_id, user_name, expires_at = result
-                    
-                    # Verificar se a sessão expirou
-                    expires_timestamp = time.mktime(time.strptime(expires_at, '%Y-%m-%d %H:%M:%S'))
-                    
-                    if time.time() < expires_timestamp:
-                        # Atualizar last_access
-                        cursor.execute('''
-                            UPDATE user_sessions 
-                            SET last_access = CURRENT_TIMESTAMP 
-                            WHERE session_id = ?
-                        ''', (session_id,))
-                        conn.commit()
-                        
-                        print(f"[AUTH] ✅ Sessão válida para: {user_name}")
-                        conn.close()
-                        return True
-                    else:
-                        print(f"[AUTH] ❌ Sessão expirada")
-                        # Remover sessão expirada
-                        cursor.execute('DELETE FROM user_sessions WHERE session_id = ?', (session_id,))
-                        conn.commit()
+                    user_id, user_name = result
+                    auth_log.debug("✅ Sessão válida para: %s", user_name)
+                    return True
                 else:
-                    print(f"[AUTH] ❌ Session ID não encontrado no banco")
-                
-                conn.close()
+                    auth_log.debug("❌ Sessão não encontrada ou expirada")
             except Exception as e:
-                print(f"[AUTH] ❌ Erro ao verificar sessão: {e}")
+                auth_log.error("❌ Erro ao verificar sessão: %s", e)
         else:
-            print(f"[AUTH] ❌ Nenhum session_id no cookie")
+            auth_log.debug("❌ Nenhum session_id no cookie")
         
         return False
 
-    def do_GET(self):
-        print(f"[GET] Requisição recebida: {self.path}")
-
-        # --- NOVA ROTA /inicio ---
-        if self.path == '/inicio' or self.path == '/inicio/':
-            # 1. Verifica se está autenticado
-            if not self.check_auth():
-                print("[AUTH] Acesso negado a /inicio. Redirecionando para /")
-                # 2. Se NÃO estiver autenticado, faz o redirect (302) para a raiz
-                self.send_response(302)
-                self.send_header('Location', '/')
-                self.end_headers()
-                return
-            
-            # 3. Se estiver autenticado, carrega o index.html
-            self.handle_inicio()
-            return
-        # -------------------------
-
-        if self.path == '/api/status':
-            self.handle_status()
-            return
+    def current_session(self):
+        """(session_id, user_id, user_name) da sessão do cookie, ou None"""
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        if 'session_id' not in cookie:
+            return None
+        session_id = cookie['session_id'].value
+        result = session_cache.get(session_id)
+        if not result:
+            return None
+        return (session_id,) + tuple(result)
 
-        if self.path == '/api/system-metrics':
-            self.handle_system_metrics()
-            return
+    def log_message(self, format, *args):
+        # Linha de acesso do http.server (stderr síncrono) vira DEBUG
+        http_log.debug("%s - %s", self.address_string(), format % args)
 
-        if self.path == '/api/logs':
-            self.handle_logs()
-            return
-        
-        if self.path == '/api/check-auth':
-            print("[GET] Chamando handle_check_auth")
-            self.handle_check_auth()
-            return
-        
-        if self.path == '/api/user-info':
-            print("[GET] Chamando handle_user_info")
-            self.handle_user_info()
-            return
-        
-        if self.path == '/api/discord/members':
-            print("[GET] Chamando handle_discord_members")
-            self.handle_discord_members()
-            return
-        
-        if self.path.startswith('/api/notices/dismissed/'):
-            self.handle_get_dismissed_notices()
-            return
-        
-        if self.path == '/api/top-players':
-            self.handle_top_players()
-            return
-        
-        if self.path.startswith('/api/player-stats/'):
-            self.handle_player_stats()
-            return
+    def log_error(self, format, *args):
+        http_log.info("%s - %s", self.address_string(), format % args)
 
-        if self.path == '/teste' or self.path == '/teste/':
-            # Página de teste protegida
-            if not self.check_auth():
-                self.redirect_to_login()
-                return
-            self.handle_teste()
-            return
-
-        if self.path == '/login' or self.path == '/login/':
-            # Login page - accessible to everyone
-            # If already authenticated, redirect to home
-            if self.check_auth():
-                self.redirect_to_home()
-                return
-            self.handle_login_page()
-            return
-
-        if self.path == '/':
-            # Serve the mine page as the new root (COM autenticação)
-            if not self.check_auth():
-                # Redirect to login page
-                self.redirect_to_login()
-                return
-            self.handle_mine()
-            return
-
-        # Removed legacy /desativado route (index.html deprecated)
-
-        if self.path == '/mine' or self.path == '/mine/':
-            # Keep /mine working as before (also serves the mine.html page)
-            self.handle_mine()
-            return
-
-        if self.path == '/perfil' or self.path == '/perfil/':
-            # Profile page - requires authentication
-            if not self.check_auth():
-                self.redirect_to_login()
-                return
-            self.handle_perfil()
-            return
+    def do_GET(self):
+        http_log.debug("Requisição recebida: %s", self.path)
+        router.dispatch(self)
 
-        # If it's an API route that wasn't handled, return 404 JSON
-        if self.path.startswith('/api/'):
-            self.send_response(404)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            response = json.dumps({"error": "API endpoint not found"})
-            self.wfile.write(response.encode("utf-8"))
-            return
-        
-        # Only allow super().do_GET() for specific paths (static files, images, etc.)
-        # This prevents unwanted directory listings or file downloads
-        allowed_paths = ['/imagens/', '/downloads/', '.css', '.js', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.woff', '.woff2', '.ttf']
-        if any(allowed in self.path for allowed in allowed_paths):
-            return super().do_GET()
-        
-        # If path not handled, serve mine.html as default
-        self.handle_mine()
-        return
-    
     def do_POST(self):
-        
-        if self.path == '/api/create-session':
-            self.handle_create_session()
-            return
-        
-        if self.path == '/api/discord/request-auth':
-            self.handle_request_auth()
-            return
-        
-        if self.path == '/api/discord/verify-auth':
-            self.handle_verify_auth()
-            return
-        
-        if self.path == '/api/logout':
-            self.handle_logout()
-            return
-        
-        if self.path == '/api/notices/dismiss':
-            self.handle_dismiss_notice()
-            return
-        
-        self.send_error(404)
-    
+        router.dispatch(self)
+
     def do_DELETE(self):
-        self.send_error(404)
+        router.dispatch(self)
     
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
@@ -278,205 +372,88 @@ class MyHandler(http.server.SimpleHTTPRequestHandler):
         self.end_headers()
 
     def handle_system_metrics(self):
+        """Última amostra do sampler; ?window=10m&points=60 junta a série recente"""
         try:
-            # Obter uso de CPU e RAM
-            cpu_percent = psutil.cpu_percent(interval=0.1)
-            memory = psutil.virtual_memory()
-            
-            data = {
-                "cpu_percent": round(cpu_percent, 1),
-                "ram_percent": round(memory.percent, 1),
-                "ram_used_gb": round(memory.used / (1024**3), 2),
-                "ram_total_gb": round(memory.total / (1024**3), 2)
-            }
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(data).encode())
+            data = sample_to_dict(metrics_sampler.latest())
+            query = self.query
+            if 'window' in query:
+                seconds = parse_window(query['window'][0], METRICS_HISTORY)
+                points = int(query.get('points', ['60'])[0])
+                if not 1 <= points <= 1000:
+                    raise ValueError("points deve estar entre 1 e 1000")
+                data["window"] = seconds
+                data["series"] = metrics_sampler.window(seconds, points)
+            
+            self.send_json(data)
+        except ValueError as e:
+            self.send_json({"error": str(e)}, 400)
         except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            error_data = {"error": str(e)}
-            self.wfile.write(json.dumps(error_data).encode())
-
-    def handle_status(self):
-        try:
-            server = JavaServer("10.150.135.158", 25565)
-            status = server.status()
-
-            # Extrair nomes dos jogadores se disponível
-            players_list = []
-            if status.players.sample:
-                players_list = [player.name for player in status.players.sample]
-
-            data = {
-                "version": status.version.name,
-                "protocol": status.version.protocol,
-                "motd": str(status.description),
-                "players_online": status.players.online,
-                "players_max": status.players.max,
-                "ping": status.latency,
-                "players_list": players_list
-            }
-
-        except Exception as e:
-            data = {"error": str(e)}
-
-        data_json = json.dumps(data)
+            self.send_json({"error": str(e)}, 500)
 
+    def handle_metrics(self):
+        """Métricas no formato de texto do Prometheus"""
+        body = REGISTRY.render().encode("utf-8")
         self.send_response(200)
-        self.send_header("Content-type", "application/json")
+        self.send_header("Content-type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
         self.end_headers()
-        self.wfile.write(data_json.encode("utf-8"))
+        self.wfile.write(body)
 
-    def handle_top_players(self):
-        """Busca os top players dos arquivos de stats do Minecraft + last_seen do SQLite"""
+    def handle_status(self):
+        # Lê o snapshot publicado pelo poller, sem ping por requisição;
+        # serializado uma vez por snapshot
+        snap = status_poller.snapshot()
+        self.send_prepared(responses.get("status", snap.seq, lambda: snapshot_to_dict(snap)))
+
+    def handle_server_health(self):
+        """TPS/MSPT estimados, lag e latência: /api/server-health?window=15m"""
         try:
-            from datetime import datetime, timedelta
-            import os
-            
-            # Mapear jogadores para UUIDs
-            player_uuids = {
-                'abcdan': 'c5839188-0e7d-4c3b-bcf0-0a61cf92c25e',
-                'AllaNaroK': '9e219595-539e-4d84-85bf-42000a35d506',
-                'HermeticPrince': 'c1bc4cb2-ab4e-402f-9da1-920de3163510',
-                'BITalucard': '05b846ad-f1ad-40a0-bd0f-252073db78ca'
-            }
+            query = self.query
+            window = parse_window(query.get('window', [SERVER_HEALTH_WINDOW])[0], SERVER_HEALTH_HISTORY)
             
-            # Buscar jogadores online agora
-            try:
-                server = JavaServer("10.150.135.158", 25565)
-                status = server.status()
-                online_players = []
-                if status.players.sample:
-                    online_players = [player.name for player in status.players.sample]
-            except:
-                online_players = []
+            data = health_collector.report(window)
+            data["jvm"] = sample_to_dict(metrics_sampler.latest())["java"]
             
-            # Buscar last_seen do SQLite
-            last_seen_data = {}
-            try:
-                conn = sqlite3.connect(DB_FILE)
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT player_name, MAX(leave_time) as last_seen
-                    FROM player_sessions
-                    WHERE player_name IS NOT NULL
-                    GROUP BY player_name
-                ''')
-                for row in cursor.fetchall():
-                    last_seen_data[row[0]] = row[1]
-                conn.close()
-            except Exception as e:
-                print(f"Erro ao buscar last_seen do SQLite: {e}")
+            self.send_json(data)
             
-            players = []
+        except ValueError as e:
+            self.send_json({"error": str(e)}, 400)
+        except Exception as e:
+            log.error("Erro ao montar a saúde do servidor: %s", e)
+            self.send_json({"error": str(e)}, 500)
+
+    def handle_dashboard(self):
+        """Seções do dashboard que mudaram: /api/dashboard?epoch=&status=&metrics=..."""
+        try:
+            query = self.query
+            since = {}
+            for name in dashboard.sections:
+                if name in query:
+                    since[name] = int(query[name][0])
+            epoch = int(query['epoch'][0]) if 'epoch' in query else None
             
-            for name, uuid in player_uuids.items():
-                stats_path = f"/minecraft-stats/{uuid}.json"
-                
-                try:
-                    # Ler arquivo de stats
-                    with open(stats_path, 'r') as f:
-                        stats_data = json.load(f)
-                    
-                    stats = stats_data.get('stats', {})
-                    custom = stats.get('minecraft:custom', {})
-                    
-                    # Tempo jogado em ticks (20 ticks = 1 segundo)
-                    play_time_ticks = custom.get('minecraft:play_time', 0)
-                    total_seconds = play_time_ticks // 20
-                    hours = total_seconds // 3600
-                    minutes = (total_seconds % 3600) // 60
-                    
-                    # Verificar se está online
-                    is_online = name in online_players
-                    
-                    # Buscar last_seen do SQLite
-                    last_seen_str = "Desconhecido"
-                    last_seen_full = None  # Data completa para tooltip
-                    if is_online:
-                        last_seen_str = "Agora"
-                        last_seen_full = datetime.now().strftime("%d/%m/%Y %H:%M")
-                    elif name in last_seen_data and last_seen_data[name]:
-                        try:
-                            last_seen = last_seen_data[name]
-                            last_seen_dt = datetime.fromisoformat(last_seen.replace('Z', '+00:00'))
-                            last_seen_full = last_seen_dt.strftime("%d/%m/%Y %H:%M")
-                            now = datetime.now(last_seen_dt.tzinfo) if last_seen_dt.tzinfo else datetime.now()
-                            time_diff = now - last_seen_dt
-                            
-                            if time_diff < timedelta(hours=1):
-                                mins = int(time_diff.total_seconds() / 60)
-                                last_seen_str = f"Há {mins} min"
-                            elif time_diff < timedelta(days=1):
-                                hrs = int(time_diff.total_seconds() / 3600)
-                                last_seen_str = f"Há {hrs}h"
-                            elif time_diff < timedelta(days=2):
-                                last_seen_str = "Ontem"
-                            else:
-                                last_seen_str = last_seen_dt.strftime("%d/%m/%Y")
-                        except:
-                            last_seen_str = "Desconhecido"
-                    
-                    # Calcular barra de progresso (baseado no total de horas, max 500h = 100%)
-                    progress = min(100, (hours / 500) * 100)
-                    
-                    players.append({
-                        "name": name,
-                        "playtime": f"{hours}h {minutes}m",
-                        "playtime_seconds": total_seconds,
-                        "last_seen": last_seen_str,
-                        "last_seen_full": last_seen_full,
-                        "is_online": is_online,
-                        "progress": round(progress, 1)
-                    })
-                    
-                except FileNotFoundError:
-                    # Jogador sem arquivo de stats ainda
-                    players.append({
-                        "name": name,
-                        "playtime": "0h 0m",
-                        "playtime_seconds": 0,
-                        "last_seen": "Nunca",
-                        "last_seen_full": None,
-                        "is_online": name in online_players,
-                        "progress": 0
-                    })
-                except Exception as e:
-                    print(f"Erro ao ler stats de {name}: {e}")
-            
-            # Ordenar por tempo jogado (maior primeiro)
-            players.sort(key=lambda x: x['playtime_seconds'], reverse=True)
-            
-            # Adicionar rank
-            for idx, player in enumerate(players, 1):
-                player['rank'] = idx
-            
-            # Contar quantos estão online
-            online_count = sum(1 for p in players if p["is_online"])
+            self.send_json(dashboard.snapshot_body(since, epoch), headers=[("Cache-Control", "no-store")])
             
-            response_data = {
-                "success": True,
-                "players": players,
-                "online_count": online_count,
-                "total_players": len(players)
-            }
+        except ValueError as e:
+            self.send_json({"error": f"versão inválida: {e}"}, 400)
+        except Exception as e:
+            log.error("Erro ao montar o dashboard: %s", e)
+            self.send_json({"error": str(e)}, 500)
+
+    def handle_top_players(self):
+        """Busca os top players dos arquivos de stats do Minecraft + last_seen do SQLite"""
+        try:
+            # Mesma seção do dashboard: remontada a cada 15 s, serializada
+            # só quando muda
+            section = dashboard.sections["top_players"]
+            version, value, body = section.snapshot()
+            if "error" in value:
+                raise RuntimeError(value["error"])
             
-            self.send_response(200)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(json.dumps(response_data).encode("utf-8"))
+            self.send_prepared(responses.get("top_players", version, lambda: body))
             
         except Exception as e:
-            print(f"Erro ao buscar top players: {e}")
-            import traceback
-            traceback.print_exc()
+            players_log.exception("Erro ao buscar top players: %s", e)
             
             response_data = {
                 "success": False,
@@ -486,53 +463,28 @@ class MyHandler(http.server.SimpleHTTPRequestHandler):
                 "total_players": 0
             }
             
-            self.send_response(500)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(json.dumps(response_data).encode("utf-8"))
+            self.send_json(response_data, 500)
 
     def handle_player_stats(self):
         """Busca estatísticas detalhadas de um jogador específico"""
         try:
-            # Extrair nome do jogador da URL
-            player_name = self.path.split('/api/player-stats/')[-1]
-            player_name = player_name.strip('/')
-            
-            # Mapear nomes para UUIDs
-            player_uuids = {
-                'abcdan': 'c5839188-0e7d-4c3b-bcf0-0a61cf92c25e',
-                'AllaNaroK': '9e219595-539e-4d84-85bf-42000a35d506',
-                'HermeticPrince': 'c1bc4cb2-ab4e-402f-9da1-920de3163510',
-                'BITalucard': '05b846ad-f1ad-40a0-bd0f-252073db78ca'
-            }
+            player_name = self.params['name']
             
-            if player_name not in player_uuids:
-                self.send_response(404)
-                self.send_header("Content-type", "application/json")
-                self.send_header("Access-Control-Allow-Origin", "*")
-                self.end_headers()
-                self.wfile.write(json.dumps({"success": False, "error": "Player not found"}).encode("utf-8"))
-                return
+            # Nome -> UUID pelo registro de jogadores
+            uuid = player_registry.uuid_for(player_name)
             
-            uuid = player_uuids[player_name]
-            stats_path = f"/minecraft-stats/{uuid}.json"
-            adv_path = f"/minecraft-advancements/{uuid}.json"
+            if uuid is None:
+                self.send_json({"success": False, "error": "Player not found"}, 404)
+                return
             
-            # Carregar estatísticas
-            with open(stats_path, 'r') as f:
-                stats_data = json.load(f)
+            player_name = player_registry.name_for(uuid) or player_name
             
-            stats = stats_data.get('stats', {})
-            custom = stats.get('minecraft:custom', {})
-            killed = stats.get('minecraft:killed', {})
-            killed_by = stats.get('minecraft:killed_by', {})
-            mined = stats.get('minecraft:mined', {})
-            crafted = stats.get('minecraft:crafted', {})
-            picked_up = stats.get('minecraft:picked_up', {})
+            # Estatísticas já agregadas; só re-parseia se o arquivo mudou
+            summary = stats_repo.get_stats(uuid)
+            custom = summary['custom']
             
             # Calcular estatísticas principais
-            play_time_ticks = custom.get('minecraft:play_time', 0)
+            play_time_ticks = summary['play_time_ticks']
             play_time_hours = play_time_ticks // 20 // 3600
             play_time_minutes = (play_time_ticks // 20 // 60) % 60
             
@@ -541,34 +493,7 @@ class MyHandler(http.server.SimpleHTTPRequestHandler):
             swim_cm = custom.get('minecraft:swim_one_cm', 0)
             fly_cm = custom.get('minecraft:aviate_one_cm', 0)
             
-            # Top 5 mobs killed
-            sorted_killed = sorted(killed.items(), key=lambda x: x[1], reverse=True)[:5]
-            top_mobs_killed = [{"mob": k.split(':')[-1].replace('_', ' ').title(), "count": v} for k, v in sorted_killed]
-            
-            # Top 5 items mined
-            sorted_mined = sorted(mined.items(), key=lambda x: x[1], reverse=True)[:5]
-            top_mined = [{"item": k.split(':')[-1].replace('_', ' ').title(), "count": v} for k, v in sorted_mined]
-            
-            # Killed by
-            killed_by_list = [{"mob": k.split(':')[-1].replace('_', ' ').title(), "count": v} for k, v in killed_by.items()]
-            
-            # Total de itens coletados
-            total_picked_up = sum(picked_up.values())
-            
-            # Total de blocos minerados
-            total_mined = sum(mined.values())
-            
-            # Total de itens craftados
-            total_crafted = sum(crafted.values())
-            
-            # Carregar advancements
-            completed_advancements = 0
-            try:
-                with open(adv_path, 'r') as f:
-                    adv_data = json.load(f)
-                completed_advancements = len([k for k, v in adv_data.items() if isinstance(v, dict) and v.get('done', False)])
-            except:
-                pass
+            completed_advancements = stats_repo.get_advancements(uuid)
             
             response_data = {
                 "success": True,
@@ -586,81 +511,86 @@ class MyHandler(http.server.SimpleHTTPRequestHandler):
                     "distance_sprinted": round(sprint_cm / 100000, 2),  # km
                     "distance_swam": round(swim_cm / 100, 2),  # metros
                     "distance_flown": round(fly_cm / 100000, 2),  # km
-                    "blocks_mined": total_mined,
-                    "items_collected": total_picked_up,
-                    "items_crafted": total_crafted,
+                    "blocks_mined": summary['total_mined'],
+                    "items_collected": summary['total_picked_up'],
+                    "items_crafted": summary['total_crafted'],
                     "advancements_completed": completed_advancements,
-                    "top_mobs_killed": top_mobs_killed,
-                    "top_mined": top_mined,
-                    "killed_by": killed_by_list
+                    "top_mobs_killed": summary['top_mobs_killed'],
+                    "top_mined": summary['top_mined'],
+                    "killed_by": summary['killed_by']
                 }
             }
             
-            self.send_response(200)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(json.dumps(response_data).encode("utf-8"))
+            self.send_json(response_data)
             
         except FileNotFoundError:
-            self.send_response(404)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(json.dumps({"success": False, "error": "Stats file not found"}).encode("utf-8"))
+            self.send_json({"success": False, "error": "Stats file not found"}, 404)
             
         except Exception as e:
-            print(f"Erro ao buscar stats do player: {e}")
-            import traceback
-            traceback.print_exc()
+            players_log.exception("Erro ao buscar stats do player: %s", e)
             
-            self.send_response(500)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(json.dumps({"success": False, "error": str(e)}).encode("utf-8"))
+            self.send_json({"success": False, "error": str(e)}, 500)
 
     # Legacy index page removed; use `mine.html` as the primary page.
 
-    def handle_mine(self):
-        with open("mine.html", "r", encoding="utf-8") as f:
-            html = f.read()
+    def send_asset(self, name):
+        """Serve um arquivo do asset_cache (memória) com ETag/304 e gzip/brotli.
+
+        Devolve False se o arquivo não está no cache.
+        """
+        asset = asset_cache.get(name)
+        if asset is None:
+            return False
+
+        if not_modified(asset.etag, asset.mtime, self.headers.get('If-None-Match'),
+                        self.headers.get('If-Modified-Since')):
+            self.send_response(304)
+            self.send_header("ETag", asset.etag)
+            self.send_header("Last-Modified", asset.last_modified)
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Vary", "Accept-Encoding")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return True
+
+        encoding = choose_encoding(self.headers.get('Accept-Encoding'), asset)
+        body = asset.br if encoding == 'br' else asset.gzip if encoding == 'gzip' else asset.body
 
         self.send_response(200)
-        self.send_header("Content-type", "text/html")
+        self.send_header("Content-type", asset.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", asset.etag)
+        self.send_header("Last-Modified", asset.last_modified)
+        # Sempre revalida: arquivos sem versão no nome, 304 custa só cabeçalhos
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
         self.end_headers()
-        self.wfile.write(html.encode("utf-8"))
+        self.wfile.write(body)
+        return True
+
+    def handle_mine(self):
+        if not self.send_asset("mine.html"):
+            self.send_error(404, "Arquivo mine.html nao encontrado na pasta html/")
     
     def handle_perfil(self):
-        with open("perfil.html", "r", encoding="utf-8") as f:
-            html = f.read()
-
-        self.send_response(200)
-        self.send_header("Content-type", "text/html")
-        self.end_headers()
-        self.wfile.write(html.encode("utf-8"))
+        if not self.send_asset("perfil.html"):
+            self.send_error(404, "Arquivo perfil.html nao encontrado na pasta html/")
     
     def handle_inicio(self):
-        try:
-            # Certifique-se que index.html está na pasta html/
-            with open("index.html", "r", encoding="utf-8") as f:
-                html = f.read()
-
-            self.send_response(200)
-            self.send_header("Content-type", "text/html")
-            self.end_headers()
-            self.wfile.write(html.encode("utf-8"))
-        except FileNotFoundError:
+        # Certifique-se que index.html está na pasta html/
+        if not self.send_asset("index.html"):
             self.send_error(404, "Arquivo index.html nao encontrado na pasta html/")
     
     def handle_login_page(self):
-        with open("login.html", "r", encoding="utf-8") as f:
-            html = f.read()
-
-        self.send_response(200)
-        self.send_header("Content-type", "text/html")
-        self.end_headers()
-        self.wfile.write(html.encode("utf-8"))
+        # Login page - accessible to everyone
+        # If already authenticated, redirect to home
+        if self.check_auth():
+            self.redirect_to_home()
+            return
+        if not self.send_asset("login.html"):
+            self.send_error(404, "Arquivo login.html nao encontrado na pasta html/")
 
     def redirect_to_login(self):
         """Redirect user to login page"""
@@ -675,23 +605,36 @@ class MyHandler(http.server.SimpleHTTPRequestHandler):
         self.end_headers()
     
     def handle_teste(self):
-        with open("teste.html", "r", encoding="utf-8") as f:
-            html = f.read()
+        if not self.send_asset("teste.html"):
+            self.send_error(404, "Arquivo teste.html nao encontrado na pasta html/")
+    
+    def handle_static(self):
+        """Fallback do GET: estáticos de html/ e, fora isso, a mine.html"""
+        # Rota de API que não existe: 404 em JSON
+        if self.url_path.startswith('/api/'):
+            self.send_json({"error": "API endpoint not found"}, 404)
+            return
+        
+        # Only allow super().do_GET() for specific paths (static files, images, etc.)
+        # This prevents unwanted directory listings or file downloads
+        allowed_paths = ['.css', '.js', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.woff', '.woff2', '.ttf']
+        if any(allowed in self.url_path for allowed in allowed_paths):
+            # Estáticos da raiz de html/ saem da memória; o resto vai para o disco
+            name = unquote(self.url_path).lstrip('/')
+            if not name.endswith('.html') and self.send_asset(name):
+                return
+            return super().do_GET()
+        
+        # If path not handled, serve mine.html as default
+        self.handle_mine()
 
-        self.send_response(200)
-        self.send_header("Content-type", "text/html")
-        self.end_headers()
-        self.wfile.write(html.encode("utf-8"))
+    def handle_not_found(self):
+        self.send_error(404)
     
     def handle_check_auth(self):
         is_authenticated = self.check_auth()
         
-        response = json.dumps({"authenticated": is_authenticated})
-        self.send_response(200)
-        self.send_header("Content-type", "application/json")
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.end_headers()
-        self.wfile.write(response.encode("utf-8"))
+        self.send_json({"authenticated": is_authenticated})
     
     def handle_user_info(self):
         """Retorna informações do usuário logado"""
@@ -702,76 +645,40 @@ class MyHandler(http.server.SimpleHTTPRequestHandler):
             if 'session_id' in cookie:
                 session_id = cookie['session_id'].value
                 
-                # Buscar sessão no banco de dados
-                conn = sqlite3.connect(DB_FILE)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    SELECT user_id, user_name, expires_at 
-                    FROM user_sessions 
-                    WHERE session_id = ?
-                ''', (session_id,))
-                
-                result = cursor.fetchone()
-                conn.close()
+                # Buscar sessão (cache em memória, banco só no miss)
+                result = session_cache.get(session_id)
                 
                 if result:
-                    user_id, user_name, expires_at = result
+                    user_id, user_name = result
                     
-                    # Verificar se sessão não expirou
-                    expires_timestamp = time.mktime(time.strptime(expires_at, '%Y-%m-%d %H:%M:%S'))
-                    if time.time() < expires_timestamp:
-                        # Buscar avatar do Discord
-                        try:
-                            import urllib.request
-                            req = urllib.request.Request('http://discord-bot:3011/members')
-                            with urllib.request.urlopen(req, timeout=5) as response:
-                                members_data = json.loads(response.read().decode('utf-8'))
-                                
-                            avatar_url = None
-                            if 'members' in members_data:
-                                for member in members_data['members']:
-                                    if member['id'] == user_id:
-                                        avatar_url = member.get('avatar')
-                                        break
-                            
-                            response_data = {
-                                "authenticated": True,
-                                "userId": user_id,
-                                "userName": user_name,
-                                "avatar": avatar_url
-                            }
-                        except:
-                            response_data = {
-                                "authenticated": True,
-                                "userId": user_id,
-                                "userName": user_name,
-                                "avatar": None
-                            }
+                    # Avatar do Discord (cache de membros indexado por id)
+                    try:
+                        member = discord_client.member(user_id)
+                        avatar_url = member.get('avatar') if member else None
                         
-                        self.send_response(200)
-                        self.send_header("Content-type", "application/json")
-                        self.send_header("Access-Control-Allow-Origin", "*")
-                        self.end_headers()
-                        self.wfile.write(json.dumps(response_data).encode("utf-8"))
-                        return
-            
+                        response_data = {
+                            "authenticated": True,
+                            "userId": user_id,
+                            "userName": user_name,
+                            "avatar": avatar_url
+                        }
+                    except:
+                        response_data = {
+                            "authenticated": True,
+                            "userId": user_id,
+                            "userName": user_name,
+                            "avatar": None
+                        }
+                    
+                    self.send_json(response_data)
+                    return
+        
             # Não autenticado
-            response = json.dumps({"authenticated": False})
-            self.send_response(200)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(response.encode("utf-8"))
+            self.send_json({"authenticated": False})
             
         except Exception as e:
-            print(f"[ERROR] Erro ao buscar informações do usuário: {e}")
-            response = json.dumps({"authenticated": False, "error": str(e)})
-            self.send_response(500)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(response.encode("utf-8"))
+            auth_log.error("Erro ao buscar informações do usuário: %s", e)
+            self.send_json({"authenticated": False, "error": str(e)}, 500)
     
     def handle_create_session(self):
         try:
@@ -783,7 +690,7 @@ class MyHandler(http.server.SimpleHTTPRequestHandler):
             userId = data.get('userId')
             userName = data.get('userName')
             
-            print(f"[SESSION] Criando sessão para {userName} (ID: {userId})")
+            session_log.info("Criando sessão para %s (ID: %s)", userName, userId)
             
             if not token or not userId or not userName:
                 raise ValueError("Dados incompletos")
@@ -791,201 +698,457 @@ class MyHandler(http.server.SimpleHTTPRequestHandler):
             # Criar sessão no banco de dados
             session_id = str(uuid.uuid4())
             
-            conn = sqlite3.connect(DB_FILE)
-            cursor = conn.cursor()
-            
             # Calcular data de expiração (7 dias a partir de agora)
             expires_at = time.strftime('%Y-%m-%d %H:%M:%S', 
                                       time.localtime(time.time() + (7 * 24 * 60 * 60)))
             
-            cursor.execute('''
-                INSERT INTO user_sessions (session_id, user_id, user_name, expires_at)
-                VALUES (?, ?, ?, ?)
-            ''', (session_id, userId, userName, expires_at))
-            
-            conn.commit()
-            conn.close()
+            db.create_session(session_id, userId, userName, expires_at)
             
-            response = json.dumps({"success": True, "session_id": session_id})
-            
-            self.send_response(200)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            # Definir cookie (7 dias = 604800 segundos)
-            self.send_header("Set-Cookie", f"session_id={session_id}; Path=/; Max-Age=604800; SameSite=Lax")
-            self.end_headers()
-            self.wfile.write(response.encode("utf-8"))
+            self.send_json({"success": True, "session_id": session_id}, headers=[("Set-Cookie", f"session_id={session_id}; Path=/; Max-Age=604800; SameSite=Lax")])
             
-            print(f"[SESSION] ✅ Sessão criada no banco: {session_id}")
-            print(f"[SESSION] Expira em: {expires_at}")
+            session_log.info("✅ Sessão criada no banco: %s", session_id)
+            session_log.debug("Expira em: %s", expires_at)
             
         except Exception as e:
-            print(f"[SESSION] ❌ Erro ao criar sessão: {e}")
-            response = json.dumps({"success": False, "error": str(e)})
-            self.send_response(400)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(response.encode("utf-8"))
+            session_log.warning("❌ Erro ao criar sessão: %s", e)
+            self.send_json({"success": False, "error": str(e)}, 400)
 
-    def handle_download(self):
-        try:
-            # path comes as /downloads/filename.zip
-            filename = self.path[1:]
+    def send_file_response(self, base_dir, rel_path, attachment=False, extra_headers=()):
+        """Envia um arquivo do disco com sendfile, Range e ETag/304.
 
-            # segurança básica
-            if not filename or '..' in filename or filename.startswith('/'):
-                raise ValueError("Nome de arquivo inválido")
+        O corpo nunca passa pela memória do Python inteiro; arquivos grandes
+        contam no limite de downloads simultâneos.
+        """
+        file_path = resolve_path(base_dir, rel_path)
+        if file_path is None or not os.path.isfile(file_path):
+            self.send_error(404)
+            return
 
-            file_path = Path(filename)
+        with open(file_path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            size = st.st_size
+            etag = f'W/"{st.st_mtime_ns:x}-{size:x}"'
+            last_modified = self.date_time_string(int(st.st_mtime))
 
-            if not file_path.exists() or not file_path.is_file():
-                self.send_error(404)
+            if not_modified(etag, st.st_mtime, self.headers.get('If-None-Match'),
+                            self.headers.get('If-Modified-Since')):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", last_modified)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
                 return
 
-            ctype, _ = mimetypes.guess_type(str(file_path))
-            if not ctype:
-                ctype = 'application/octet-stream'
+            # If-Range com versão antiga: ignora o Range e manda tudo
+            range_header = self.headers.get('Range')
+            if_range = self.headers.get('If-Range')
+            if range_header and if_range and not (etag_matches(etag, if_range) or if_range == last_modified):
+                range_header = None
 
-            with open(file_path, 'rb') as f:
-                data = f.read()
+            try:
+                byte_range = parse_range(range_header, size)
+            except RangeNotSatisfiable:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
 
-            self.send_response(200)
-            self.send_header('Content-Type', ctype)
-            self.send_header('Content-Disposition', f'attachment; filename="{file_path.name}"')
-            self.send_header('Content-Length', str(len(data)))
-            self.end_headers()
-            self.wfile.write(data)
+            start, end = byte_range if byte_range else (0, size - 1)
+            length = end - start + 1 if size else 0
+
+            large = length > LARGE_FILE_SIZE
+            if large and not download_slots.acquire(blocking=False):
+                self.send_json({"error": "Muitos downloads simultâneos"}, 503, headers=[("Retry-After", "30")])
+                return
 
+            try:
+                self.send_response(206 if byte_range else 200)
+                self.send_header("Content-Type", guess_type(file_path))
+                self.send_header("Content-Length", str(length))
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", last_modified)
+                if byte_range:
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+                if attachment:
+                    self.send_header('Content-Disposition', f'attachment; filename="{os.path.basename(file_path)}"')
+                for name, value in extra_headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.flush()
+                if length:
+                    send_file(self.connection, f, start, length)
+            finally:
+                if large:
+                    download_slots.release()
+
+    def handle_images_manifest(self):
+        """Todas as imagens com legenda, dimensões e URLs das variantes (srcset)"""
+        try:
+            captions = db.get_image_captions()
+            with os.scandir("imagens") as entries:
+                names = sorted((e.name for e in entries
+                                if e.is_file() and e.name.lower().endswith(SOURCE_EXTENSIONS)),
+                               key=lambda n: os.stat(os.path.join("imagens", n)).st_mtime, reverse=True)
+            
+            images = []
+            for name in names:
+                width, height, widths = image_pipeline.describe(name)
+                url = "/imagens/" + name
+                srcset = [f"{url}?w={w} {w}w" for w in widths]
+                if width:
+                    srcset.append(f"{url} {width}w")
+                images.append({
+                    "filename": name,
+                    "caption": captions.get(name),
+                    "url": url,
+                    "width": width,
+                    "height": height,
+                    "thumbnail": f"{url}?w={widths[0]}" if widths else url,
+                    "variants": [{"width": w, "url": f"{url}?w={w}"} for w in widths],
+                    "srcset": ", ".join(srcset)
+                })
+            
+            self.send_json({"success": True, "images": images})
+            
         except Exception as e:
-            print(f"Erro no download: {e}")
-            self.send_response(400)
-            self.send_header("Content-type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps({"error": str(e)}).encode("utf-8"))
+            log.error("Erro ao montar manifest de imagens: %s", e)
+            self.send_json({"success": False, "error": str(e), "images": []}, 500)
+
+    def handle_download(self):
+        """/downloads/<arquivo> (html/downloads) como anexo, com retomada por Range"""
+        try:
+            self.send_file_response("downloads", self.params['path'], attachment=True)
+        except (BrokenPipeError, ConnectionResetError):
+            # Cliente cancelou o download
+            self.close_connection = True
+        except Exception as e:
+            log.error("Erro no download: %s", e)
+            self.close_connection = True
+
+    def handle_image(self):
+        """/imagens/<arquivo>[?w=largura] (uploads da galeria).
+
+        Com ``?w=`` serve a menor variante WebP/AVIF que cobre a largura
+        pedida e que o navegador aceita; enquanto ela não foi gerada, o
+        original.
+        """
+        try:
+            rel_path = self.params['path']
+            width = self.query.get('w', [''])[0]
+            if not width.isdigit():
+                self.send_file_response("imagens", rel_path)
+                return
+            
+            variant = image_pipeline.choose(rel_path, int(width), self.headers.get('Accept'))
+            if variant is None:
+                self.send_file_response("imagens", rel_path, extra_headers=[("Vary", "Accept")])
+            else:
+                self.send_file_response("image_cache", variant[0], extra_headers=[("Vary", "Accept")])
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        except Exception as e:
+            log.error("Erro ao servir imagem: %s", e)
+            self.close_connection = True
     
     
     def handle_logs(self):
         try:
-            # Debug: mostrar o caminho que está sendo procurado
-            print(f"[DEBUG] Procurando log em: {MINECRAFT_LOG_PATH}")
-            print(f"[DEBUG] Caminho existe? {os.path.exists(MINECRAFT_LOG_PATH)}")
-            print(f"[DEBUG] Diretório atual: {os.getcwd()}")
-            print(f"[DEBUG] Usuario atual: {os.getuid() if hasattr(os, 'getuid') else 'N/A'}")
-            
-            # Tentar verificar permissões
-            if os.path.exists(MINECRAFT_LOG_PATH):
-                try:
-                    import stat
-                    file_stat = os.stat(MINECRAFT_LOG_PATH)
-                    print(f"[DEBUG] Permissões do arquivo: {oct(file_stat.st_mode)}")
-                    print(f"[DEBUG] Dono do arquivo: UID={file_stat.st_uid}, GID={file_stat.st_gid}")
-                    print(f"[DEBUG] Arquivo legível? {os.access(MINECRAFT_LOG_PATH, os.R_OK)}")
-                except Exception as perm_error:
-                    print(f"[DEBUG] Erro ao verificar permissões: {perm_error}")
+            # Debug: mostrar o caminho que está sendo procurado (só com
+            # LOG_MODE=debug: os stat/access abaixo não rodam em produção)
+            if logs_log.isEnabledFor(logging.DEBUG):
+                logs_log.debug("Procurando log em: %s", MINECRAFT_LOG_PATH)
+                logs_log.debug("Caminho existe? %s", os.path.exists(MINECRAFT_LOG_PATH))
+                logs_log.debug("Diretório atual: %s", os.getcwd())
+                logs_log.debug("Usuario atual: %s", os.getuid() if hasattr(os, 'getuid') else 'N/A')
+                
+                # Tentar verificar permissões
+                if os.path.exists(MINECRAFT_LOG_PATH):
+                    try:
+                        file_stat = os.stat(MINECRAFT_LOG_PATH)
+                        logs_log.debug("Permissões do arquivo: %s", oct(file_stat.st_mode))
+                        logs_log.debug("Dono do arquivo: UID=%s, GID=%s", file_stat.st_uid, file_stat.st_gid)
+                        logs_log.debug("Arquivo legível? %s", os.access(MINECRAFT_LOG_PATH, os.R_OK))
+                    except Exception as perm_error:
+                        logs_log.debug("Erro ao verificar permissões: %s", perm_error)
             
             # Ler o arquivo de log do Minecraft
             if not os.path.exists(MINECRAFT_LOG_PATH):
                 error_msg = f"Arquivo de log não encontrado em: {MINECRAFT_LOG_PATH}"
-                print(f"[ERROR] {error_msg}")
+                logs_log.error("%s", error_msg)
                 raise ValueError(error_msg)
             
-            with open(MINECRAFT_LOG_PATH, 'r', encoding='utf-8', errors='ignore') as f:
-                log_lines = f.readlines()
-            
-            # Pegar as últimas 500 linhas para não sobrecarregar
-            log_lines = log_lines[-500:]
+            # ?since=<inode>:<offset> (ou ?since=<offset>&inode=<inode>) devolve
+            # só o que foi escrito depois do cursor. Sem o inode não dá para
+            # saber se o log rotacionou: volta as últimas linhas, como sem cursor
+            query = self.query
+            since, inode = parse_cursor(query.get('since', [None])[0], query.get('inode', [None])[0])
+            if since is not None and inode is not None:
+                log_lines, offset, inode, reset = read_since(
+                    MINECRAFT_LOG_PATH, since, inode, tail=LOG_TAIL_LINES)
+            else:
+                # Pegar as últimas 500 linhas para não sobrecarregar
+                log_lines, offset, inode = tail_lines(MINECRAFT_LOG_PATH, LOG_TAIL_LINES)
+                reset = True
             
-            response = json.dumps({
+            self.send_json({
                 "success": True,
                 "logs": log_lines,
-                "total_lines": len(log_lines)
+                "total_lines": len(log_lines),
+                "cursor": f"{inode}:{offset}",
+                "offset": offset,
+                "inode": inode,
+                "reset": reset
             })
             
-            self.send_response(200)
-            self.send_header("Content-type", "application/json")
-            self.end_headers()
-            self.wfile.write(response.encode("utf-8"))
-            
         except Exception as e:
-            print(f"[ERROR] Erro ao ler logs: {e}")
-            response = json.dumps({"success": False, "error": str(e)})
-            self.send_response(500)
-            self.send_header("Content-type", "application/json")
-            self.end_headers()
-            self.wfile.write(response.encode("utf-8"))
+            logs_log.error("Erro ao ler logs: %s", e)
+            self.send_json({"success": False, "error": str(e)}, 500)
     
+    def handle_logs_search(self):
+        """Busca no índice de logs: ?level=WARN,ERROR&q=&from=&to=&limit=&before="""
+        try:
+            started = time.perf_counter()
+            query = self.query
+
+            def param(name):
+                return query.get(name, [None])[0]
+
+            levels = [l.strip().upper() for l in (param('level') or '').split(',') if l.strip()]
+            limit = max(1, min(int(param('limit') or 100), 500))
+            before = int(param('before')) if param('before') else None
+            
+            rows, next_cursor = log_index.search(
+                levels=levels, q=param('q'),
+                ts_from=parse_time(param('from')), ts_to=parse_time(param('to')),
+                limit=limit, before=before)
+            
+            results = [{
+                "id": row[0],
+                "source": row[1],
+                "ts": row[2],
+                "thread": row[3],
+                "level": row[4],
+                "logger": row[5],
+                "message": row[6]
+            } for row in rows]
+            
+            self.send_json({
+                "success": True,
+                "results": results,
+                "next": next_cursor,
+                "took_ms": round((time.perf_counter() - started) * 1000, 2)
+            })
+            
+        except ValueError as e:
+            self.send_json({"success": False, "error": str(e)}, 400)
+        except Exception as e:
+            logs_log.error("Erro na busca de logs: %s", e)
+            self.send_json({"success": False, "error": str(e)}, 500)
+
+    def handle_player_history(self):
+        """Série histórica de um contador: /api/player-stats/<nome>/history?metric=&range="""
+        try:
+            player_name = self.params['name']
+            query = self.query
+            metric = query.get('metric', ['play_time'])[0]
+            range_name = query.get('range', ['7d'])[0]
+            
+            if metric not in METRICS:
+                raise ValueError(f"metric inválida (opções: {', '.join(METRICS)})")
+            range_seconds = parse_history_range(range_name)
+            
+            uuid = player_registry.uuid_for(player_name)
+            if uuid is None:
+                self.send_json({"success": False, "error": "Player not found"}, 404)
+                return
+            
+            resolution, points, total = stats_history.history(uuid, metric, range_seconds)
+            
+            self.send_json({
+                "success": True,
+                "player": player_registry.name_for(uuid) or player_name,
+                "metric": metric,
+                "range": range_name,
+                "resolution": resolution,
+                "total": total,
+                "points": [{"t": ts, "delta": delta, "value": value} for ts, delta, value in points]
+            })
+            
+        except ValueError as e:
+            self.send_json({"success": False, "error": str(e)}, 400)
+        except Exception as e:
+            players_log.error("Erro ao buscar histórico de stats: %s", e)
+            self.send_json({"success": False, "error": str(e)}, 500)
+
+    def handle_player_sessions(self):
+        """Sessões de jogo mais recentes: /api/player-sessions/<nome>?limit=50"""
+        try:
+            from datetime import datetime
+            
+            player_name = self.params['name']
+            query = self.query
+            limit = int(query.get('limit', ['50'])[0])
+            if not 1 <= limit <= 500:
+                raise ValueError("limit deve estar entre 1 e 500")
+            
+            sessions = []
+            for join_time, leave_time in db.get_player_sessions(player_name, limit):
+                duration = None
+                if join_time and leave_time:
+                    duration = int((datetime.fromisoformat(leave_time) - datetime.fromisoformat(join_time)).total_seconds())
+                sessions.append({"join": join_time, "leave": leave_time, "duration_seconds": duration})
+            
+            self.send_json({
+                "success": True,
+                "player": player_name,
+                "last_seen": db.get_player_last_seen(player_name),
+                "sessions": sessions
+            })
+            
+        except ValueError as e:
+            self.send_json({"success": False, "error": str(e)}, 400)
+        except Exception as e:
+            players_log.error("Erro ao buscar sessões do jogador: %s", e)
+            self.send_json({"success": False, "error": str(e)}, 500)
+
+    def handle_logs_stream(self):
+        """Server-Sent Events com as linhas novas do latest.log.
+
+        Depois dos cabeçalhos o socket vai para o hub de eventos e o worker
+        volta para o pool, então cada aba aberta não prende uma thread.
+        """
+        if event_hub.full():
+            self.send_json({"error": "Muitas conexões de log abertas"}, 503, headers=[("Retry-After", "5")])
+            return
+
+        # Reconexão do EventSource manda o último id; senão usa ?since=.
+        # Cursor inválido vira (None, None): reset + tail no subscribe
+        query = self.query
+        since, inode = parse_cursor(self.headers.get('Last-Event-ID'))
+        if since is None:
+            since, inode = parse_cursor(query.get('since', [None])[0], query.get('inode', [None])[0])
+
+        self.send_response(200)
+        self.send_header("Content-type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("X-Accel-Buffering", "no")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(b"retry: 3000\n\n")
+        self.wfile.flush()
+
+        self.server.detach(self.request)
+        log_watcher.subscribe(self.request, since, inode)
+
+    def handle_live(self):
+        """SSE com as atualizações do dashboard: /api/live?topics=status,metrics,...
+
+        Como no stream de logs, o socket vai para o hub depois dos cabeçalhos.
+        """
+        query = self.query
+        topics = [t for t in query.get('topics', [','.join(LIVE_TOPICS)])[0].split(',') if t]
+        unknown = [t for t in topics if t not in LIVE_TOPICS]
+        if unknown or not topics:
+            self.send_json({"error": f"tópicos inválidos (opções: {', '.join(LIVE_TOPICS)})"}, 400)
+            return
+
+        if event_hub.full():
+            self.send_json({"error": "Muitas conexões ao vivo abertas"}, 503, headers=[("Retry-After", "5")])
+            return
+
+        self.send_response(200)
+        self.send_header("Content-type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("X-Accel-Buffering", "no")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(b"retry: 3000\n\n")
+        self.wfile.flush()
+
+        self.server.detach(self.request)
+        live_publisher.subscribe(self.request, topics)
+
     def handle_discord_members(self):
         """Proxy para buscar membros do Discord do serviço discord-bot"""
         try:
-            import urllib.request
+            # Cache compartilhado; com o bot fora do ar serve a última lista boa
+            data, source = discord_client.members()
             
-            # Fazer request para o serviço discord-bot
-            req = urllib.request.Request('http://discord-bot:3011/members')
-            with urllib.request.urlopen(req, timeout=5) as response:
-                data = response.read()
-            
-            self.send_response(200)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(data)
+            # O corpo do bot já vem em bytes: gzip e ETag uma vez por busca
+            prepared = responses.get("discord_members", data, lambda: data)
+            self.send_prepared(prepared, headers=[("X-Cache", source.upper())])
             
         except Exception as e:
-            print(f"[ERROR] Erro ao buscar membros do Discord: {e}")
-            response = json.dumps({"error": str(e), "members": []})
-            self.send_response(500)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(response.encode("utf-8"))
+            log.error("Erro ao buscar membros do Discord: %s", e)
+            self.send_json({"error": str(e), "members": []}, 500)
     
     def handle_request_auth(self):
         """Solicita autenticação via Discord"""
         try:
-            import urllib.request
-            
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
             
             data = json.loads(post_data.decode('utf-8'))
-            print(f"[REQUEST] Solicitando autenticação para: {data.get('userName')} (ID: {data.get('userId')})")
+            auth_log.info("Solicitando autenticação para: %s (ID: %s)", data.get('userName'), data.get('userId'))
             
             # Encaminhar request para o serviço discord-bot
-            req = urllib.request.Request(
-                'http://discord-bot:3011/auth/request',
-                data=post_data,
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            with urllib.request.urlopen(req, timeout=5) as response:
-                response_data = response.read()
+            response_data = discord_client.request_auth(post_data)
             
             result = json.loads(response_data.decode('utf-8'))
-            print(f"[REQUEST] Resposta do Discord Bot: {result}")
+            auth_log.debug("Resposta do Discord Bot: %s", result)
             
-            self.send_response(200)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(response_data)
+            self.send_json(response_data)
             
         except Exception as e:
-            print(f"[ERROR] Erro ao solicitar autenticação: {e}")
-            import traceback
-            traceback.print_exc()
-            response = json.dumps({"error": str(e), "success": False})
-            self.send_response(500)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(response.encode("utf-8"))
+            auth_log.exception("Erro ao solicitar autenticação: %s", e)
+            self.send_json({"error": str(e), "success": False}, 500)
     
+    def verify_auth_response(self, auth_data, userId, userName):
+        """(status, headers, corpo) do verify-auth; cria a sessão se confirmado.
+
+        Não usa o socket: também roda na thread do auth_waiter para
+        requisições estacionadas.
+        """
+        if auth_data.get('verified'):
+            # Criar sessão no banco de dados
+            if not userId or not userName:
+                auth_log.warning("❌ userId ou userName não fornecidos!")
+                raise ValueError("userId e userName são obrigatórios")
+            
+            session_id = str(uuid.uuid4())
+            
+            # Calcular data de expiração (7 dias)
+            expires_at = time.strftime('%Y-%m-%d %H:%M:%S', 
+                                      time.localtime(time.time() + (7 * 24 * 60 * 60)))
+            
+            db.create_session(session_id, userId, userName, expires_at)
+            
+            response_data = json.dumps({
+                "verified": True,
+                "session_id": session_id
+            })
+            auth_log.info("✅ Usuário %s autenticado com sucesso! session_id=%s", userName, session_id)
+            return 200, [
+                ("Content-type", "application/json"),
+                ("Access-Control-Allow-Origin", "*"),
+                ("Set-Cookie", f"session_id={session_id}; Path=/; Max-Age=604800; SameSite=Lax")
+            ], response_data.encode("utf-8")
+        
+        auth_log.debug("⏳ Ainda não verificado ou expirado")
+        return 200, [
+            ("Content-type", "application/json"),
+            ("Access-Control-Allow-Origin", "*")
+        ], json.dumps(auth_data).encode("utf-8")
+
     def handle_verify_auth(self):
-        """Verifica se autenticação foi confirmada no Discord"""
+        """Verifica se autenticação foi confirmada no Discord.
+
+        Com ``?wait=N`` (long-poll) a requisição espera até N segundos pela
+        confirmação no auth_waiter, fora do pool de workers.
+        """
         try:
-            import urllib.request
-            
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
             data = json.loads(post_data.decode('utf-8'))
@@ -994,71 +1157,39 @@ class MyHandler(http.server.SimpleHTTPRequestHandler):
             userId = data.get('userId')
             userName = data.get('userName')
             
-            print(f"[VERIFY] Verificando autenticação para token: {token}, user: {userName}")
+            query = self.query
+            wait = min(float(query.get('wait', ['0'])[0] or 0), AUTH_LONGPOLL_TIMEOUT)
             
-            # Verificar status no serviço discord-bot
-            req = urllib.request.Request(f'http://discord-bot:3011/auth/check/{token}')
+            auth_log.debug("Verificando autenticação para token: %s, user: %s", token, userName)
             
-            with urllib.request.urlopen(req, timeout=5) as response:
-                auth_data = json.loads(response.read().decode('utf-8'))
+            # Status final já visto pelo poller compartilhado (ex.: outra aba)
+            auth_data = auth_waiter.final_state(token)
             
-            print(f"[VERIFY] Resposta do Discord Bot: {auth_data}")
-            
-            if auth_data.get('verified'):
-                # Criar sessão no banco de dados
-                if not userId or not userName:
-                    print(f"[VERIFY] ❌ userId ou userName não fornecidos!")
-                    raise ValueError("userId e userName são obrigatórios")
-                
-                session_id = str(uuid.uuid4())
+            if auth_data is None and wait > 0 and token and not auth_waiter.full():
+                def respond(auth_data):
+                    return self.verify_auth_response(auth_data, userId, userName)
                 
-                conn = sqlite3.connect(DB_FILE)
-                cursor = conn.cursor()
-                
-                # Calcular data de expiração (7 dias)
-                expires_at = time.strftime('%Y-%m-%d %H:%M:%S', 
-                                          time.localtime(time.time() + (7 * 24 * 60 * 60)))
-                
-                cursor.execute('''
-                    INSERT INTO user_sessions (session_id, user_id, user_name, expires_at)
-                    VALUES (?, ?, ?, ?)
-                ''', (session_id, userId, userName, expires_at))
-                
-                conn.commit()
-                conn.close()
-                
-                response_data = json.dumps({
-                    "verified": True,
-                    "session_id": session_id
-                })
-                
-                self.send_response(200)
-                self.send_header("Content-type", "application/json")
-                self.send_header("Access-Control-Allow-Origin", "*")
-                self.send_header("Set-Cookie", f"session_id={session_id}; Path=/; Max-Age=604800; SameSite=Lax")
-                self.end_headers()
-                self.wfile.write(response_data.encode("utf-8"))
-                
-                print(f"[AUTH] ✅ Usuário {userName} autenticado com sucesso! Session: {session_id}")
-            else:
-                print(f"[VERIFY] ⏳ Ainda não verificado ou expirado")
-                response_data = json.dumps(auth_data)
-                self.send_response(200)
-                self.send_header("Content-type", "application/json")
-                self.send_header("Access-Control-Allow-Origin", "*")
-                self.end_headers()
-                self.wfile.write(response_data.encode("utf-8"))
+                self.close_connection = True
+                self.server.detach(self.request)
+                auth_waiter.park(token, self.request, wait, respond)
+                return
             
-        except Exception as e:
-            print(f"[ERROR] Erro ao verificar autenticação: {e}")
-            import traceback
-            traceback.print_exc()
-            response = json.dumps({"verified": False, "error": str(e)})
-            self.send_response(500)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
+            if auth_data is None:
+                # Verificar status no serviço discord-bot
+                auth_data = discord_client.check_auth(token)
+                auth_log.debug("Resposta do Discord Bot: %s", auth_data)
+            
+            status, headers, body = self.verify_auth_response(auth_data, userId, userName)
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
             self.end_headers()
-            self.wfile.write(response.encode("utf-8"))
+            self.wfile.write(body)
+            
+        except Exception as e:
+            auth_log.exception("Erro ao verificar autenticação: %s", e)
+            self.send_json({"verified": False, "error": str(e)}, 500,
+                           headers=[("Access-Control-Allow-Origin", "*")])
     
     def handle_logout(self):
         """Remove a sessão do usuário do banco de dados"""
@@ -1069,62 +1200,72 @@ class MyHandler(http.server.SimpleHTTPRequestHandler):
             if 'session_id' in cookie:
                 session_id = cookie['session_id'].value
                 
-                # Remover sessão do banco de dados
-                conn = sqlite3.connect(DB_FILE)
-                cursor = conn.cursor()
-                cursor.execute('DELETE FROM user_sessions WHERE session_id = ?', (session_id,))
-                conn.commit()
-                conn.close()
+                # Remover sessão do banco e do cache (e avisar outros processos)
+                session_cache.revoke(session_id)
                 
-                print(f"[LOGOUT] Sessão removida do banco: {session_id}")
-            
-            response = json.dumps({"success": True})
-            self.send_response(200)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            # Remover cookie
-            self.send_header("Set-Cookie", "session_id=; Path=/; Max-Age=0; SameSite=Lax")
-            self.end_headers()
-            self.wfile.write(response.encode("utf-8"))
+                session_log.info("Logout: sessão removida do banco (session_id=%s)", session_id)
+            
+            self.send_json({"success": True}, headers=[("Set-Cookie", "session_id=; Path=/; Max-Age=0; SameSite=Lax")])
             
         except Exception as e:
-            print(f"[ERROR] Erro ao fazer logout: {e}")
-            response = json.dumps({"success": False, "error": str(e)})
-            self.send_response(500)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(response.encode("utf-8"))
+            session_log.error("Erro ao fazer logout: %s", e)
+            self.send_json({"success": False, "error": str(e)}, 500)
+    
+    def handle_sessions(self):
+        """Sessões abertas do usuário logado (id curto, datas e qual é a atual)"""
+        try:
+            current = self.current_session()
+            if current is None:
+                self.send_json({"success": False, "error": "Não autenticado"}, 401)
+                return
+            session_id, user_id, _ = current
+            
+            # O id completo é a credencial: só o começo sai na resposta
+            sessions = [{
+                "id": sid[:8],
+                "current": sid == session_id,
+                "created_at": created_at,
+                "last_access": last_access,
+                "expires_at": expires_at
+            } for sid, created_at, last_access, expires_at in session_cache.sessions_for(user_id)]
+            
+            self.send_json({"success": True, "sessions": sessions})
+            
+        except Exception as e:
+            session_log.error("Erro ao listar sessões: %s", e)
+            self.send_json({"success": False, "error": str(e)}, 500)
+    
+    def handle_revoke_all_sessions(self):
+        """Encerra todas as sessões do usuário logado, em todos os dispositivos"""
+        try:
+            current = self.current_session()
+            if current is None:
+                self.send_json({"success": False, "error": "Não autenticado"}, 401)
+                return
+            _, user_id, user_name = current
+            
+            revoked = session_cache.revoke_user(user_id)
+            session_log.info("%s sessões de %s encerradas", revoked, user_name)
+            
+            self.send_json({"success": True, "revoked": revoked},
+                           headers=[("Set-Cookie", "session_id=; Path=/; Max-Age=0; SameSite=Lax")])
+            
+        except Exception as e:
+            session_log.error("Erro ao encerrar sessões: %s", e)
+            self.send_json({"success": False, "error": str(e)}, 500)
     
     def handle_get_dismissed_notices(self):
         """Retorna os avisos dispensados por um usuário"""
         try:
-            # Extrair userId da URL: /api/notices/dismissed/{userId}
-            user_id = self.path.split('/')[-1]
-            
-            conn = sqlite3.connect(DB_FILE)
-            cursor = conn.cursor()
-            cursor.execute('SELECT notice_id FROM dismissed_notices WHERE user_id = ?', (user_id,))
-            rows = cursor.fetchall()
-            conn.close()
+            user_id = self.params['user_id']
             
-            dismissed = [row[0] for row in rows]
+            dismissed = db.get_dismissed_notices(user_id)
             
-            response = json.dumps({"success": True, "dismissed": dismissed})
-            self.send_response(200)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(response.encode("utf-8"))
+            self.send_json({"success": True, "dismissed": dismissed})
             
         except Exception as e:
-            print(f"[ERROR] Erro ao buscar avisos dispensados: {e}")
-            response = json.dumps({"success": False, "error": str(e)})
-            self.send_response(500)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(response.encode("utf-8"))
+            log.error("Erro ao buscar avisos dispensados: %s", e)
+            self.send_json({"success": False, "error": str(e)}, 500)
     
     def handle_dismiss_notice(self):
         """Marca um aviso como dispensado permanentemente para o usuário"""
@@ -1139,35 +1280,119 @@ class MyHandler(http.server.SimpleHTTPRequestHandler):
             if not user_id or not notice_id:
                 raise ValueError("userId e noticeId são obrigatórios")
             
-            conn = sqlite3.connect(DB_FILE)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR REPLACE INTO dismissed_notices (user_id, notice_id)
-                VALUES (?, ?)
-            ''', (user_id, notice_id))
-            conn.commit()
-            conn.close()
-            
-            print(f"[NOTICE] Aviso {notice_id} dispensado pelo usuário {user_id}")
-            
-            response = json.dumps({"success": True})
-            self.send_response(200)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(response.encode("utf-8"))
+            db.dismiss_notice(user_id, notice_id)
+            
+            log.info("Aviso %s dispensado pelo usuário %s", notice_id, user_id)
+            
+            self.send_json({"success": True})
             
         except Exception as e:
-            print(f"[ERROR] Erro ao dispensar aviso: {e}")
-            response = json.dumps({"success": False, "error": str(e)})
-            self.send_response(500)
-            self.send_header("Content-type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(response.encode("utf-8"))
+            log.error("Erro ao dispensar aviso: %s", e)
+            self.send_json({"success": False, "error": str(e)}, 500)
+
+
+
+def login_required(location):
+    """Middleware das páginas protegidas: sem sessão válida, 302 para ``location``"""
+    def middleware(handler, next):
+        if not handler.check_auth():
+            auth_log.debug("Acesso negado a %s. Redirecionando para %s", handler.url_path, location)
+            handler.send_response(302)
+            handler.send_header("Location", location)
+            handler.end_headers()
+            return
+        return next(handler)
+    return middleware
+
+
+METRICS_NETWORKS = [ipaddress.ip_network(net.strip()) for net in METRICS_ALLOW.split(",") if net.strip()]
+
+
+def internal_or_login(handler, next):
+    """Middleware do /metrics: clientes de METRICS_ALLOW ou com sessão válida; senão 403"""
+    try:
+        address = ipaddress.ip_address(handler.client_address[0])
+    except ValueError:
+        address = None
+    if address is not None and getattr(address, "ipv4_mapped", None):
+        address = address.ipv4_mapped
+    allowed = address is not None and any(address in net for net in METRICS_NETWORKS)
+    if not allowed and not handler.check_auth():
+        handler.send_json({"error": "Acesso negado"}, 403)
+        return
+    return next(handler)
+
+
+# Cadeias de middlewares por tipo de rota (timing sempre por fora)
+PAGE = (timing,)
+PROTECTED = (timing, login_required('/login'))
+API = (timing, cors, compress)
+# Streams e arquivos não passam pelo send_json: sem gzip
+STREAM = (timing, cors)
+
+router = Router()
+router.get('/', MyHandler.handle_mine, PROTECTED)
+router.get('/inicio', MyHandler.handle_inicio, (timing, login_required('/')))
+router.get('/login', MyHandler.handle_login_page, PAGE)
+router.get('/mine', MyHandler.handle_mine, PAGE)
+router.get('/perfil', MyHandler.handle_perfil, PROTECTED)
+router.get('/teste', MyHandler.handle_teste, PROTECTED)
+router.get('/metrics', MyHandler.handle_metrics, (timing, internal_or_login))
+router.get('/downloads/{path*}', MyHandler.handle_download, PAGE)
+router.get('/imagens/{path*}', MyHandler.handle_image, PAGE)
+
+router.get('/api/status', MyHandler.handle_status, API)
+router.get('/api/system-metrics', MyHandler.handle_system_metrics, API)
+router.get('/api/server-health', MyHandler.handle_server_health, API)
+router.get('/api/dashboard', MyHandler.handle_dashboard, API)
+router.get('/api/live', MyHandler.handle_live, STREAM)
+router.get('/api/logs', MyHandler.handle_logs, API)
+router.get('/api/logs/search', MyHandler.handle_logs_search, API)
+router.get('/api/logs/stream', MyHandler.handle_logs_stream, STREAM)
+router.get('/api/check-auth', MyHandler.handle_check_auth, API)
+router.get('/api/user-info', MyHandler.handle_user_info, API)
+router.get('/api/sessions', MyHandler.handle_sessions, API)
+router.get('/api/discord/members', MyHandler.handle_discord_members, API)
+router.get('/api/notices/dismissed/{user_id}', MyHandler.handle_get_dismissed_notices, API)
+router.get('/api/top-players', MyHandler.handle_top_players, API)
+router.get('/api/images/manifest', MyHandler.handle_images_manifest, API)
+router.get('/api/player-sessions/{name}', MyHandler.handle_player_sessions, API)
+router.get('/api/player-stats/{name}', MyHandler.handle_player_stats, API)
+router.get('/api/player-stats/{name}/history', MyHandler.handle_player_history, API)
+
+router.post('/api/create-session', MyHandler.handle_create_session, API)
+router.post('/api/discord/request-auth', MyHandler.handle_request_auth, API)
+# Cabeçalhos (com CORS) vêm do verify_auth_response, usado também pelo auth_waiter
+router.post('/api/discord/verify-auth', MyHandler.handle_verify_auth, PAGE)
+router.post('/api/logout', MyHandler.handle_logout, API)
+router.post('/api/sessions/revoke-all', MyHandler.handle_revoke_all_sessions, API)
+router.post('/api/notices/dismiss', MyHandler.handle_dismiss_notice, API)
+
+router.fallback('GET', MyHandler.handle_static, STREAM)
+router.fallback('POST', MyHandler.handle_not_found, PAGE)
+router.fallback('DELETE', MyHandler.handle_not_found, PAGE)
+
 
+status_poller.start()
+session_cache.start()
+log_watcher.attach()
+health_collector.attach(log_watcher, event_hub)
+if ASSET_WATCH:
+    asset_cache.attach(event_hub)
+event_hub.start()
+log_indexer.start()
+session_tracker.start()
+player_registry.start()
+metrics_sampler.start()
+stats_sampler.start()
+auth_waiter.start()
+live_publisher.start()
+image_pipeline.scan()
 
-with socketserver.TCPServer(("", PORT), MyHandler) as httpd:
-    print(f"Servindo na porta {PORT}...")
+with PooledHTTPServer(("", PORT), MyHandler, workers=HTTP_WORKERS, queue_size=HTTP_QUEUE_SIZE) as httpd:
+    REGISTRY.add_collector(lambda: [("http_rejected_total", "counter",
+                                      "Conexões recusadas com 503 (fila do pool cheia)",
+                                      [({}, httpd.rejected)])])
+    log.info("Servindo na porta %s (%s workers, fila %s)...", PORT, HTTP_WORKERS, HTTP_QUEUE_SIZE)
     httpd.serve_forever()
 
@@ -0,0 +1,126 @@
+"""Saúde do servidor Minecraft (/api/server-health): TPS/MSPT estimados e lag.
+
+Fontes, todas incrementais e fora das requisições:
+
+- avisos "Can't keep up! ... Running 2345ms or 46 ticks behind" do
+  latest.log, recebidos como listener do ``LogWatcher`` (só as linhas novas,
+  na thread do hub; a checagem é um ``in`` por linha);
+- jogadores online e latência do ping, lidos do snapshot do ``StatusPoller``
+  a cada publicação nova.
+
+TPS é estimado pelos ticks perdidos nos avisos dentro da janela
+(20 * (1 - ms perdidos / janela)); com o servidor atrasado, o MSPT médio
+é 1000 / TPS. Sem avisos na janela o servidor acompanhou os 20 TPS e o MSPT
+fica abaixo de 50 ms (o log não diz quanto).
+"""
+import re
+import threading
+import time
+from collections import deque, namedtuple
+
+from log_index import LineParser
+from system_metrics import RingBuffer
+
+
+LAG_MARKER = "Can't keep up!"
+LAG_RE = re.compile(r"Running (\d+)ms or (\d+) ticks behind")
+TPS_WINDOWS = (("1m", 60), ("5m", 300), ("15m", 900))
+TARGET_TPS = 20.0
+
+LagEvent = namedtuple("LagEvent", ["ts", "ms_behind", "ticks_behind"])
+StatusPoint = namedtuple("StatusPoint", ["ts", "online", "players", "latency"])
+
+
+def percentiles(values, pcts=(50, 95, 99)):
+    """{"p50": ..., "p95": ..., "p99": ..., "max": ...} por posição (nearest-rank)"""
+    if not values:
+        return None
+    values = sorted(values)
+    summary = {}
+    for pct in pcts:
+        k = max(0, min(len(values) - 1, -(-pct * len(values) // 100) - 1))
+        summary[f"p{pct}"] = round(values[k], 1)
+    summary["max"] = round(values[-1], 1)
+    return summary
+
+
+def estimate_tps(events, window, now):
+    """TPS médio nos últimos ``window`` segundos a partir dos avisos de lag"""
+    lost_ms = sum(e.ms_behind for e in events if e.ts >= now - window)
+    return round(max(0.0, TARGET_TPS * (1 - lost_ms / (window * 1000.0))), 2)
+
+
+class HealthCollector:
+    """Avisos de lag do log + série de status do poller"""
+
+    def __init__(self, status_poller, max_events=1000, history=3600, interval=5.0):
+        self.status_poller = status_poller
+        self.interval = interval
+        self.lag_events = deque(maxlen=max_events)
+        self.status_points = RingBuffer(max(1, int(history / interval)))
+        self._parser = LineParser()
+        self._last_seq = None
+        self._lock = threading.Lock()
+
+    def attach(self, log_watcher, hub):
+        """Registra o listener do log e a amostragem do status no loop do hub"""
+        log_watcher.add_listener(self.on_log_lines)
+        hub.call_every(self.interval, self.sample_status)
+
+    def on_log_lines(self, lines, start, end, inode, reset):
+        for line in lines:
+            if LAG_MARKER not in line:
+                continue
+            match = LAG_RE.search(line)
+            if not match:
+                continue
+            ts = self._parser.parse(line)[0] or time.time()
+            event = LagEvent(ts, int(match.group(1)), int(match.group(2)))
+            with self._lock:
+                self.lag_events.append(event)
+
+    def sample_status(self):
+        snap = self.status_poller.snapshot()
+        if snap.seq == self._last_seq:
+            return
+        self._last_seq = snap.seq
+        self.status_points.append(StatusPoint(snap.fetched_at or time.time(), snap.online,
+                                              snap.players_online, snap.latency))
+
+    def report(self, window, now=None):
+        """Resumo para o /api/server-health (``window`` em segundos)"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            events = list(self.lag_events)
+        recent = [e for e in events if e.ts >= now - window]
+
+        tps = {name: estimate_tps(events, seconds, now) for name, seconds in TPS_WINDOWS}
+        # Atrasado: tempo médio por tick; sem lag o log só garante < 50 ms
+        mspt = {name: (round(1000.0 / value, 1) if 0 < value < TARGET_TPS else None)
+                for name, value in tps.items()}
+
+        points = [p for p in self.status_points.items() if p.ts >= now - window]
+        online = [p for p in points if p.online]
+        latencies = [p.latency for p in online if p.latency is not None]
+        players = [p.players for p in online]
+        snap = self.status_poller.snapshot()
+
+        return {
+            "online": snap.online,
+            "window": window,
+            "tps": tps,
+            "mspt_estimate": mspt,
+            "lag": {
+                "events": len(recent),
+                "ms_behind": percentiles([e.ms_behind for e in recent]),
+                "ticks_lost": sum(e.ticks_behind for e in recent),
+                "recent": [e._asdict() for e in recent[-10:]],
+            },
+            "latency_ms": percentiles(latencies),
+            "players": {
+                "current": snap.players_online,
+                "avg": round(sum(players) / len(players), 1) if players else None,
+                "max": max(players) if players else None,
+            },
+            "uptime_ratio": round(len(online) / len(points), 3) if points else None,
+        }
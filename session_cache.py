@@ -0,0 +1,197 @@
+"""Cache em memória das sessões de autenticação (tabela user_sessions).
+
+Um acerto no cache é só um lookup num dicionário: nada de SELECT, de
+``strptime`` do ``expires_at`` nem de UPDATE + commit do ``last_access``.
+
+- A expiração fica guardada como epoch, convertida uma vez no miss.
+- Os acessos são anotados em memória e gravados em lote a cada
+  ``flush_interval`` segundos (write-behind do ``last_access``).
+- O logout grava a revogação em ``session_revocations``; a thread de
+  manutenção de cada processo lê esse log a cada ``revocation_poll`` segundos
+  e descarta as entradas revogadas, então vários processos podem compartilhar
+  o images.db. Entradas também são revalidadas no banco depois de ``ttl``.
+- A mesma thread apaga as sessões expiradas (abandonadas, que nunca mais
+  voltariam a ser apresentadas) em lotes pelo índice de ``expires_at`` e, de
+  tempos em tempos, roda ``PRAGMA optimize`` e ``incremental_vacuum``.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import db
+from app_logging import get_logger
+
+log = get_logger("session")
+
+
+SessionEntry = namedtuple("SessionEntry", ["user_id", "user_name", "expires_epoch", "checked_until"])
+
+# Log de revogações mais velho que isso já não interessa a nenhum cache
+REVOCATION_RETENTION = 3600
+
+
+def parse_expires(expires_at):
+    return time.mktime(time.strptime(expires_at, '%Y-%m-%d %H:%M:%S'))
+
+
+class SessionCache:
+    """Cache TTL/LRU keyed por session_id"""
+
+    def __init__(self, max_entries=4096, ttl=60.0, flush_interval=30.0, revocation_poll=1.0,
+                 sweep_interval=300.0, sweep_batch=500, optimize_interval=21600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.revocation_poll = revocation_poll
+        self.sweep_interval = sweep_interval
+        self.sweep_batch = sweep_batch
+        self.optimize_interval = optimize_interval
+        self.hits = 0
+        self.misses = 0
+        self.swept = 0
+        self._entries = OrderedDict()
+        self._touched = {}
+        self._lock = threading.Lock()
+        self._last_revocation = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self, session_id):
+        """(user_id, user_name) da sessão válida ou None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and now < entry.checked_until:
+                if now >= entry.expires_epoch:
+                    del self._entries[session_id]
+                    self._touched.pop(session_id, None)
+                    entry = None
+                else:
+                    self._entries.move_to_end(session_id)
+                    self._touched[session_id] = now
+                    self.hits += 1
+                    return entry.user_id, entry.user_name
+        # Fora do cache, TTL vencido ou sessão expirada: decide no banco
+        return self._load(session_id, now)
+
+    def _load(self, session_id, now):
+        self.misses += 1
+        row = db.get_session(session_id)
+        if row is None:
+            with self._lock:
+                self._entries.pop(session_id, None)
+            return None
+
+        user_id, user_name, expires_at = row
+        expires_epoch = parse_expires(expires_at)
+        if now >= expires_epoch:
+            db.delete_session(session_id)
+            with self._lock:
+                self._entries.pop(session_id, None)
+            return None
+
+        entry = SessionEntry(user_id, user_name, expires_epoch, min(now + self.ttl, expires_epoch))
+        with self._lock:
+            self._entries[session_id] = entry
+            self._entries.move_to_end(session_id)
+            self._touched[session_id] = now
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return user_id, user_name
+
+    def invalidate(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
+            self._touched.pop(session_id, None)
+
+    def revoke(self, session_id):
+        """Logout: remove do cache, do banco e avisa os outros processos"""
+        self.invalidate(session_id)
+        db.revoke_session(session_id, time.time())
+
+    def revoke_user(self, user_id):
+        """Encerra todas as sessões do usuário (todos os dispositivos); devolve quantas"""
+        session_ids = db.revoke_user_sessions(user_id, time.time())
+        for session_id in session_ids:
+            self.invalidate(session_id)
+        return len(session_ids)
+
+    def sessions_for(self, user_id):
+        """Sessões do usuário no banco, com os last_access pendentes já gravados"""
+        self.flush()
+        return db.get_user_sessions(user_id)
+
+    def sweep(self):
+        """Apaga as sessões expiradas em lotes (cada lote é uma transação curta)"""
+        now = time.strftime('%Y-%m-%d %H:%M:%S')
+        total = 0
+        while not self._stop.is_set():
+            deleted = db.delete_expired_sessions(now, self.sweep_batch)
+            total += deleted
+            if deleted < self.sweep_batch:
+                break
+            # Solta o lock de escrita entre lotes
+            time.sleep(0.05)
+        self.swept += total
+        if total:
+            log.info("%s sessões expiradas removidas", total)
+        return total
+
+    def flush(self):
+        """Grava os last_access acumulados numa única transação"""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        if not touched:
+            return 0
+        db.touch_sessions([
+            (time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(ts)), session_id)
+            for session_id, ts in touched.items()
+        ])
+        return len(touched)
+
+    def apply_revocations(self):
+        rows = db.get_revocations_since(self._last_revocation)
+        if not rows:
+            return
+        with self._lock:
+            for rev_id, session_id in rows:
+                self._entries.pop(session_id, None)
+                self._touched.pop(session_id, None)
+        self._last_revocation = rows[-1][0]
+
+    def start(self):
+        # Revogações anteriores ao start não afetam um cache vazio
+        self._last_revocation = db.last_revocation_id()
+        self._thread = threading.Thread(target=self._run, name="session-cache", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _run(self):
+        next_flush = time.monotonic() + self.flush_interval
+        next_prune = time.monotonic()
+        next_sweep = time.monotonic()
+        next_optimize = time.monotonic() + self.optimize_interval
+        while not self._stop.wait(self.revocation_poll):
+            try:
+                self.apply_revocations()
+                now = time.monotonic()
+                if now >= next_flush:
+                    self.flush()
+                    next_flush = now + self.flush_interval
+                if now >= next_prune:
+                    db.prune_revocations(time.time() - REVOCATION_RETENTION)
+                    next_prune = now + REVOCATION_RETENTION / 4
+                if now >= next_sweep:
+                    self.sweep()
+                    next_sweep = now + self.sweep_interval
+                if now >= next_optimize:
+                    free = db.optimize()
+                    log.info("PRAGMA optimize executado (%s páginas livres)", free)
+                    next_optimize = now + self.optimize_interval
+            except Exception as e:
+                log.error("Erro na manutenção do cache de sessões: %s", e)
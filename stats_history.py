@@ -0,0 +1,294 @@
+"""Histórico dos contadores de stats dos jogadores (séries temporais).
+
+O stats JSON do Minecraft só tem contadores acumulados. Uma thread amostra
+os contadores de ``METRICS`` de cada jogador a cada ``interval`` segundos e
+grava num banco separado (stats_history.db):
+
+- ``stat_samples``: amostras brutas com codificação delta (só a diferença
+  para a amostra anterior, e só quando mudou), mantidas por ``raw_days``;
+- ``stat_rollups``: baldes por hora (mantidos por ``hourly_days``) e por dia
+  (sem expirar) com o delta do balde e o valor acumulado no fim dele;
+- ``stat_last``: último valor absoluto de cada contador, base dos deltas.
+
+Os baldes são atualizados junto com cada amostra, então uma consulta de
+intervalo é uma busca pela chave primária de ``stat_rollups`` e nunca
+depende do tamanho do histórico.
+"""
+import re
+import threading
+import time
+
+import db
+from app_logging import get_logger
+
+log = get_logger("history")
+
+
+HISTORY_FILE = "stats_history.db"
+
+HOUR = 3600
+DAY = 86400
+
+# Nome na API -> extrator a partir do resumo do StatsRepository
+METRICS = {
+    "play_time": lambda s: s["play_time_ticks"],
+    "deaths": lambda s: s["custom"].get("minecraft:deaths", 0),
+    "mob_kills": lambda s: s["custom"].get("minecraft:mob_kills", 0),
+    "player_kills": lambda s: s["custom"].get("minecraft:player_kills", 0),
+    "jumps": lambda s: s["custom"].get("minecraft:jump", 0),
+    "damage_dealt": lambda s: s["custom"].get("minecraft:damage_dealt", 0),
+    "damage_taken": lambda s: s["custom"].get("minecraft:damage_taken", 0),
+    "distance_walked": lambda s: s["custom"].get("minecraft:walk_one_cm", 0),
+    "distance_sprinted": lambda s: s["custom"].get("minecraft:sprint_one_cm", 0),
+    "blocks_mined": lambda s: s["total_mined"],
+    "items_crafted": lambda s: s["total_crafted"],
+    "items_collected": lambda s: s["total_picked_up"],
+}
+
+RANGE_RE = re.compile(r"^(\d+)([hd])$")
+MAX_RANGE = 366 * DAY
+# Até este intervalo a API responde com amostras brutas; até 2 dias, por hora
+RAW_RANGE = 6 * HOUR
+HOURLY_RANGE = 2 * DAY
+
+
+def parse_range(value):
+    """'24h' / '7d' -> segundos (ValueError se inválido)"""
+    match = RANGE_RE.match(value or "")
+    if not match:
+        raise ValueError("range inválido (use ex.: 6h, 24h, 7d, 30d)")
+    seconds = int(match.group(1)) * (HOUR if match.group(2) == "h" else DAY)
+    if not 0 < seconds <= MAX_RANGE:
+        raise ValueError("range fora do limite (máx. 366d)")
+    return seconds
+
+
+def hour_bucket(ts):
+    return ts - ts % HOUR
+
+
+def day_bucket(ts):
+    """Meia-noite local do dia de ``ts``"""
+    lt = time.localtime(ts)
+    return int(time.mktime((lt.tm_year, lt.tm_mon, lt.tm_mday, 0, 0, 0, 0, 0, -1)))
+
+
+class StatsHistory:
+    """Acesso ao banco do histórico (escrita só pela thread do sampler)"""
+
+    def __init__(self, path=HISTORY_FILE, raw_days=7, hourly_days=90):
+        self.path = path
+        self.raw_days = raw_days
+        self.hourly_days = hourly_days
+
+    def conn(self):
+        return db.get_connection(self.path)
+
+    def init(self):
+        conn = self.conn()
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS stat_samples (
+                uuid TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                delta INTEGER NOT NULL,
+                PRIMARY KEY (uuid, metric, ts)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_stat_samples_ts ON stat_samples (ts)')
+        # res = 3600 (hora) ou 86400 (dia); value = acumulado no fim do balde
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS stat_rollups (
+                uuid TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                res INTEGER NOT NULL,
+                ts INTEGER NOT NULL,
+                delta INTEGER NOT NULL,
+                value INTEGER NOT NULL,
+                PRIMARY KEY (uuid, metric, res, ts)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS stat_last (
+                uuid TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                value INTEGER NOT NULL,
+                PRIMARY KEY (uuid, metric)
+            ) WITHOUT ROWID
+        ''')
+        conn.commit()
+
+    # --- escrita -------------------------------------------------------------
+
+    def last_values(self, uuid):
+        rows = self.conn().execute(
+            'SELECT metric, value FROM stat_last WHERE uuid = ?', (uuid,)).fetchall()
+        return dict(rows)
+
+    def record(self, uuid, values, ts, last=None):
+        """Grava uma amostra ``{metric: valor}``; só contadores que mudaram.
+
+        A primeira amostra de um contador só define a base (delta 0), senão o
+        primeiro balde receberia todo o acumulado do jogador.
+        """
+        if last is None:
+            last = self.last_values(uuid)
+        samples = []
+        rollups = []
+        changed = []
+        for metric, value in values.items():
+            previous = last.get(metric)
+            if previous == value:
+                continue
+            # Contador menor que antes (stats resetados): recomeça a base
+            delta = value - previous if previous is not None and value > previous else 0
+            if delta:
+                samples.append((uuid, metric, ts, delta))
+            changed.append((uuid, metric, ts, value))
+            for res, bucket in ((HOUR, hour_bucket(ts)), (DAY, day_bucket(ts))):
+                rollups.append((uuid, metric, res, bucket, delta, value))
+        if not changed:
+            return 0
+
+        conn = self.conn()
+        try:
+            conn.executemany('''
+                INSERT INTO stat_samples (uuid, metric, ts, delta) VALUES (?, ?, ?, ?)
+                ON CONFLICT(uuid, metric, ts) DO UPDATE SET delta = delta + excluded.delta
+            ''', samples)
+            conn.executemany('''
+                INSERT INTO stat_rollups (uuid, metric, res, ts, delta, value)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(uuid, metric, res, ts) DO UPDATE SET
+                    delta = delta + excluded.delta,
+                    value = excluded.value
+            ''', rollups)
+            conn.executemany('''
+                INSERT INTO stat_last (uuid, metric, ts, value) VALUES (?, ?, ?, ?)
+                ON CONFLICT(uuid, metric) DO UPDATE SET ts = excluded.ts, value = excluded.value
+            ''', changed)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return len(samples)
+
+    def prune(self, now):
+        """Remove amostras brutas e baldes por hora fora da retenção"""
+        conn = self.conn()
+        try:
+            raw = conn.execute('DELETE FROM stat_samples WHERE ts < ?',
+                               (now - self.raw_days * DAY,)).rowcount
+            hourly = conn.execute('DELETE FROM stat_rollups WHERE res = ? AND ts < ?',
+                                  (HOUR, now - self.hourly_days * DAY)).rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return raw, hourly
+
+    # --- consulta ------------------------------------------------------------
+
+    def history(self, uuid, metric, range_seconds, now=None):
+        """Série de ``metric`` nos últimos ``range_seconds``.
+
+        Devolve ``(resolução, pontos, total)``; cada ponto é
+        ``(ts, delta, valor_acumulado)`` e ``total`` é o quanto o contador
+        subiu no intervalo.
+        """
+        now = int(now if now is not None else time.time())
+        start = now - range_seconds
+        conn = self.conn()
+        last = conn.execute('SELECT value FROM stat_last WHERE uuid = ? AND metric = ?',
+                            (uuid, metric)).fetchone()
+        if last is None:
+            return "none", [], 0
+        current = last[0]
+
+        if range_seconds <= RAW_RANGE and range_seconds <= self.raw_days * DAY:
+            rows = conn.execute('''
+                SELECT ts, delta FROM stat_samples
+                WHERE uuid = ? AND metric = ? AND ts >= ?
+                ORDER BY ts
+            ''', (uuid, metric, start)).fetchall()
+            # Valores reconstruídos de trás para frente a partir do último
+            points = []
+            value = current
+            for ts, delta in reversed(rows):
+                points.append((ts, delta, value))
+                value -= delta
+            points.reverse()
+            return "raw", points, current - value
+
+        if range_seconds <= HOURLY_RANGE:
+            res, first = HOUR, hour_bucket(start)
+        else:
+            res, first = DAY, day_bucket(start)
+        points = conn.execute('''
+            SELECT ts, delta, value FROM stat_rollups
+            WHERE uuid = ? AND metric = ? AND res = ? AND ts >= ?
+            ORDER BY ts
+        ''', (uuid, metric, res, first)).fetchall()
+        # Valor no fim do balde anterior ao intervalo (uma busca pelo índice)
+        before = conn.execute('''
+            SELECT value FROM stat_rollups
+            WHERE uuid = ? AND metric = ? AND res = ? AND ts < ?
+            ORDER BY ts DESC LIMIT 1
+        ''', (uuid, metric, res, first)).fetchone()
+        if before is not None:
+            total = current - before[0]
+        else:
+            total = sum(p[1] for p in points)
+        return ("hour" if res == HOUR else "day"), points, total
+
+
+class StatsSampler(threading.Thread):
+    """Thread que amostra os contadores de todos os jogadores do registro"""
+
+    def __init__(self, registry, stats_repo, history, interval=300.0):
+        super().__init__(name="stats-sampler", daemon=True)
+        self.registry = registry
+        self.stats_repo = stats_repo
+        self.history = history
+        self.interval = interval
+        self._last = {}
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def sample_once(self, now=None):
+        now = int(now if now is not None else time.time())
+        written = 0
+        for entry in self.registry.leaderboard():
+            try:
+                summary = self.stats_repo.get_stats(entry.uuid)
+            except Exception as e:
+                log.error("Erro ao ler stats de %s: %s", entry.name, e)
+                continue
+            values = {metric: int(get(summary)) for metric, get in METRICS.items()}
+            last = self._last.get(entry.uuid)
+            if last is None:
+                last = self.history.last_values(entry.uuid)
+            if values == last:
+                continue
+            written += self.history.record(entry.uuid, values, now, last)
+            self._last[entry.uuid] = values
+        return written
+
+    def run(self):
+        next_prune = 0
+        while True:
+            try:
+                self.sample_once()
+                if time.monotonic() >= next_prune:
+                    raw, hourly = self.history.prune(int(time.time()))
+                    if raw or hourly:
+                        log.info("Retenção: %s amostras e %s baldes por hora removidos", raw, hourly)
+                    next_prune = time.monotonic() + HOUR
+            except Exception as e:
+                log.error("Erro ao amostrar stats: %s", e)
+            if self._stop_event.wait(self.interval):
+                return
@@ -0,0 +1,91 @@
+"""Cache das estatísticas dos jogadores (/minecraft-stats e /minecraft-advancements).
+
+O Minecraft só reescreve esses JSONs no autosave, então cada arquivo é
+lido e agregado uma vez e guardado junto com ``(mtime_ns, size)``. Nas
+requisições seguintes basta um ``stat()`` por arquivo: se não mudou, o
+resultado pré-agregado (tempo de jogo, totais, top 5, advancements) é
+devolvido direto.
+"""
+import json
+import os
+import threading
+
+
+def _pretty(key):
+    return key.split(':')[-1].replace('_', ' ').title()
+
+
+def summarize_stats(stats_data):
+    """Agrega um <uuid>.json de stats no formato usado pela API"""
+    stats = stats_data.get('stats', {})
+    custom = stats.get('minecraft:custom', {})
+    killed = stats.get('minecraft:killed', {})
+    killed_by = stats.get('minecraft:killed_by', {})
+    mined = stats.get('minecraft:mined', {})
+    crafted = stats.get('minecraft:crafted', {})
+    picked_up = stats.get('minecraft:picked_up', {})
+
+    play_time_ticks = custom.get('minecraft:play_time', 0)
+
+    # Top 5 mobs killed / items mined
+    sorted_killed = sorted(killed.items(), key=lambda x: x[1], reverse=True)[:5]
+    sorted_mined = sorted(mined.items(), key=lambda x: x[1], reverse=True)[:5]
+
+    return {
+        "play_time_ticks": play_time_ticks,
+        "custom": custom,
+        "top_mobs_killed": [{"mob": _pretty(k), "count": v} for k, v in sorted_killed],
+        "top_mined": [{"item": _pretty(k), "count": v} for k, v in sorted_mined],
+        "killed_by": [{"mob": _pretty(k), "count": v} for k, v in killed_by.items()],
+        "total_picked_up": sum(picked_up.values()),
+        "total_mined": sum(mined.values()),
+        "total_crafted": sum(crafted.values()),
+    }
+
+
+def count_advancements(adv_data):
+    return len([k for k, v in adv_data.items() if isinstance(v, dict) and v.get('done', False)])
+
+
+class StatsRepository:
+    """Stats e advancements por UUID, re-parseados só quando o arquivo muda"""
+
+    def __init__(self, stats_dir="/minecraft-stats", advancements_dir="/minecraft-advancements"):
+        self.stats_dir = stats_dir
+        self.advancements_dir = advancements_dir
+        self.hits = 0
+        self.misses = 0
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def stats_path(self, uuid):
+        return os.path.join(self.stats_dir, f"{uuid}.json")
+
+    def advancements_path(self, uuid):
+        return os.path.join(self.advancements_dir, f"{uuid}.json")
+
+    def _load(self, path, build):
+        """Valor agregado de ``path``; FileNotFoundError se não existir"""
+        st = os.stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+        cached = self._cache.get(path)
+        if cached is not None and cached[0] == key:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        with open(path, 'r') as f:
+            value = build(json.load(f))
+        with self._lock:
+            self._cache[path] = (key, value)
+        return value
+
+    def get_stats(self, uuid):
+        return self._load(self.stats_path(uuid), summarize_stats)
+
+    def get_advancements(self, uuid):
+        """Quantidade de advancements completos (0 se não houver arquivo)"""
+        try:
+            return self._load(self.advancements_path(uuid), count_advancements)
+        except (OSError, ValueError):
+            return 0
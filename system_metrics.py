@@ -0,0 +1,221 @@
+"""Amostragem de métricas do host em background (/api/system-metrics).
+
+Uma thread lê CPU, RAM, disco, rede e o processo Java do servidor a cada
+``interval`` segundos e guarda as amostras num buffer circular de tamanho
+fixo. O handler só lê a última amostra (ou a série recente, reduzida para
+sparklines com ``?window=``); nenhuma requisição espera o ``cpu_percent``.
+"""
+import re
+import threading
+import time
+from collections import namedtuple
+
+import psutil
+
+from app_logging import get_logger
+
+log = get_logger("metrics")
+
+
+Sample = namedtuple("Sample", [
+    "ts",
+    "cpu_percent",
+    "ram_percent",
+    "ram_used",
+    "ram_total",
+    "disk_read_bps",
+    "disk_write_bps",
+    "net_sent_bps",
+    "net_recv_bps",
+    "java",             # JavaSample ou None se o processo não foi encontrado
+])
+
+JavaSample = namedtuple("JavaSample", ["pid", "cpu_percent", "rss", "threads"])
+
+# Campos numéricos que podem ser pedidos como série
+SERIES_FIELDS = ("cpu_percent", "ram_percent", "disk_read_bps", "disk_write_bps",
+                 "net_sent_bps", "net_recv_bps", "java_cpu_percent", "java_rss")
+
+WINDOW_RE = re.compile(r"^(\d+)([smh])$")
+WINDOW_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+def parse_window(value, max_seconds):
+    """'90s' / '10m' / '1h' -> segundos (ValueError se inválido)"""
+    match = WINDOW_RE.match(value or "")
+    if not match:
+        raise ValueError("window inválida (use ex.: 5m, 30m, 1h)")
+    seconds = int(match.group(1)) * WINDOW_UNITS[match.group(2)]
+    if not 0 < seconds <= max_seconds:
+        raise ValueError(f"window fora do limite (máx. {max_seconds}s)")
+    return seconds
+
+
+class RingBuffer:
+    """Buffer circular de tamanho fixo (escrita por uma thread, leitura por várias)"""
+
+    def __init__(self, size):
+        self.size = size
+        self._items = [None] * size
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def append(self, item):
+        with self._lock:
+            self._items[self._next] = item
+            self._next = (self._next + 1) % self.size
+            self._count = min(self._count + 1, self.size)
+
+    def latest(self):
+        with self._lock:
+            if not self._count:
+                return None
+            return self._items[self._next - 1]
+
+    def items(self):
+        """Itens do mais antigo para o mais novo"""
+        with self._lock:
+            if self._count < self.size:
+                return self._items[:self._count]
+            return self._items[self._next:] + self._items[:self._next]
+
+    def __len__(self):
+        return self._count
+
+
+def field(sample, name):
+    if name.startswith("java_"):
+        if sample.java is None:
+            return None
+        return sample.java.cpu_percent if name == "java_cpu_percent" else sample.java.rss
+    return getattr(sample, name)
+
+
+def downsample(samples, points):
+    """Série com no máximo ``points`` pontos (média de cada grupo de amostras)"""
+    step = max(1, -(-len(samples) // points))
+    series = {"ts": []}
+    series.update({name: [] for name in SERIES_FIELDS})
+    for i in range(0, len(samples), step):
+        group = samples[i:i + step]
+        series["ts"].append(group[-1].ts)
+        for name in SERIES_FIELDS:
+            values = [v for v in (field(s, name) for s in group) if v is not None]
+            series[name].append(round(sum(values) / len(values), 1) if values else None)
+    return series
+
+
+def sample_to_dict(sample):
+    """Formato do /api/system-metrics (chaves antigas + disco, rede e Java)"""
+    if sample is None:
+        return {"error": "Métricas ainda não disponíveis"}
+    data = {
+        "cpu_percent": round(sample.cpu_percent, 1),
+        "ram_percent": round(sample.ram_percent, 1),
+        "ram_used_gb": round(sample.ram_used / (1024**3), 2),
+        "ram_total_gb": round(sample.ram_total / (1024**3), 2),
+        "disk_read_mb_s": round(sample.disk_read_bps / (1024**2), 2),
+        "disk_write_mb_s": round(sample.disk_write_bps / (1024**2), 2),
+        "net_sent_mb_s": round(sample.net_sent_bps / (1024**2), 2),
+        "net_recv_mb_s": round(sample.net_recv_bps / (1024**2), 2),
+        "java": None,
+        "sampled_at": sample.ts,
+    }
+    if sample.java is not None:
+        data["java"] = {
+            "pid": sample.java.pid,
+            "cpu_percent": round(sample.java.cpu_percent, 1),
+            "rss_gb": round(sample.java.rss / (1024**3), 2),
+            "threads": sample.java.threads,
+        }
+    return data
+
+
+class MetricsSampler(threading.Thread):
+    """Thread que amostra o host e mantém as últimas ``history`` segundos"""
+
+    def __init__(self, interval=2.0, history=3600, java_name="java", java_rescan=30.0):
+        super().__init__(name="metrics-sampler", daemon=True)
+        self.interval = interval
+        self.history = history
+        self.java_name = java_name
+        self.java_rescan = java_rescan
+        self.buffer = RingBuffer(max(1, int(history / interval)))
+        self._prev = None           # (monotonic, disco, rede)
+        self._java = None
+        self._next_java_scan = 0.0
+        self._stop_event = threading.Event()
+        # Primeira chamada só define a referência do cpu_percent
+        psutil.cpu_percent(interval=None)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _find_java(self):
+        now = time.monotonic()
+        if self._java is not None and self._java.is_running():
+            return self._java
+        self._java = None
+        if now < self._next_java_scan:
+            return None
+        self._next_java_scan = now + self.java_rescan
+        for proc in psutil.process_iter(["name"]):
+            if proc.info["name"] == self.java_name:
+                proc.cpu_percent(interval=None)
+                self._java = proc
+                break
+        return self._java
+
+    def _java_sample(self):
+        proc = self._find_java()
+        if proc is None:
+            return None
+        try:
+            with proc.oneshot():
+                return JavaSample(proc.pid, proc.cpu_percent(interval=None),
+                                  proc.memory_info().rss, proc.num_threads())
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            self._java = None
+            return None
+
+    def sample_once(self):
+        now = time.monotonic()
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_io_counters()
+        net = psutil.net_io_counters()
+        rates = [0.0, 0.0, 0.0, 0.0]
+        if self._prev is not None:
+            elapsed = now - self._prev[0]
+            prev_disk, prev_net = self._prev[1], self._prev[2]
+            if elapsed > 0:
+                if disk is not None and prev_disk is not None:
+                    rates[0] = max(0, disk.read_bytes - prev_disk.read_bytes) / elapsed
+                    rates[1] = max(0, disk.write_bytes - prev_disk.write_bytes) / elapsed
+                if net is not None and prev_net is not None:
+                    rates[2] = max(0, net.bytes_sent - prev_net.bytes_sent) / elapsed
+                    rates[3] = max(0, net.bytes_recv - prev_net.bytes_recv) / elapsed
+        self._prev = (now, disk, net)
+
+        sample = Sample(time.time(), psutil.cpu_percent(interval=None), memory.percent,
+                        memory.used, memory.total, *rates, self._java_sample())
+        self.buffer.append(sample)
+        return sample
+
+    def latest(self):
+        return self.buffer.latest()
+
+    def window(self, seconds, points=60):
+        """Amostras dos últimos ``seconds`` reduzidas a ``points`` pontos"""
+        cutoff = time.time() - seconds
+        samples = [s for s in self.buffer.items() if s.ts >= cutoff]
+        return downsample(samples, points)
+
+    def run(self):
+        while True:
+            try:
+                self.sample_once()
+            except Exception as e:
+                log.error("Erro ao amostrar métricas: %s", e)
+            if self._stop_event.wait(self.interval):
+                return